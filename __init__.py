@@ -1,7 +1,17 @@
 """ SIPH
     Satellite Image Processing Hub
 """
-from . import common, io, tools, visualization, models
+from .common.lazy import lazy_attrs
+
+
+# subpackages are imported on first access
+__getattr__, __dir__ = lazy_attrs(__name__, [
+    ['common', []],
+    ['io', []],
+    ['tools', []],
+    ['visualization', []],
+    ['models', []]
+])
 
 __version__ = '0.4.0'
 
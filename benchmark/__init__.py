@@ -0,0 +1,2 @@
+""" Module for benchmarks of SIPH
+"""
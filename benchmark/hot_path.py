@@ -0,0 +1,351 @@
+""" Module for timing hot paths of SIPH on synthetic inputs
+
+    Args:
+        -c (case): cases to run, all if not specified
+        -s (scale): scales to run, small, medium and/or large
+        -r (repeat): runs per case, the fastest is kept
+        --seed: random seed of synthetic inputs
+        --compare: earlier result to compare with
+        --keep: keep synthetic inputs
+        des: output json file
+
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import numpy as np
+
+from osgeo import gdal
+
+from . import synthetic as syn
+from ..io import (modis2stack, modis2composite, viirs2gtif, goes2stack,
+                    sif2grid, yatsm2map, cache2map, stackMerge, array2stack)
+from ..common import log, clean_up
+from ..common import constants as cons
+from ..models.chart.blend_modis_lc import blend_lc
+from ..models.fusion.nob_between_dates import get_nob_between_dates
+
+
+# size multiplier of each scale
+SCALES = {'small': 1, 'medium': 2, 'large': 4}
+
+
+def case_modis2stack(tmp, scale, seed):
+    """ MOD09GA HDF to stack, 500m pixels """
+    side = 200 * scale
+    hdf = syn.fake_modis_hdf(os.path.join(tmp,
+            'MOD09GA.A2016001.h12v04.006.2016003000000.hdf'), side, side, seed)
+    return modis2stack, [hdf, tmp, 'NA', True], side * side, 'pixel'
+
+
+def case_viirs2gtif(tmp, scale, seed):
+    """ VNP09GA HDF5 to geotiff, 500m pixels """
+    side = 200 * scale
+    h5 = syn.fake_viirs_h5(os.path.join(tmp,
+            'VNP09GA.A2016001.h12v04.001.2016003000000.h5'), side, side, seed)
+    return (viirs2gtif, [h5, os.path.join(tmp, 'VNP09GA.tif'), True],
+            side * side, 'pixel')
+
+
+def case_modis2composite(tmp, scale, seed):
+    """ Terra and Aqua stacks to composite """
+    side = 100 * scale
+    mod = syn.fake_modis_stack(os.path.join(tmp, 'MOD09GA.A2016001.tif'),
+                                side, side, seed)
+    myd = syn.fake_modis_stack(os.path.join(tmp, 'MYD09GA.A2016001.tif'),
+                                side, side, seed + 1)
+    return modis2composite, [mod, myd, tmp, True], side * side, 'pixel'
+
+
+def case_clean_up(tmp, scale, seed):
+    """ salt and pepper clean up of a class map """
+    side = 100 * scale
+    rs = np.random.RandomState(seed)
+    array = syn.random_nodata(rs.randint(0, 5, (side, side)), 0.05, rs)
+    return clean_up, [array, 1], side * side, 'pixel'
+
+
+def case_sif2grid(tmp, scale, seed):
+    """ grid SIF soundings at 0.5 degree """
+    nobs = 20000
+    files = [syn.fake_sif(os.path.join(tmp, 'sif{}.nc'.format(i)), nobs,
+                            seed + i) for i in range(0, scale)]
+    return (sif2grid, [files, os.path.join(tmp, 'sif.tif'), 0.5, True],
+            nobs * scale, 'sounding')
+
+
+def case_goes2stack(tmp, scale, seed):
+    """ GOES netCDF to stack, one file per scale """
+    files = [syn.fake_goes(os.path.join(tmp,
+                '2016010{}090000-OSISAF-RADFLX-01H-GOES13.nc'.format(i + 1)),
+                seed + i) for i in range(0, scale)]
+
+    def _run(files):
+        return max([goes2stack(x, '{}.tif'.format(x), True) for x in files])
+
+    return _run, [files], 2400 * 2400 * scale, 'pixel'
+
+
+def case_yatsm2map(tmp, scale, seed):
+    """ change map of a YATSM line """
+    samples = 1000 * scale
+    _file = os.path.join(tmp, 'yatsm_r0.npz')
+    n = syn.fake_yatsm(_file, 0, samples, seed)
+    return yatsm2map, [_file, 'change', samples], n, 'record'
+
+
+def case_cache2map(tmp, scale, seed):
+    """ date of change map of a YATSM line """
+    samples = 1000 * scale
+    _file = os.path.join(tmp, 'yatsm_r0.npz')
+    n = syn.fake_yatsm(_file, 0, samples, seed)
+    return cache2map, [_file, 'doc', samples], n, 'record'
+
+
+def case_nob_between_dates(tmp, scale, seed):
+    """ clear observations between two date images from mat caches """
+    side = 50 * scale
+    dates = syn.fake_dates(200, seed)
+    rs = np.random.RandomState(seed)
+    geo = syn.synthetic_geo(side, side)
+    imgs = []
+    for i in range(0, 2):
+        array = rs.choice(dates[1:-1], (side, side)).astype(np.int32)
+        imgs.append(os.path.join(tmp, 'date{}.tif'.format(i)))
+        array2stack(array, geo, imgs[-1], 'NA', cons.NODATA, gdal.GDT_Int32,
+                    True)
+    cache = os.path.join(tmp, 'cache')
+    os.makedirs(cache)
+    for i in range(0, side):
+        syn.fake_mat_cache(os.path.join(cache, 'ts_r{}.mat'.format(i + 1)),
+                            side, dates, seed + i)
+    return (get_nob_between_dates, ['ts_r[line].mat', 'mat', imgs[0], imgs[1],
+            cache, os.path.join(tmp, 'nob.tif'), True], side * side, 'pixel')
+
+
+def case_stackMerge(tmp, scale, seed):
+    """ merge four two band stacks """
+    side = 500 * scale
+    stacks = [syn.fake_stack(os.path.join(tmp, 's{}.tif'.format(i)), side,
+                side, 2, seed + i) for i in range(0, 4)]
+    return (stackMerge, [stacks, os.path.join(tmp, 'merge.tif'),
+            gdal.GDT_Int16, True], side * side * 8, 'pixel')
+
+
+def case_blend_lc(tmp, scale, seed):
+    """ blend MODIS land cover with YATSM lines """
+    lines = 10 * scale
+    samples = 200
+    rs = np.random.RandomState(seed)
+    lc = os.path.join(tmp, 'lc.tif')
+    array = rs.randint(0, 17, (lines // 2 + 1, samples // 2, 16))
+    array2stack(array.astype(np.uint8), syn.synthetic_geo(lines // 2 + 1,
+                samples // 2), lc, 'NA', 255, gdal.GDT_Byte, True)
+    ori = os.path.join(tmp, 'yatsm')
+    os.makedirs(ori)
+    n = 0
+    for i in range(0, lines):
+        n += syn.fake_yatsm(os.path.join(ori, 'yatsm_r{}.npz'.format(i)), i,
+                            samples, seed + i)
+    return (blend_lc, ['yatsm_r*.npz', ori, lc, os.path.join(tmp, 'blend')],
+            n, 'record')
+
+
+CASES = [['modis2stack', case_modis2stack],
+            ['viirs2gtif', case_viirs2gtif],
+            ['modis2composite', case_modis2composite],
+            ['clean_up', case_clean_up],
+            ['sif2grid', case_sif2grid],
+            ['goes2stack', case_goes2stack],
+            ['yatsm2map', case_yatsm2map],
+            ['cache2map', case_cache2map],
+            ['nob_between_dates', case_nob_between_dates],
+            ['stackMerge', case_stackMerge],
+            ['blend_lc', case_blend_lc]]
+
+
+def measure(func, args, repeat=3):
+    """ time a function and track its peak memory
+
+    Args:
+        func (function): function to run
+        args (list): arguments of the function
+        repeat (int): number of timed runs, the fastest is kept
+
+    Returns:
+        result (dic): wall and cpu seconds, peak memory and return status
+
+    """
+    result = {'seconds': float('inf'), 'cpu': float('inf')}
+    for i in range(0, repeat):
+        wall = time.time()
+        cpu = sum(os.times()[0:2])
+        status = func(*args)
+        result['seconds'] = min(result['seconds'], time.time() - wall)
+        result['cpu'] = min(result['cpu'], sum(os.times()[0:2]) - cpu)
+
+    # one more run for memory, tracing slows it down so not timed
+    tracemalloc.start()
+    func(*args)
+    result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024.0 / 1024.0
+    tracemalloc.stop()
+
+    # return code of the function, arrays count as success
+    if type(status) == int:
+        result['status'] = status
+    else:
+        result['status'] = 0
+    return result
+
+
+def run_info():
+    """ describe the code and machine a benchmark ran on
+
+    Returns:
+        info (dic): commit, versions and host
+
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                            cwd=root).decode().strip()
+        dirty = len(subprocess.check_output(['git', 'status', '--porcelain',
+                    '--untracked-files=no'], cwd=root).strip()) > 0
+    except:
+        commit = 'NA'
+        dirty = False
+    return {'commit': commit, 'dirty': dirty, 'host': socket.gethostname(),
+            'python': platform.python_version(), 'numpy': np.__version__,
+            'gdal': gdal.__version__,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+
+
+def hot_path(des, cases='NA', scales=['small'], repeat=3, seed=0,
+                compare='NA', keep=False):
+    """ time hot paths on synthetic inputs and save results as json
+
+    Args:
+        des (str): path to output json file
+        cases (list, str): cases to run, NA for all
+        scales (list, str): scales to run
+        repeat (int): runs per case, the fastest is kept
+        seed (int): random seed of synthetic inputs
+        compare (str): path to earlier result, NA for not
+        keep (bool): keep synthetic inputs or not
+
+    Returns:
+        0: successful
+        1: error in setting up
+        2: some cases failed
+
+    """
+    # check inputs
+    if cases == 'NA':
+        cases = [x[0] for x in CASES]
+    unknown = [x for x in cases if x not in dict(CASES)]
+    unknown += [x for x in scales if x not in SCALES]
+    if len(unknown) > 0:
+        log.error('Unknown case or scale: {}'.format(', '.join(unknown)))
+        return 1
+    if compare != 'NA':
+        try:
+            with open(compare, 'r') as f:
+                old = dict([((x['case'], x['scale']), x)
+                            for x in json.load(f)['results']])
+        except:
+            log.error('Failed to read {}'.format(compare))
+            return 1
+
+    # run cases
+    _error = 0
+    info = run_info()
+    info['seed'] = seed
+    info['repeat'] = repeat
+    results = []
+    for case in cases:
+        for scale in scales:
+            tmp = tempfile.mkdtemp('.siph')
+            level = log.level
+            try:
+                log.info('Setting up {} at {} scale...'.format(case, scale))
+                func, args, size, unit = dict(CASES)[case](tmp, SCALES[scale],
+                                                            seed)
+                log.setLevel(logging.WARNING)
+                result = measure(func, args, repeat)
+            except Exception as e:
+                log.setLevel(level)
+                log.error('Failed to run {}: {}'.format(case, e))
+                _error = 2
+                continue
+            finally:
+                log.setLevel(level)
+                if keep:
+                    log.info('Inputs kept in {}'.format(tmp))
+                else:
+                    shutil.rmtree(tmp, ignore_errors=True)
+            if result['status'] != 0:
+                _error = 2
+            result.update({'case': case, 'scale': scale, 'size': size,
+                            'unit': unit})
+            result['throughput'] = size / max(result['seconds'], 1e-9)
+            results.append(result)
+            log.info('{} {}: {:.3f}s, {:.0f} {}/s, {:.1f}MB peak'.format(case,
+                        scale, result['seconds'], result['throughput'], unit,
+                        result['peak_mb']))
+            if compare != 'NA' and (case, scale) in old:
+                ref = old[(case, scale)]
+                log.info('{} {}: {:.2f}x faster, {:.2f}x memory'.format(case,
+                            scale, ref['seconds'] / max(result['seconds'],
+                            1e-9), result['peak_mb'] / max(ref['peak_mb'],
+                            1e-9)))
+
+    # save results
+    with open(des, 'w') as f:
+        json.dump({'info': info, 'results': results}, f, indent=2,
+                    sort_keys=True)
+    log.info('Saved results to {}'.format(des))
+    return _error
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--case', action='store', type=str, nargs='+',
+                        dest='case', default='NA', help='cases to run')
+    parser.add_argument('-s', '--scale', action='store', type=str, nargs='+',
+                        dest='scale', default=['small'],
+                        help='small, medium and/or large')
+    parser.add_argument('-r', '--repeat', action='store', type=int,
+                        dest='repeat', default=3, help='runs per case')
+    parser.add_argument('--seed', action='store', type=int, dest='seed',
+                        default=0, help='random seed')
+    parser.add_argument('--compare', action='store', type=str,
+                        dest='compare', default='NA',
+                        help='earlier result to compare with')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep synthetic inputs')
+    parser.add_argument('des', default='./', help='output json file')
+    args = parser.parse_args()
+
+    # print logs
+    log.info('Start benchmarking hot paths...')
+    if args.case != 'NA':
+        log.info('Cases: {}'.format(', '.join(args.case)))
+    log.info('Scales: {}'.format(', '.join(args.scale)))
+    log.info('{} runs per case'.format(args.repeat))
+    log.info('Saving results to {}'.format(args.des))
+    if args.compare != 'NA':
+        log.info('Comparing with {}'.format(args.compare))
+
+    # run benchmark and exit with its status
+    sys.exit(hot_path(args.des, args.case, args.scale, args.repeat, args.seed,
+                        args.compare, args.keep))
@@ -0,0 +1,148 @@
+""" Module for checking cold start time of SIPH imports
+
+    Args:
+        -n (repeat): number of cold starts per target
+        -t (tolerance): allowed slow down over baseline, e.g. 0.25 for 25%
+        --update: save results as the new baseline
+        baseline: path to baseline json file
+
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from ..common import log
+
+
+# libraries that should only be imported by jobs that use them
+HEAVY = ['osgeo', 'pyhdf', 'netCDF4', 'h5py', 'fiona', 'shapely', 'PIL',
+            'scipy', 'yaml']
+
+# statement to time and libraries it must not pull in
+TARGETS = [['SIPH', 'import SIPH', HEAVY],
+            ['common', 'from SIPH.common import log, get_files, manage_batch',
+                ['osgeo', 'pyhdf', 'netCDF4', 'h5py', 'fiona', 'shapely',
+                    'PIL', 'scipy']],
+            ['io.datafile', 'from SIPH.io import csv2list, hdr2geo',
+                ['osgeo', 'pyhdf', 'netCDF4', 'h5py', 'fiona', 'shapely',
+                    'PIL']],
+            ['io.stack', 'from SIPH.io import stack2array, stackGeo',
+                ['pyhdf', 'netCDF4', 'h5py', 'fiona', 'shapely', 'PIL']]]
+
+# absolute slack in seconds so very fast imports do not fail on noise
+SLACK = 0.01
+
+_CODE = '''import sys, time, json
+start = time.time()
+{}
+elapsed = time.time() - start
+print(json.dumps([elapsed, sorted(set(x.split('.')[0] for x in sys.modules))]))
+'''
+
+
+def cold_start(statement, repeat=5):
+    """ time a statement in fresh interpreters
+
+    Args:
+        statement (str): import statement, with SIPH as package name
+        repeat (int): number of fresh interpreters
+
+    Returns:
+        elapsed (float): fastest time in seconds
+        modules (list): top level modules imported by the statement
+
+    """
+    package = __package__.split('.')[0]
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+                            os.path.abspath(__file__))))
+    code = _CODE.format(statement.replace('SIPH', package))
+    elapsed = []
+    for i in range(0, repeat):
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                            cwd=root)
+        result = json.loads(output.decode().strip().split('\n')[-1])
+        elapsed.append(result[0])
+    return min(elapsed), result[1]
+
+
+def import_time(baseline='NA', repeat=5, tolerance=0.25, update=False):
+    """ check cold start time of SIPH imports against a baseline
+
+    Args:
+        baseline (str): path to baseline json file, NA for no comparison
+        repeat (int): number of cold starts per target
+        tolerance (float): allowed slow down over baseline
+        update (bool): save results as the new baseline
+
+    Returns:
+        0: successful
+        1: slower than baseline or heavy library imported
+        2: error when importing
+
+    """
+    # read baseline
+    base = {}
+    if baseline != 'NA' and os.path.isfile(baseline) and not update:
+        with open(baseline, 'r') as f:
+            base = json.load(f)
+
+    # time each target
+    _error = 0
+    result = {}
+    for label, statement, heavy in TARGETS:
+        try:
+            elapsed, modules = cold_start(statement, repeat)
+        except:
+            log.error('Failed to run {}'.format(statement))
+            _error = 2
+            continue
+        result[label] = elapsed
+        log.info('{}: {:.3f}s'.format(label, elapsed))
+        leak = [x for x in heavy if x in modules]
+        if len(leak) > 0:
+            log.error('{} imported {}'.format(label, ', '.join(leak)))
+            _error = max(_error, 1)
+        if label in base and elapsed > base[label] * (1 + tolerance) + SLACK:
+            log.error('{} is slower than baseline {:.3f}s'.format(label,
+                        base[label]))
+            _error = max(_error, 1)
+
+    # save baseline
+    if update and baseline != 'NA':
+        with open(baseline, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        log.info('Saved baseline to {}'.format(baseline))
+
+    # done
+    return _error
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--repeat', action='store', type=int,
+                        dest='repeat', default=5,
+                        help='cold starts per target')
+    parser.add_argument('-t', '--tolerance', action='store', type=float,
+                        dest='tolerance', default=0.25,
+                        help='allowed slow down over baseline')
+    parser.add_argument('--update', action='store_true',
+                        help='save results as baseline')
+    parser.add_argument('baseline', nargs='?', default='NA',
+                        help='baseline json file')
+    args = parser.parse_args()
+
+    # print logs
+    log.info('Checking import time...')
+    log.info('{} cold starts per target'.format(args.repeat))
+    if args.baseline != 'NA':
+        log.info('Baseline {}'.format(args.baseline))
+        log.info('Tolerance {:.0f}%'.format(args.tolerance * 100))
+    if args.update:
+        log.info('Updating baseline.')
+
+    # run function and exit with its status
+    sys.exit(import_time(args.baseline, args.repeat, args.tolerance,
+                            args.update))
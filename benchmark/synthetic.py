@@ -0,0 +1,340 @@
+""" Module for generating synthetic inputs that look like the real products
+
+    All generators take a seed so the same inputs can be rebuilt on every
+    commit, and write into a given folder.
+"""
+import h5py
+import numpy as np
+import scipy.io as sio
+
+from datetime import date
+from osgeo import gdal
+from pyhdf.SD import SD, SDC
+from netCDF4 import Dataset
+
+from ..io import array2stack
+from ..common import constants as cons
+
+
+# YATSM result record
+YATSM_DTYPE = [('start', '<i4'), ('end', '<i4'), ('break', '<i4'),
+                ('detect', '<i4'), ('coef', '<f4', (8, 7)),
+                ('rmse', '<f4', (7,)), ('px', '<u2'), ('py', '<u2'),
+                ('magnitude', '<f4', (7,))]
+
+# time span of synthetic time series
+YATSM_PERIOD = (date(2000, 1, 1).toordinal(), date(2016, 12, 31).toordinal())
+
+
+def synthetic_geo(lines, samples, res=0.00025):
+    """ spatial reference of a synthetic image
+
+    Args:
+        lines (int): number of lines
+        samples (int): number of samples
+        res (float): pixel size in degree
+
+    Returns:
+        geo (dic): spatial reference
+
+    """
+    geo = {'proj': cons.SIF_PROJ}
+    geo['geotrans'] = (-72.0, res, 0, 42.0, 0, -res)
+    geo['lines'] = lines
+    geo['samples'] = samples
+    return geo
+
+
+def random_nodata(array, fraction, rs, nodata=cons.NODATA):
+    """ set a random fraction of an array to nodata
+
+    Args:
+        array (ndarray): input array, changed in place
+        fraction (float): fraction of nodata
+        rs (RandomState): random generator
+        nodata (int): nodata value
+
+    Returns:
+        array (ndarray): array with nodata
+
+    """
+    array[rs.random_sample(array.shape) < fraction] = nodata
+    return array
+
+
+def fake_stack(des, lines, samples, bands, seed=0, low=0, high=10000,
+                nodata=0.05):
+    """ generate a multi band int16 stack image
+
+    Args:
+        des (str): path to output
+        lines (int): number of lines
+        samples (int): number of samples
+        bands (int): number of bands
+        seed (int): random seed
+        low (int): lowest value
+        high (int): highest value
+        nodata (float): fraction of nodata pixels
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    array = rs.randint(low, high, (lines, samples, bands)).astype(np.int16)
+    random_nodata(array, nodata, rs)
+    array2stack(array, synthetic_geo(lines, samples), des, 'NA', cons.NODATA,
+                gdal.GDT_Int16, True)
+    return des
+
+
+def fake_modis_stack(des, lines, samples, seed=0):
+    """ generate a MODIS surface reflectance stack as made by modis2stack
+
+    Args:
+        des (str): path to output
+        lines (int): number of lines
+        samples (int): number of samples
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    shape = (lines, samples)
+    red = rs.randint(100, 3000, shape)
+    nir = rs.randint(1000, 6000, shape)
+    ndvi = random_nodata((nir - red) * cons.SCALE_FACTOR // (nir + red), 0.1,
+                            rs)
+    vza = random_nodata(rs.randint(0, 6500, shape), 0.05, rs)
+    mask = (rs.random_sample(shape) < 0.2).astype(int)
+    array = np.dstack([red, nir, rs.randint(500, 4000, shape),
+                        rs.randint(200, 3000, shape), rs.randint(200, 2000,
+                        shape), ndvi, vza, mask, mask | (vza > 3500)])
+    array2stack(array.astype(np.int16), synthetic_geo(lines, samples), des,
+                'NA', cons.NODATA, gdal.GDT_Int16, True)
+    return des
+
+
+def fake_modis_hdf(des, lines, samples, seed=0):
+    """ generate a MOD09GA like HDF with 1km and 500m subdatasets
+
+    Args:
+        des (str): path to output
+        lines (int): number of 500m lines
+        samples (int): number of 500m samples
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    hdf = SD(des, SDC.WRITE | SDC.CREATE | SDC.TRUNC)
+    used = [cons.MGA_QA_BAND, cons.MGA_VZA_BAND] + cons.MGA_SR_BANDS
+    for i in range(0, max(used) + 1):
+        if i == cons.MGA_QA_BAND:
+            data = rs.randint(0, 65535, (lines // 2, samples // 2))
+            data = data.astype(np.uint16)
+            _type = SDC.UINT16
+        elif i == cons.MGA_VZA_BAND:
+            data = rs.randint(0, 6500, (lines // 2, samples // 2))
+            data = data.astype(np.int16)
+            _type = SDC.INT16
+        elif i in cons.MGA_SR_BANDS:
+            data = rs.randint(100, 6000, (lines, samples)).astype(np.int16)
+            _type = SDC.INT16
+        else:
+            data = np.zeros((1, 1), np.int16)
+            _type = SDC.INT16
+        sds = hdf.create('sds{:02d}'.format(i), _type, data.shape)
+        sds[:] = data
+        sds.endaccess()
+    hdf.end()
+    return des
+
+
+def fake_viirs_h5(des, lines, samples, seed=0):
+    """ generate a VNP09GA like HDF5 with 1km and 500m subdatasets
+
+    Args:
+        des (str): path to output
+        lines (int): number of 500m lines
+        samples (int): number of 500m samples
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    h5 = h5py.File(des, 'w')
+    # upper left corner is read from the grid metadata
+    meta = ('GROUP=GridStructure\n\tGROUP=GRID_1\n\t\tGridName='
+            '"VNP_Grid_500m_2D"\n\t\tUpperLeftPointMtrs=(-6671703.118000,'
+            '5559752.598333)\n\tEND_GROUP=GRID_1\nEND_GROUP=GridStructure\n')
+    h5.create_group('HDFEOS INFORMATION').create_dataset('StructMetadata.0',
+                                                        data=np.bytes_(meta))
+    # subdatasets are listed by name, so names keep the band order
+    fields = h5.create_group('HDFEOS/GRIDS/VNP_Grid_2D/Data Fields')
+    used = [cons.VZA_BAND] + list(cons.QA_BANDS) + list(cons.SR_BANDS)
+    for i in range(0, max(used) + 1):
+        if i == cons.VZA_BAND:
+            data = rs.randint(0, 6500, (lines // 2, samples // 2))
+            data = data.astype(np.int16)
+        elif i in cons.QA_BANDS:
+            data = rs.randint(0, 256, (lines // 2, samples // 2))
+            data = data.astype(np.uint8)
+        elif i in cons.SR_BANDS:
+            data = rs.randint(100, 6000, (lines, samples)).astype(np.int16)
+        else:
+            data = np.zeros((1, 1), np.int16)
+        fields.create_dataset('sds{:02d}'.format(i), data=data)
+    h5.close()
+    return des
+
+
+def fake_yatsm(des, line, samples, seed=0, nseg=4):
+    """ generate a YATSM result file of a line
+
+    Args:
+        des (str): path to output
+        line (int): line number
+        samples (int): number of samples
+        seed (int): random seed
+        nseg (int): maximum number of segments per pixel
+
+    Returns:
+        n (int): number of records
+
+    """
+    rs = np.random.RandomState(seed)
+    records = []
+    for px in range(0, samples):
+        n = rs.randint(1, nseg + 1)
+        edges = np.sort(rs.randint(YATSM_PERIOD[0] + 200, YATSM_PERIOD[1] -
+                                    200, n - 1))
+        edges = [YATSM_PERIOD[0]] + list(edges) + [YATSM_PERIOD[1]]
+        for i in range(0, n):
+            record = np.zeros(1, YATSM_DTYPE)[0]
+            record['px'] = px
+            record['py'] = line
+            record['start'] = edges[i] + (16 if i > 0 else 0)
+            record['end'] = edges[i + 1]
+            if i < n - 1:
+                record['break'] = edges[i + 1] + 16
+                record['detect'] = edges[i + 1] + 16 * rs.randint(1, 6)
+            # mean, slope and seasonal amplitude of each band
+            mid = (record['start'] + record['end']) / 2
+            slope = rs.normal(0, 0.5, 7)
+            record['coef'][1, :] = slope
+            record['coef'][0, :] = rs.randint(500, 12000, 7) - slope * mid
+            record['coef'][2:4, :] = rs.normal(0, 500, (2, 7))
+            record['rmse'] = rs.random_sample(7) * 500
+            record['magnitude'] = rs.normal(0, 1000, 7)
+            records.append(record)
+    records = np.array(records, YATSM_DTYPE)
+    np.savez(des, record=records)
+    return len(records)
+
+
+def fake_mat_cache(des, samples, dates, seed=0):
+    """ generate a line cache in mat format with mask time series
+
+    Args:
+        des (str): path to output
+        samples (int): number of samples
+        dates (list, int): dates of the time series, yyyyddd
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    data = rs.randint(0, 5, (samples, len(dates))).astype(np.int16)
+    sio.savemat(des, {'Data': data, 'Date': np.array(dates).reshape(-1, 1)})
+    return des
+
+
+def fake_dates(ndate, seed=0):
+    """ generate sorted unique dates, yyyyddd
+
+    Args:
+        ndate (int): number of dates
+        seed (int): random seed
+
+    Returns:
+        dates (list, int): dates
+
+    """
+    rs = np.random.RandomState(seed)
+    days = np.sort(rs.choice(np.arange(YATSM_PERIOD[0], YATSM_PERIOD[1]),
+                                ndate, False))
+    dates = []
+    for x in days:
+        d = date.fromordinal(int(x))
+        dates.append(d.year * 1000 + d.timetuple().tm_yday)
+    return dates
+
+
+def fake_sif(des, nobs, seed=0):
+    """ generate a SIF sounding file in netCDF
+
+    Args:
+        des (str): path to output
+        nobs (int): number of soundings
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    # variables are read by index, so order matters
+    variables = {0: rs.normal(1, 0.5, nobs),
+                    2: rs.uniform(0.02, 0.2, nobs),
+                    3: rs.uniform(0.2, 0.5, nobs),
+                    4: rs.uniform(0, 80, nobs),
+                    9: rs.uniform(-89.9, 89.9, nobs),
+                    10: rs.uniform(-179.9, 179.9, nobs),
+                    16: rs.choice([0, 1, 2, 2, 2], nobs),
+                    17: rs.normal(0.5, 0.3, nobs)}
+    nc = Dataset(des, 'w')
+    nc.createDimension('n', nobs)
+    for i in range(0, 18):
+        var = nc.createVariable('var{:02d}'.format(i), 'f4', ('n',))
+        var[:] = variables.get(i, np.zeros(nobs))
+    nc.close()
+    return des
+
+
+def fake_goes(des, seed=0):
+    """ generate a GOES radiation file in netCDF
+
+    Args:
+        des (str): path to output
+        seed (int): random seed
+
+    Returns:
+        des (str): path to output
+
+    """
+    rs = np.random.RandomState(seed)
+    shape = (2400, 2400)
+    nc = Dataset(des, 'w')
+    nc.createDimension('time', 1)
+    nc.createDimension('lat', shape[0])
+    nc.createDimension('lon', shape[1])
+    nc.createVariable('time', 'f8', ('time',))[:] = 0
+    nc.createVariable('lat', 'f4', ('lat',))[:] = np.arange(60, 0, -0.025)
+    nc.createVariable('lon', 'f4', ('lon',))[:] = np.arange(-135, -75, 0.025)
+    nc.createVariable('land', 'i1', ('lat', 'lon'))[:] = rs.randint(0, 2,
+                                                                    shape)
+    for name, high in (('ssi', 1000), ('ssi_conf', 5), ('dli', 500),
+                        ('dli_conf', 5)):
+        nc.createVariable(name, 'f4', ('lat', 'lon'))[:] = rs.uniform(0, high,
+                                                                    shape)
+    nc.close()
+    return des
@@ -1,16 +1,32 @@
 """ Module for common libarary
 """
 from .logger import log
-from .utility import (date_to_doy, doy_to_date, get_files, show_progress,
-                        manage_batch, get_date, get_int, doy_to_ordinal,
-                        ordinal_to_doy, select_samples, split_doy)
-from .data_processing import (enlarge, crop, mirror, sidebyside, reclassify,
-                                tablize, dilate, enlarge2, ndarray_append)
-from .image_processing import (apply_mask, result2mask, apply_stretch,
-                                nodata_mask, clean_up, thematic_map, nchange)
-from .result_processing import ts2class, ts2doc, ts2dod, ts2map
+from .lazy import lazy_attrs
 
 
+# submodules are imported on first access of their names
+__getattr__, __dir__ = lazy_attrs(__name__, [
+    ['utility', ['date_to_doy', 'doy_to_date', 'get_files', 'show_progress',
+                    'manage_batch', 'get_date', 'get_int', 'doy_to_ordinal',
+                    'ordinal_to_doy', 'select_samples', 'split_doy',
+                    'partition_batch', 'get_cost', 'doy_to_datetime',
+                    'select_index']],
+    ['data_processing', ['enlarge', 'crop', 'mirror', 'sidebyside',
+                            'reclassify', 'tablize', 'dilate', 'enlarge2',
+                            'ndarray_append', 'distance_rings']],
+    ['image_processing', ['apply_mask', 'result2mask', 'apply_stretch',
+                            'nodata_mask', 'clean_up', 'thematic_map',
+                            'nchange', 'pixel2map', 'map2pixel',
+                            'temporal_reduce', 'transition_counts']],
+    ['result_processing', ['ts2class', 'ts2doc', 'ts2dod', 'ts2map']],
+    ['work_queue', ['queue_works', 'queue_pipe', 'queue_status',
+                    'queue_timing']],
+    ['pipeline', ['run_pipeline', 'pipe_map']],
+    ['metrics', ['metrics_enable', 'metrics_disable', 'metrics_start',
+                    'metrics_stop', 'metrics_summary', 'metrics_report']],
+    ['profiling', ['profile_args', 'profile_start', 'profile_merge']]
+])
+
 __all__ = [
     'log',
     'date_to_doy',
@@ -35,11 +51,35 @@ __all__ = [
     'ts2dod',
     'clean_up',
     'thematic_map',
+    'pixel2map',
+    'map2pixel',
+    'temporal_reduce',
+    'transition_counts',
     'reclassify',
     'select_samples',
     'dilate',
     'enlarge2',
     'ts2map',
     'split_doy',
-    'ndarray_append'
+    'ndarray_append',
+    'distance_rings',
+    'partition_batch',
+    'get_cost',
+    'doy_to_datetime',
+    'select_index',
+    'queue_works',
+    'queue_pipe',
+    'queue_status',
+    'queue_timing',
+    'run_pipeline',
+    'pipe_map',
+    'metrics_enable',
+    'metrics_disable',
+    'metrics_start',
+    'metrics_stop',
+    'metrics_summary',
+    'metrics_report',
+    'profile_args',
+    'profile_start',
+    'profile_merge'
 ]
@@ -65,6 +65,32 @@ SIF_PROJ = '''GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.25
             "Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.01745329251
             994328,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]'''
 
+# queue
+QUEUE_HEARTBEAT = 60
+QUEUE_STALE = 600
+
+# pipeline, work loads waiting between stages and threads processing blocks
+PIPE_DEPTH = 2
+PIPE_WORKERS = 4
+
+# lines per block when streaming images
+BLOCK_LINES = 256
+
+# lines and samples per tile and processes running tiles of focal operations
+TILE_SIZE = 1024
+TILE_WORKERS = 4
+
+# files read at the same time when drilling points
+DRILL_WORKERS = 4
+
+# files summarized at the same time when counting strata
+STRATA_WORKERS = 4
+
+# clear observations in YATSM caches, mask values when not in config, and
+# first and last day of year of growing season
+NOB_MASK_VALUES = (2, 3, 4, 255)
+GROW_SEASON = (121, 273)
+
 # download
 _HTTP = 'https://e4ftl01.cr.usgs.gov/'
 _FTP = 'ftp://ladsweb.nascom.nasa.gov/'
@@ -138,6 +138,33 @@ def dilate(array, value=1, iterations=1):
     return array
 
 
+def distance_rings(array, rings=[1], metric='euclidean'):
+    """ buffer rings around pixels from one distance transform
+
+    Args:
+        array (ndarray): input array, True for pixels to buffer around
+        rings (list, int): outer distance of each ring in pixels, ascending
+        metric (str): euclidean, chessboard or taxicab
+
+    Returns:
+        ring (ndarray): 1 based ring of each pixel, 0 for pixels in array or
+            beyond the last ring
+
+    """
+    ring = np.zeros(array.shape, np.int16)
+    if not array.any():
+        return ring
+    if metric == 'euclidean':
+        distance = nd.distance_transform_edt(~array)
+    else:
+        distance = nd.distance_transform_cdt(~array, metric=metric)
+    ring[(distance > 0) & (distance <= rings[-1])] = 1
+    for r in rings[:-1]:
+        ring[distance > r] += 1
+    ring[distance > rings[-1]] = 0
+    return ring
+
+
 def ndarray_append(array, _dtype):
     """ append a field to a structured array
 
@@ -149,7 +176,8 @@ def ndarray_append(array, _dtype):
         array2 (ndarray): output array
 
     """
-    _dtype = np.dtype(array.dtype.descr + _dtype)
+    _dtype = np.dtype([(x, array.dtype[x]) for x in array.dtype.names] +
+                        _dtype)
     array2 = np.zeros(array.shape, dtype=_dtype)
     for x in array.dtype.names:
         array2[x] = array[x]
@@ -148,7 +148,149 @@ def nchange(array):
         nchange (ndarray): number of change
 
     """
-    nchange = np.zeros(array.shape[-2])
-    for i in range(1, array.shape[2]):
-        nchange = nchange + (array[:, :, i] != array[:, :, i - 1])
-    return nchange
+    return np.count_nonzero(array[:, :, 1:] != array[:, :, :-1], axis=2)
+
+
+def temporal_reduce(array, _map, nodata=cons.NODATA):
+    """ reduce the third dimension, skipping nodata except for nchange
+
+    Args:
+        array (ndarray): input array, by line, sample and time
+        _map (str): what to calculate,
+            nchange: number of change between bands, as nchange, nodata
+                counted as a value, never nodata
+            vchange: number of change between valid values
+            first: band of first change, 1 based, 0 for no change
+            last: band of last change, 1 based, 0 for no change
+            mode: most common value, the smallest one if tied
+            min, max, mean: minimum, maximum, mean
+            p<q>: q-th percentile, e.g. p90, linear interpolation
+            nob: number of valid values
+        nodata (int): nodata value of input and output
+
+    Returns:
+        result (ndarray): result, nodata where no valid value except for
+            nchange and nob
+
+    """
+    valid = array != nodata
+    nob = np.count_nonzero(valid, axis=2)
+    nband = array.shape[2]
+    if _map == 'nob':
+        return nob
+    elif _map == 'nchange':
+        return nchange(array)
+    elif _map in ('vchange', 'first', 'last'):
+        # carry last valid value over nodata, and skip until first valid
+        index = np.where(valid, np.arange(nband), 0)
+        np.maximum.accumulate(index, axis=2, out=index)
+        filled = np.take_along_axis(array, index, axis=2)
+        change = ((filled[:, :, 1:] != filled[:, :, :-1]) &
+                    np.logical_or.accumulate(valid, axis=2)[:, :, :-1])
+        if _map == 'vchange':
+            result = np.count_nonzero(change, axis=2)
+        elif _map == 'first':
+            result = np.where(change.any(axis=2),
+                                np.argmax(change, axis=2) + 2, 0)
+        else:
+            result = np.where(change.any(axis=2),
+                                nband - np.argmax(change[:, :, ::-1], axis=2),
+                                0)
+    elif _map == 'mode':
+        result = np.zeros(nob.shape, array.dtype) + nodata
+        best = np.zeros(nob.shape, np.int64)
+        for value in np.unique(array[valid]):
+            count = np.count_nonzero(array == value, axis=2)
+            result[count > best] = value
+            np.maximum(best, count, out=best)
+    elif _map == 'min':
+        result = np.where(valid, array, array.max()).min(axis=2)
+    elif _map == 'max':
+        result = np.where(valid, array, array.min()).max(axis=2)
+    elif _map == 'mean':
+        result = (np.where(valid, array, 0).sum(axis=2, dtype=np.float64) /
+                    np.maximum(nob, 1))
+    elif _map[0] == 'p':
+        # invalid values sorted to the end, interpolate within valid ones
+        ranked = np.sort(np.where(valid, array.astype(np.float64), np.inf),
+                            axis=2)
+        pos = float(_map[1:]) / 100.0 * np.maximum(nob - 1, 0)
+        low = np.floor(pos).astype(np.int64)
+        high = np.minimum(low + 1, np.maximum(nob - 1, 0))
+        low = np.take_along_axis(ranked, low[:, :, np.newaxis], 2)[:, :, 0]
+        high = np.take_along_axis(ranked, high[:, :, np.newaxis], 2)[:, :, 0]
+        with np.errstate(invalid='ignore'):
+            result = low + (high - low) * (pos - np.floor(pos))
+    else:
+        raise ValueError('Unknown map: {}'.format(_map))
+    return np.where(nob > 0, result, nodata)
+
+
+def transition_counts(array, nodata='NA', counts='NA'):
+    """ count class transitions between neighbouring bands, all pairs of
+        bands counted with one bincount
+
+    Args:
+        array (ndarray): classes by line, sample and band, non-negative
+        nodata (int): nodata value, pixels with nodata in either band skipped
+        counts (ndarray): counts to add to, from earlier calls, NA for none
+
+    Returns:
+        counts (ndarray): number of pixels by pair of bands, class in first
+            band and class in second band, large enough for all classes
+
+    """
+    npair = array.shape[2] - 1
+    valid = (array[:, :, 1:] >= 0) & (array[:, :, :-1] >= 0)
+    if nodata != 'NA':
+        valid &= (array[:, :, 1:] != nodata) & (array[:, :, :-1] != nodata)
+    n = 0 if type(counts) == str else counts.shape[1]
+    if valid.any():
+        n = max(n, int(array[:, :, :-1][valid].max()) + 1,
+                int(array[:, :, 1:][valid].max()) + 1)
+    pair = np.nonzero(valid)[2]
+    keys = ((pair * n + array[:, :, :-1][valid].astype(np.int64)) * n +
+            array[:, :, 1:][valid])
+    result = np.bincount(keys, minlength=npair * n * n).reshape(npair, n, n)
+    if type(counts) != str:
+        m = counts.shape[1]
+        result[:, :m, :m] += counts
+    return result
+
+
+def pixel2map(geotrans, row, col):
+    """ map coordinates of pixel centers
+
+    Args:
+        geotrans (tuple): gdal geotransform
+        row (int, ndarray): line of pixels
+        col (int, ndarray): sample of pixels
+
+    Returns:
+        (x, y) (float, ndarray): map coordinates
+
+    """
+    row = np.asarray(row) + 0.5
+    col = np.asarray(col) + 0.5
+    return (geotrans[0] + col * geotrans[1] + row * geotrans[2],
+            geotrans[3] + col * geotrans[4] + row * geotrans[5])
+
+
+def map2pixel(geotrans, x, y):
+    """ pixels that contain map coordinates
+
+    Args:
+        geotrans (tuple): gdal geotransform
+        x (float, ndarray): map coordinate x
+        y (float, ndarray): map coordinate y
+
+    Returns:
+        (row, col) (int, ndarray): line and sample of pixels
+
+    """
+    x = np.asarray(x, np.float64) - geotrans[0]
+    y = np.asarray(y, np.float64) - geotrans[3]
+    det = geotrans[1] * geotrans[5] - geotrans[2] * geotrans[4]
+    col = (x * geotrans[5] - y * geotrans[2]) / det
+    row = (y * geotrans[1] - x * geotrans[4]) / det
+    return np.floor(row).astype(np.int64), np.floor(col).astype(np.int64)
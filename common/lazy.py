@@ -0,0 +1,54 @@
+""" Module for importing submodules of a package on first use
+
+    Packages list the names each submodule provides, and the submodule is
+    only imported when one of its names is accessed, so a job that needs a
+    single function does not import GDAL, HDF, netCDF and the like just to
+    start. Python older than 3.7 has no module level __getattr__, so there
+    everything is imported right away as before.
+"""
+import sys
+import importlib
+
+
+def lazy_attrs(package, submodules):
+    """ set up lazy access to names provided by submodules of a package
+
+    Args:
+        package (str): name of the package, i.e. __name__ of its __init__
+        submodules (list): list of [submodule, names], an empty names list
+            exposes the submodule itself
+
+    Returns:
+        __getattr__ (function): to be assigned in the package
+        __dir__ (function): to be assigned in the package
+
+    """
+    where = {}
+    for sub, names in submodules:
+        if len(names) == 0:
+            where[sub] = [sub, 'NA']
+        for name in names:
+            where[name] = [sub, name]
+
+    def __getattr__(name):
+        if name not in where:
+            raise AttributeError('module {} has no attribute {}'.format(
+                                    package, name))
+        sub, attr = where[name]
+        module = importlib.import_module('{}.{}'.format(package, sub))
+        if attr != 'NA':
+            module = getattr(module, attr)
+        # cache it so this is only called once per name
+        setattr(sys.modules[package], name, module)
+        return module
+
+    def __dir__():
+        return sorted(set(list(vars(sys.modules[package])) + list(where)))
+
+    # no lazy access before 3.7, import everything now
+    if sys.version_info < (3, 7):
+        for sub, names in submodules:
+            for name in (names or [sub]):
+                __getattr__(name)
+
+    return __getattr__, __dir__
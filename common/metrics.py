@@ -0,0 +1,169 @@
+""" Module for timing stages of converters and counting bytes and pixels
+
+    Disabled by default, where metrics_start returns NA right away and
+    metrics_stop does nothing. Enable with metrics_enable, or set the
+    environment variable SIPH_METRICS to a json lines file or a folder to
+    record every stage of every converter a job runs. Records are summed up
+    in memory by product and stage, and also written as json lines if a file
+    or folder is given.
+"""
+import os
+import json
+import time
+import atexit
+import socket
+import threading
+
+from .logger import log
+
+
+_METRICS = {'on': False, 'file': 'NA', 'summary': {}}
+_LOCK = threading.Lock()
+
+
+def metrics_enable(des='NA', report=True):
+    """ start recording metrics
+
+    Args:
+        des (str): json lines file or folder to write records to, NA for
+            memory only, a folder gets one file per host and process
+        report (bool): log a summary when the process exits
+
+    Returns:
+        0: successful
+        1: cannot open des
+
+    """
+    metrics_disable()
+    if des != 'NA':
+        if os.path.isdir(des):
+            des = os.path.join(des, 'metrics_{}_{}.json'.format(
+                                socket.gethostname().split('.')[0],
+                                os.getpid()))
+        try:
+            _METRICS['file'] = open(des, 'a')
+        except:
+            log.error('Cannot write metrics to {}'.format(des))
+            return 1
+    _METRICS['summary'] = {}
+    _METRICS['on'] = True
+    if report and not _METRICS.get('atexit', False):
+        atexit.register(metrics_report)
+        _METRICS['atexit'] = True
+    return 0
+
+
+def metrics_disable():
+    """ stop recording metrics, summary stays available """
+    _METRICS['on'] = False
+    if _METRICS['file'] != 'NA':
+        _METRICS['file'].close()
+        _METRICS['file'] = 'NA'
+
+
+def metrics_start(product, stage, item='NA'):
+    """ start timing a stage
+
+    Args:
+        product (str): product being processed, e.g. HLS
+        stage (str): name of the stage, e.g. read
+        item (str): file being processed
+
+    Returns:
+        token (list): to be passed to metrics_stop
+        'NA': metrics disabled
+
+    """
+    if not _METRICS['on']:
+        return 'NA'
+    return [product, stage, item, time.time()]
+
+
+def metrics_stop(token, nbytes=0, pixels=0):
+    """ stop timing a stage and record it
+
+    Args:
+        token (list): from metrics_start
+        nbytes (int): bytes read or written by the stage
+        pixels (int): pixels handled by the stage
+
+    Returns:
+        seconds (float): time spent in the stage, 0 if disabled
+
+    """
+    if token == 'NA' or not _METRICS['on']:
+        return 0
+    seconds = time.time() - token[3]
+    with _LOCK:
+        key = (token[0], token[1])
+        x = _METRICS['summary'].setdefault(key, [0, 0.0, 0, 0])
+        x[0] += 1
+        x[1] += seconds
+        x[2] += int(nbytes)
+        x[3] += int(pixels)
+        if _METRICS['file'] != 'NA':
+            _METRICS['file'].write(json.dumps({'product': token[0],
+                'stage': token[1], 'item': token[2], 'start': token[3],
+                'seconds': seconds, 'bytes': int(nbytes),
+                'pixels': int(pixels), 'host': socket.gethostname(),
+                'pid': os.getpid()}) + '\n')
+            _METRICS['file'].flush()
+    return seconds
+
+
+def metrics_summary(records='NA', by=['product', 'stage']):
+    """ sum up metrics by product and stage
+
+    Args:
+        records (list, dic): json line records, NA for this process
+        by (list, str): fields to group by
+
+    Returns:
+        summary (list, dic): count, seconds, bytes, pixels and rates of
+            each group
+
+    """
+    if records == 'NA':
+        groups = dict([(k, list(v)) for k, v in
+                        _METRICS['summary'].items()])
+        by = ['product', 'stage']
+    else:
+        groups = {}
+        for r in records:
+            x = groups.setdefault(tuple([r[k] for k in by]), [0, 0.0, 0, 0])
+            x[0] += 1
+            x[1] += r['seconds']
+            x[2] += r['bytes']
+            x[3] += r['pixels']
+    summary = []
+    for key in sorted(groups):
+        count, seconds, nbytes, pixels = groups[key]
+        x = dict(zip(by, key))
+        x.update({'count': count, 'seconds': seconds, 'bytes': nbytes,
+                    'pixels': pixels,
+                    'mb_per_second': nbytes / 1048576.0 / max(seconds, 1e-9),
+                    'pixels_per_second': pixels / max(seconds, 1e-9)})
+        summary.append(x)
+    return summary
+
+
+def metrics_report(summary='NA'):
+    """ log a summary of metrics
+
+    Args:
+        summary (list, dic): from metrics_summary, NA for this process
+
+    """
+    if summary == 'NA':
+        summary = metrics_summary()
+    for x in summary:
+        name = ' '.join([str(x[k]) for k in x if k not in ('count', 'seconds',
+                    'bytes', 'pixels', 'mb_per_second', 'pixels_per_second')])
+        log.info('{}: {} x, {:.2f}s, {:.1f}MB/s, {:.0f} pixels/s'.format(name,
+                    x['count'], x['seconds'], x['mb_per_second'],
+                    x['pixels_per_second']))
+
+
+# enable through environment so batch jobs need no extra options
+if os.environ.get('SIPH_METRICS', '') != '':
+    metrics_enable(os.environ['SIPH_METRICS'])
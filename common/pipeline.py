@@ -0,0 +1,197 @@
+""" Module for overlapping read, process and write of batch work loads
+
+    A reader thread prepares the next work loads while the current one is
+    processed, and a writer thread flushes the previous ones. Work loads are
+    handed over through bounded queues so only a few are in memory at once.
+"""
+import time
+import threading
+import collections
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from .logger import log
+from .utility import work_name
+from . import constants as cons
+
+
+_STOP = object()
+_FAIL = object()
+
+
+def pipe_stage(stage, func, work, stats, *args):
+    """ run one stage on one work load and keep track of time
+
+    Args:
+        stage (str): name of the stage
+        func (function): the stage function
+        work (list): the work load
+        stats (dic): time statistics of the stage
+        args: passed to func after the work load
+
+    Returns:
+        result: output of func, _FAIL if it failed
+
+    """
+    start = time.time()
+    try:
+        result = func(work, *args)
+    except Exception as e:
+        log.error('Failed to {} {}: {}'.format(stage, work_name(work), e))
+        result = _FAIL
+    stats['busy'] += time.time() - start
+    stats['count'] += 1
+    return result
+
+
+def pipe_get(q, stats):
+    """ get from a queue and count the time spent waiting """
+    start = time.time()
+    item = q.get()
+    stats['wait'] += time.time() - start
+    return item
+
+
+def pipe_put(q, item, stats):
+    """ put to a queue and count the time spent waiting """
+    start = time.time()
+    q.put(item)
+    stats['wait'] += time.time() - start
+
+
+def run_pipeline(works, read, process, write, depth=cons.PIPE_DEPTH,
+                    done='NA'):
+    """ run work loads through read, process and write stages concurrently
+
+    Args:
+        works (list): list of work loads, or a generator of them
+        read (function): read(work) returns input data, runs in reader thread
+        process (function): process(work, data) returns output data, NA to
+            pass input data to write as is
+        write (function): write(work, data) returns 0 if successful, runs in
+            writer thread
+        depth (int): work loads waiting between two stages, 0 for serial
+        done (function): done(work, ok) called once a work load is through,
+            ok is False if any stage failed, NA for none
+
+    Returns:
+        count (int): number of successful work loads
+        stats (dic): busy and waiting seconds of each stage
+
+    """
+    stats = dict([(x, {'busy': 0, 'wait': 0, 'count': 0})
+                    for x in ('read', 'process', 'write')])
+    result = {'count': 0}
+
+    def _read():
+        for work in works:
+            data = pipe_stage('read', read, work, stats['read'])
+            yield work, data
+
+    def _process(work, data):
+        if (data is _FAIL) or (process == 'NA'):
+            return data
+        return pipe_stage('process', process, work, stats['process'], data)
+
+    def _write(work, data):
+        ok = False
+        if data is not _FAIL:
+            if pipe_stage('write', write, work, stats['write'], data) == 0:
+                result['count'] += 1
+                ok = True
+        if done != 'NA':
+            done(work, ok)
+
+    # serial
+    if depth < 1:
+        for work, data in _read():
+            _write(work, _process(work, data))
+        pipe_report(stats)
+        return result['count'], stats
+
+    # concurrent
+    inq = queue.Queue(depth)
+    outq = queue.Queue(depth)
+
+    def _reader():
+        try:
+            for item in _read():
+                pipe_put(inq, item, stats['read'])
+        except Exception as e:
+            log.error('Reader stopped: {}'.format(e))
+        inq.put(_STOP)
+
+    def _writer():
+        while True:
+            item = pipe_get(outq, stats['write'])
+            if item is _STOP:
+                break
+            try:
+                _write(*item)
+            except Exception as e:
+                log.error('Failed to finish {}: {}'.format(
+                            work_name(item[0]), e))
+
+    threads = [threading.Thread(target=_reader),
+                threading.Thread(target=_writer)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    while True:
+        item = pipe_get(inq, stats['process'])
+        if item is _STOP:
+            break
+        pipe_put(outq, (item[0], _process(*item)), stats['process'])
+    outq.put(_STOP)
+    for thread in threads:
+        thread.join()
+
+    # done
+    pipe_report(stats)
+    return result['count'], stats
+
+
+def pipe_map(func, works, workers=cons.PIPE_WORKERS):
+    """ run a function on work loads by a pool of threads, in order, with
+        at most a few work loads ahead of the one being returned
+
+    Args:
+        func (function): func(work) returns the result of a work load
+        works (list): list of work loads, or a generator of them
+        workers (int): number of threads, 0 or 1 to run in this thread
+
+    Yields:
+        result: output of func on each work load, in order of works
+
+    """
+    if workers < 2:
+        for work in works:
+            yield func(work)
+        return
+    with ThreadPoolExecutor(workers) as pool:
+        ahead = collections.deque()
+        for work in works:
+            ahead.append(pool.submit(func, work))
+            if len(ahead) > workers:
+                yield ahead.popleft().result()
+        while len(ahead) > 0:
+            yield ahead.popleft().result()
+
+
+def pipe_report(stats):
+    """ log time spent by each stage of a pipeline
+
+    Args:
+        stats (dic): busy and waiting seconds of each stage
+
+    """
+    for stage in ('read', 'process', 'write'):
+        if stats[stage]['count'] > 0 or stats[stage]['wait'] > 0:
+            log.info('{} stage: {} works, {:.1f}s busy, {:.1f}s '
+                        'waiting'.format(stage, stats[stage]['count'],
+                        stats[stage]['busy'], stats[stage]['wait']))
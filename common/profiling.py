@@ -0,0 +1,229 @@
+""" Module for profiling command line runs of models and tools
+
+    Every entry point adds --profile and --profile-memory through
+    profile_args and calls profile_start right after parsing. Profiles are
+    written when the process exits, next to the output, one set of files per
+    host and process, so batch jobs can later be merged with profile_merge.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import pstats
+import socket
+import cProfile
+import threading
+import tracemalloc
+
+from .logger import log
+
+
+# number of frames kept for each allocation
+PROFILE_FRAMES = 10
+
+# number of top functions and allocations reported
+PROFILE_TOP = 30
+
+# seconds between checks for a new memory peak
+PROFILE_INTERVAL = 0.1
+
+
+def profile_args(parser):
+    """ add profiling options to an argument parser
+
+    Args:
+        parser (ArgumentParser): parser of an entry point
+
+    """
+    parser.add_argument('--profile', action='store', type=str, nargs='?',
+                        dest='profile', default='NA', const='wall',
+                        choices=['wall', 'cpu'],
+                        help='profile function calls, wall or cpu time')
+    parser.add_argument('--profile-memory', action='store_true',
+                        dest='profile_memory',
+                        help='profile peak memory allocations')
+
+
+def profile_name(des):
+    """ base name of profile files of this run
+
+    Args:
+        des (str): output of the run, file or folder
+
+    Returns:
+        name (str): path without extension of profile files
+
+    """
+    if des == 'NA':
+        des = '.'
+    _dir = des if os.path.isdir(des) else os.path.dirname(os.path.abspath(des))
+    return os.path.join(_dir, 'profile_{}_{}_{}'.format(
+                        os.path.splitext(os.path.basename(sys.argv[0]))[0],
+                        socket.gethostname().split('.')[0], os.getpid()))
+
+
+def profile_peak(state, stop):
+    """ keep a snapshot of memory allocations at the highest peak so far,
+        sampled so peaks shorter than the interval can be missed
+
+    Args:
+        state (dic): profiling state, snapshot and peak are updated
+        stop (Event): stop signal
+
+    """
+    while not stop.wait(PROFILE_INTERVAL):
+        current = tracemalloc.get_traced_memory()[0]
+        # only snapshot on a peak at least 10% above the last one
+        if current > state['peak'] * 1.1:
+            state['snapshot'] = tracemalloc.take_snapshot()
+            state['peak'] = current
+
+
+def profile_start(args, des):
+    """ start profiling if asked for by the options
+
+    Args:
+        args (Namespace): parsed options with profile and profile_memory
+        des (str): output of the run, profiles are saved next to it
+
+    Returns:
+        0: profiling started
+        1: profiling not asked for
+
+    """
+    if args.profile == 'NA' and not args.profile_memory:
+        return 1
+    state = {'name': profile_name(des), 'wall': time.time(),
+                'cpu': time.process_time(), 'profiler': 'NA', 'peak': 0,
+                'snapshot': 'NA', 'stop': 'NA', 'timer': args.profile}
+    if args.profile_memory:
+        tracemalloc.start(PROFILE_FRAMES)
+        state['stop'] = threading.Event()
+        beat = threading.Thread(target=profile_peak,
+                                args=(state, state['stop']))
+        beat.daemon = True
+        beat.start()
+    if args.profile != 'NA':
+        if args.profile == 'cpu':
+            state['profiler'] = cProfile.Profile(time.process_time)
+        else:
+            state['profiler'] = cProfile.Profile()
+        state['profiler'].enable()
+    atexit.register(profile_stop, state)
+    log.info('Profiling to {}.*'.format(state['name']))
+    return 0
+
+
+def profile_stop(state):
+    """ stop profiling and save results
+
+    Args:
+        state (dic): profiling state from profile_start
+
+    """
+    if state['profiler'] != 'NA':
+        state['profiler'].disable()
+    summary = {'argv': sys.argv, 'host': socket.gethostname(),
+                'pid': os.getpid(), 'timer': state['timer'],
+                'wall': time.time() - state['wall'],
+                'cpu': time.process_time() - state['cpu']}
+
+    # memory allocations at peak, before saving allocates more
+    if state['stop'] != 'NA':
+        state['stop'].set()
+        current, peak = tracemalloc.get_traced_memory()
+        if state['snapshot'] == 'NA' or current > state['peak']:
+            state['snapshot'] = tracemalloc.take_snapshot()
+            state['peak'] = current
+        tracemalloc.stop()
+        summary['peak'] = peak
+        summary['memory'] = profile_frames(state['snapshot'])
+
+    # function calls, cumulative time follows the call tree
+    if state['profiler'] != 'NA':
+        state['profiler'].dump_stats('{}.prof'.format(state['name']))
+        with open('{}.txt'.format(state['name']), 'w') as f:
+            stats = pstats.Stats(state['profiler'], stream=f)
+            stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+            stats.print_callees(PROFILE_TOP)
+
+    with open('{}.json'.format(state['name']), 'w') as f:
+        json.dump(summary, f, indent=1)
+    log.info('Wall time {:.1f}s, cpu time {:.1f}s'.format(summary['wall'],
+                summary['cpu']))
+    if 'peak' in summary:
+        log.info('Peak memory {:.1f}MB'.format(summary['peak'] / 1048576.0))
+
+
+def profile_frames(snapshot, top=PROFILE_TOP):
+    """ top allocations of a snapshot by call stack
+
+    Args:
+        snapshot (Snapshot): tracemalloc snapshot
+        top (int): number of allocations to keep
+
+    Returns:
+        frames (list, dic): size, count and frames of each allocation
+
+    """
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, tracemalloc.__file__)])
+    frames = []
+    for x in snapshot.statistics('traceback')[:top]:
+        frames.append({'size': x.size, 'count': x.count,
+                        'frames': ['{}:{}'.format(f.filename, f.lineno)
+                                    for f in x.traceback]})
+    return frames
+
+
+def profile_merge(files, des, top=PROFILE_TOP):
+    """ merge profiles of many runs
+
+    Args:
+        files (list, str): profile files, .prof or .json
+        des (str): output base name, .prof, .txt and .json are written
+        top (int): number of top functions and allocations reported
+
+    Returns:
+        summary (dic): merged summary
+
+    """
+    # function calls
+    profs = [x for x in files if x.endswith('.prof')]
+    if len(profs) > 0:
+        stats = pstats.Stats(profs[0])
+        for x in profs[1:]:
+            stats.add(x)
+        stats.dump_stats('{}.prof'.format(des))
+        with open('{}.txt'.format(des), 'w') as f:
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(top)
+            stats.print_callees(top)
+
+    # run times and memory
+    summary = {'runs': 0, 'wall': 0.0, 'cpu': 0.0, 'max_wall': 0.0,
+                'peak': 0, 'memory': []}
+    memory = {}
+    for x in [x for x in files if x.endswith('.json')]:
+        with open(x, 'r') as f:
+            run = json.load(f)
+        summary['runs'] += 1
+        summary['wall'] += run['wall']
+        summary['cpu'] += run['cpu']
+        summary['max_wall'] = max(summary['max_wall'], run['wall'])
+        summary['peak'] = max(summary['peak'], run.get('peak', 0))
+        for y in run.get('memory', []):
+            key = tuple(y['frames'])
+            z = memory.setdefault(key, [0, 0, 0])
+            z[0] = max(z[0], y['size'])
+            z[1] += y['size']
+            z[2] += 1
+    for key in sorted(memory, key=lambda k: -memory[k][0])[:top]:
+        summary['memory'].append({'max_size': memory[key][0],
+                                    'total_size': memory[key][1],
+                                    'runs': memory[key][2],
+                                    'frames': list(key)})
+    with open('{}.json'.format(des), 'w') as f:
+        json.dump(summary, f, indent=1)
+    return summary
@@ -68,7 +68,7 @@ def ts2class(ts, _class, _last):
                     return cons.NF
                 else:
                     return cons.PF
-            elif _class == con.CHANGE:
+            elif _class == cons.CHANGE:
                 if not _last:
                     return cons.PC
                 else:
@@ -4,42 +4,48 @@ from __future__ import division
 
 import os
 import re
+import csv
 import fnmatch
 import math
 import random
+import zipfile
 import numpy as np
 
-from calendar import isleap
 from datetime import date
 
 
+# ordinal date of 1970-01-01, where datetime64 starts counting
+EPOCH_ORDINAL = 719163
+
+
 def date_to_doy(year,month,day,day_only=False):
     """ convert date to day-of-year
 
     Args:
-        year (int): year
-        month (int): month
-        day (int): day
+        year (int, ndarray): year
+        month (int, ndarray): month
+        day (int, ndarray): day
         day_only (bool): return day only or day with year
 
     Returns:
-        doy (int): day of year
+        doy (int, ndarray): day of year
 
     """
-    # initialize
-    doy = 0
-
-    # leap yaer
-    day_in_month = [0,31,28,31,30,31,30,31,31,30,31,30]
-    if isleap(year):
-        day_in_month[2] = 29
-
-    # calculate doy
-    doy = sum(day_in_month[0:month]) + day
+    # single date
+    if np.ndim(year) == 0 and np.ndim(month) == 0 and np.ndim(day) == 0:
+        doy = (date(year, month, 1) - date(year, 1, 1)).days + day
+        if not day_only:
+            doy = doy + year * 1000
+        return doy
+
+    # array of dates
+    year = np.asarray(year, np.int64)
+    month = np.asarray(month, np.int64)
+    _first = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    doy = (_first.astype('datetime64[D]') - (year - 1970).astype(
+            'datetime64[Y]').astype('datetime64[D]')).astype(np.int64) + day
     if not day_only:
         doy = doy + year * 1000
-
-    # done
     return doy
 
 
@@ -47,31 +53,38 @@ def doy_to_date(doy):
     """ convert day of year to date
 
     Args:
-        doy (int): day of year
+        doy (int, ndarray): day of year
 
     Returns:
-        (year, month, day) (int): year, month, day
+        (year, month, day) (int, ndarray): year, month, day
 
     """
-    # initialize
-    year, month, day = 0, 0, 0
+    # single date
+    if np.ndim(doy) == 0:
+        _date = date.fromordinal(doy_to_ordinal(doy))
+        return (_date.year, _date.month, _date.day)
+
+    # array of dates
+    _date = doy_to_datetime(doy)
+    _month = _date.astype('datetime64[M]')
+    return (_date.astype('datetime64[Y]').astype(np.int64) + 1970,
+            _month.astype(np.int64) % 12 + 1,
+            (_date - _month.astype('datetime64[D]')).astype(np.int64) + 1)
 
-    # leap year
-    year = doy//1000
-    day_in_month = [31,28,31,30,31,30,31,31,30,31,30,31]
-    if isleap(year):
-        day_in_month[1] = 29
 
-    # calculate date
-    doy = doy - year * 1000
-    for i in range(0,12):
-        doy = doy - day_in_month[i]
-        if doy <= 0:
-            month = i + 1
-            day = doy + day_in_month[i]
-            break
+def doy_to_datetime(doy):
+    """ convert day of year to datetime64
 
-    return (year, month, day)
+    Args:
+        doy (int, ndarray): day of year
+
+    Returns:
+        _date (ndarray): datetime64 in days
+
+    """
+    doy = np.asarray(doy, np.int64)
+    return ((doy // 1000 - 1970).astype('datetime64[Y]').astype(
+            'datetime64[D]') + doy % 1000 - 1)
 
 
 def get_files(path, pattern, recursive=True):
@@ -92,19 +105,151 @@ def get_files(path, pattern, recursive=True):
         return [[path, f] for f in fnmatch.filter(os.listdir(path), pattern)]
 
 
-def manage_batch(works, job, n_job):
+def manage_batch(works, job, n_job, cost='NA'):
     """ manage batch job work loads
 
     Args:
         works (list): list of work loads
         job (int): sequence of this job
         n_job (int): total number of jobs
+        cost (str, list): balance by size, record, timing csv or list of cost,
+            NA for round robin
 
     Returns:
         thisjob (list): work load for this job
 
     """
-    return works[(job - 1):len(works):n_job]
+    if type(cost) == str and cost == 'NA':
+        return works[(job - 1):len(works):n_job]
+    if type(cost) == str:
+        cost = get_cost(works, cost)
+    return [works[i] for i in partition_batch(cost, n_job)[job - 1]]
+
+
+def partition_batch(cost, n_job):
+    """ split work loads into balanced bins, longest work first
+
+    Args:
+        cost (list, float): estimated cost of each work load
+        n_job (int): total number of jobs
+
+    Returns:
+        bins (list): index of work loads for each job, in original order
+
+    """
+    load = [[0.0, 0, i] for i in range(0, n_job)]
+    bins = [[] for i in range(0, n_job)]
+    for i in sorted(range(0, len(cost)), key=lambda x: (-cost[x], x)):
+        _bin = min(load)
+        _bin[0] += cost[i]
+        _bin[1] += 1
+        bins[_bin[2]].append(i)
+    return [sorted(x) for x in bins]
+
+
+def get_cost(works, method='size'):
+    """ estimate cost of each work load
+
+    Args:
+        works (list): list of work loads, file, [path, name] or list of files
+        method (str): size, record, or path to timing csv of a previous run
+
+    Returns:
+        cost (list, float): estimated cost of each work load
+
+    """
+    if method == 'size':
+        return [float(sum([os.path.getsize(x) for x in work_files(work)
+                    if os.path.isfile(x)])) for work in works]
+    elif method == 'record':
+        return [float(sum([count_records(x) for x in work_files(work)]))
+                    for work in works]
+    elif os.path.isfile(method):
+        with open(method, 'r') as f:
+            timing = dict([(x[0], float(x[1])) for x in csv.reader(f)
+                            if len(x) > 1])
+        cost = [timing.get(work_name(work), -1.0) for work in works]
+        known = [x for x in cost if x >= 0]
+        if len(known) > 0:
+            guess = float(np.median(known))
+        else:
+            guess = 1.0
+        return [x if x >= 0 else guess for x in cost]
+    else:
+        raise ValueError('Unknown cost method: {}'.format(method))
+
+
+def count_records(_file):
+    """ count records in a npz cache file without loading it, file size for
+        other files
+
+    Args:
+        _file (str): path to file
+
+    Returns:
+        n (int): number of records
+
+    """
+    if not os.path.isfile(_file):
+        return 0
+    if not zipfile.is_zipfile(_file):
+        return os.path.getsize(_file)
+    with zipfile.ZipFile(_file, 'r') as z:
+        names = z.namelist()
+        if len(names) == 0:
+            return 0
+        if 'record.npy' in names:
+            name = 'record.npy'
+        else:
+            name = names[0]
+        f = z.open(name)
+        version = np.lib.format.read_magic(f)
+        if version[0] == 1:
+            shape = np.lib.format.read_array_header_1_0(f)[0]
+        else:
+            shape = np.lib.format.read_array_header_2_0(f)[0]
+        f.close()
+    return int(np.prod(shape))
+
+
+def work_files(work):
+    """ list the files behind a work load
+
+    Args:
+        work (str, list): file, [path, name] or nested list of files
+
+    Returns:
+        files (list, str): files of the work load
+
+    """
+    if type(work) == str:
+        return [work]
+    if len(work) == 2 and type(work[0]) == str and type(work[1]) == str:
+        if os.sep not in work[1]:
+            return [os.path.join(work[0], work[1])]
+    files = []
+    for x in work:
+        if type(x) == str:
+            files.append(x)
+        elif type(x) == list:
+            files.extend(work_files(x))
+    return files
+
+
+def work_name(work):
+    """ name of a work load, used as key of timing files
+
+    Args:
+        work (str, list): file, [path, name] or list of files
+
+    Returns:
+        name (str): name of the work load
+
+    """
+    files = work_files(work)
+    if len(files) > 0:
+        return os.path.basename(files[0])
+    return str(work)
 
 
 def show_progress(i, n, step):
@@ -151,35 +296,42 @@ def get_int(x):
         y (list, int): int in the string
 
     """
-    return map(int, re.findall('\d+', x))
+    return list(map(int, re.findall('\d+', x)))
 
 
 def doy_to_ordinal(doy):
     """ convert date of year to ordinal date
 
     Args:
-        doy (int): day of year
+        doy (int, ndarray): day of year
 
     Returns:
-        ordinal (int): ordinal date
+        ordinal (int, ndarray): ordinal date
 
     """
-    _date = doy_to_date(doy)
-    return date.toordinal(date(_date[0], _date[1], _date[2]))
+    if np.ndim(doy) == 0:
+        return date(doy // 1000, 1, 1).toordinal() + doy % 1000 - 1
+    return doy_to_datetime(doy).astype(np.int64) + EPOCH_ORDINAL
 
 
 def ordinal_to_doy(ordinal):
     """ convert ordinal date to day of year
 
     Args:
-        ordinal (int): ordinal date
+        ordinal (int, ndarray): ordinal date
 
     Returns:
-        doy (int): day of year
+        doy (int, ndarray): day of year
 
     """
-    _date = date.fromordinal(ordinal)
-    return date_to_doy(_date.year, _date.month, _date.day)
+    if np.ndim(ordinal) == 0:
+        _date = date.fromordinal(int(ordinal))
+        return _date.year * 1000 + _date.timetuple().tm_yday
+    _date = (np.asarray(ordinal, np.int64) - EPOCH_ORDINAL).astype(
+                'datetime64[D]')
+    _year = _date.astype('datetime64[Y]')
+    return ((_year.astype(np.int64) + 1970) * 1000 +
+            (_date - _year).astype(np.int64) + 1)
 
 
 def select_samples(population, n):
@@ -200,16 +352,46 @@ def select_samples(population, n):
         return population[random.sample(range(0, len(population)), n)]
 
 
+def select_index(population, n, rs='NA'):
+    """ select indices of samples without replacement, without building the
+        population when it is much larger than the sample
+
+    Args:
+        population (int): size of population
+        n (int): number of samples
+        rs (RandomState): random generator, NA for a new unseeded one
+
+    Returns:
+        index (ndarray): indices of samples, in random order
+
+    """
+    if rs == 'NA':
+        rs = np.random.RandomState()
+    if n * 2 > population:
+        return rs.permutation(population)[:n]
+    index = np.empty(0, np.int64)
+    while len(index) < n:
+        draw = np.append(index, rs.randint(0, population, n - len(index),
+                                            np.int64))
+        # keep first draw of repeated indices, in order of drawing
+        _unique, first = np.unique(draw, return_index=True)
+        index = draw[np.sort(first)]
+    return index
+
+
 def split_doy(doy):
     """ split doy into year and day
 
     Args:
-        doy (int): day of year
+        doy (int, ndarray): day of year
 
     Returns:
-        (year, day) (int): year, day
+        (year, day) (int, ndarray): year, day
 
     """
+    if np.ndim(doy) > 0:
+        doy = np.asarray(doy, np.int64)
+        return (doy // 1000, doy % 1000)
     year = int(math.floor(doy/1000))
     day = doy - (year * 1000)
     return (year, day)
@@ -0,0 +1,348 @@
+""" Module for a filesystem based work queue shared by batch jobs
+
+    A queue is a folder with three sub folders: todo, claimed and done. Each
+    work load is a small json file that moves from one folder to the next by
+    atomic rename, so any number of jobs on any number of nodes can pull from
+    the same queue through a shared file system. Only work loads reported as
+    successful move to done, failed ones go back to todo for other jobs.
+"""
+import os
+import csv
+import json
+import time
+import shutil
+import socket
+import tempfile
+import threading
+
+from .logger import log
+from .utility import work_name
+from . import constants as cons
+
+
+def queue_owner():
+    """ name of this job as owner of claimed work loads
+
+    Returns:
+        owner (str): host name and process id
+
+    """
+    return '{}-{}'.format(socket.gethostname().split('.')[0], os.getpid())
+
+
+def queue_init(qdir, works):
+    """ create a work queue, does nothing if the queue already exists
+
+    Args:
+        qdir (str): path to the queue folder
+        works (list): list of work loads
+
+    Returns:
+        0: queue created
+        1: queue already exists
+
+    """
+    if os.path.isdir(os.path.join(qdir, 'todo')):
+        return 1
+
+    # build the queue aside and move it in place in one rename
+    qdir = qdir.rstrip('/')
+    tmp = tempfile.mkdtemp('.tmp', '{}.'.format(os.path.basename(qdir)),
+                            os.path.dirname(os.path.abspath(qdir)))
+    for x in ('todo', 'claimed', 'done'):
+        os.makedirs(os.path.join(tmp, x))
+    for i, work in enumerate(works):
+        with open(os.path.join(tmp, 'todo', '{:08d}'.format(i)), 'w') as f:
+            json.dump(work, f, default=lambda x: x.tolist())
+    try:
+        os.rename(tmp, qdir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(os.path.join(qdir, 'todo')):
+            raise
+        return 1
+    return 0
+
+
+def queue_claim(qdir, stale=cons.QUEUE_STALE, skip=()):
+    """ claim the next unprocessed work load, reclaim stale ones if needed
+
+    Args:
+        qdir (str): path to the queue folder
+        stale (int): seconds without heartbeat before a claim is stale
+        skip (set): names of tasks not to claim, e.g. failed in this job
+
+    Returns:
+        task (str): path to the claimed task file
+        work (list): the work load
+        'NA': nothing left to claim
+
+    """
+    for attempt in range(0, 2):
+        for task in sorted(os.listdir(os.path.join(qdir, 'todo'))):
+            if task in skip:
+                continue
+            todo = os.path.join(qdir, 'todo', task)
+            claim = os.path.join(qdir, 'claimed', '{}.{}'.format(task,
+                                                                queue_owner()))
+            # touch before the rename so the claim never looks stale, and
+            # give up on it if it is still reclaimed or claimed by another
+            try:
+                os.utime(todo, None)
+                os.rename(todo, claim)
+                with open(claim, 'r') as f:
+                    return claim, json.load(f)
+            except (IOError, OSError):
+                continue
+        if queue_reclaim(qdir, stale) == 0:
+            break
+    return 'NA', 'NA'
+
+
+def queue_reclaim(qdir, stale=cons.QUEUE_STALE):
+    """ move stale claims back to todo
+
+    Args:
+        qdir (str): path to the queue folder
+        stale (int): seconds without heartbeat before a claim is stale
+
+    Returns:
+        n (int): number of claims moved back
+
+    """
+    n = 0
+    now = time.time()
+    for claim in os.listdir(os.path.join(qdir, 'claimed')):
+        path = os.path.join(qdir, 'claimed', claim)
+        try:
+            if now - os.path.getmtime(path) < stale:
+                continue
+            os.rename(path, os.path.join(qdir, 'todo', claim.split('.')[0]))
+        except OSError:
+            continue
+        log.warning('Reclaimed stale work {}'.format(claim))
+        n += 1
+    return n
+
+
+def queue_done(task, elapsed=0):
+    """ mark a claimed work load as done
+
+    Args:
+        task (str): path to the claimed task file
+        elapsed (float): seconds spent on this work load
+
+    Returns:
+        0: successful
+        1: claim was lost to another job
+
+    """
+    qdir = os.path.dirname(os.path.dirname(task))
+    name = os.path.basename(task)
+    try:
+        with open(task, 'r') as f:
+            work = json.load(f)
+        with open(task, 'w') as f:
+            json.dump({'work': work, 'owner': name.split('.', 1)[1],
+                        'elapsed': elapsed, 'finished': time.time()}, f)
+        os.rename(task, os.path.join(qdir, 'done', name.split('.')[0]))
+    except (IOError, OSError):
+        log.warning('Lost claim on {}'.format(name))
+        return 1
+    return 0
+
+
+def queue_release(task):
+    """ put a claimed work load back to todo
+
+    Args:
+        task (str): path to the claimed task file
+
+    Returns:
+        0: successful
+        1: claim was lost to another job
+
+    """
+    qdir = os.path.dirname(os.path.dirname(task))
+    try:
+        os.rename(task, os.path.join(qdir, 'todo',
+                                        os.path.basename(task).split('.')[0]))
+    except OSError:
+        return 1
+    return 0
+
+
+def queue_heartbeat(task, stop, interval=cons.QUEUE_HEARTBEAT):
+    """ keep touching a claimed task file until stopped
+
+    Args:
+        task (str): path to the claimed task file
+        stop (Event): stop signal
+        interval (int): seconds between heartbeats
+
+    """
+    while not stop.wait(interval):
+        try:
+            os.utime(task, None)
+        except OSError:
+            break
+
+
+def queue_claims(works, qdir, heartbeat=cons.QUEUE_HEARTBEAT,
+                    stale=cons.QUEUE_STALE):
+    """ claim work loads from a queue until nothing is left
+
+    Args:
+        works (list): list of work loads, used if the queue does not exist yet
+        qdir (str): path to the queue folder
+        heartbeat (int): seconds between heartbeats on claimed work loads
+        stale (int): seconds without heartbeat before a claim is stale
+
+    Yields:
+        claim (dic): claimed task, work load and its heartbeat, to be passed
+            to queue_finish once processed
+
+    """
+    if queue_init(qdir, works) == 0:
+        log.info('Created queue of {} works in {}'.format(len(works), qdir))
+    owner = queue_owner()
+    failed = set()
+    while True:
+        task, work = queue_claim(qdir, stale, failed)
+        if task == 'NA':
+            # wait on works claimed by others in case they go stale
+            if len([x for x in os.listdir(os.path.join(qdir, 'claimed'))
+                    if not x.endswith(owner)]) == 0:
+                break
+            time.sleep(heartbeat)
+            continue
+        claim = {'task': task, 'work': work, 'stop': threading.Event(),
+                    'start': time.time(), 'failed': failed}
+        beat = threading.Thread(target=queue_heartbeat,
+                                args=(task, claim['stop'], heartbeat))
+        beat.daemon = True
+        beat.start()
+        yield claim
+
+
+def queue_finish(claim, ok=True):
+    """ stop the heartbeat of a claim and mark it as done if successful, or
+        put it back to todo for other jobs to retry if failed
+
+    Args:
+        claim (dic): claim from queue_claims
+        ok (bool): the work load was successful or not
+
+    Returns:
+        0: successful
+        1: claim was lost to another job
+
+    """
+    claim['stop'].set()
+    if not ok:
+        name = os.path.basename(claim['task']).split('.')[0]
+        log.warning('Released failed work {}'.format(name))
+        claim['failed'].add(name)
+        return queue_release(claim['task'])
+    return queue_done(claim['task'], time.time() - claim['start'])
+
+
+def queue_works(works, qdir, heartbeat=cons.QUEUE_HEARTBEAT,
+                stale=cons.QUEUE_STALE):
+    """ claim work loads from a queue one at a time until nothing is left,
+        a work load not reported done before the next one is claimed is
+        treated as failed, failed work loads are left in todo and not
+        claimed again by this job
+
+    Args:
+        works (list): list of work loads, used if the queue does not exist yet
+        qdir (str): path to the queue folder
+        heartbeat (int): seconds between heartbeats on the current work load
+        stale (int): seconds without heartbeat before a claim is stale
+
+    Returns:
+        works (generator): claimed work loads
+        done (function): done(work, ok=True) reports a work load from works
+
+    """
+    claims = {}
+
+    def _works():
+        for claim in queue_claims(works, qdir, heartbeat, stale):
+            claims[id(claim['work'])] = claim
+            try:
+                yield claim['work']
+            finally:
+                if id(claim['work']) in claims:
+                    queue_finish(claims.pop(id(claim['work'])), False)
+
+    def _done(work, ok=True):
+        return queue_finish(claims.pop(id(work)), ok)
+
+    return _works(), _done
+
+
+def queue_pipe(works, qdir, heartbeat=cons.QUEUE_HEARTBEAT,
+                stale=cons.QUEUE_STALE):
+    """ claim work loads for a pipeline, where several are in flight at once
+
+    Args:
+        works (list): list of work loads, used if the queue does not exist yet
+        qdir (str): path to the queue folder
+        heartbeat (int): seconds between heartbeats on claimed work loads
+        stale (int): seconds without heartbeat before a claim is stale
+
+    Returns:
+        works (generator): claimed work loads
+        done (function): done(work, ok=True) reports a work load from works,
+            moved to done if ok, put back to todo if failed
+
+    """
+    claims = {}
+
+    def _works():
+        for claim in queue_claims(works, qdir, heartbeat, stale):
+            claims[id(claim['work'])] = claim
+            yield claim['work']
+
+    def _done(work, ok=True):
+        return queue_finish(claims.pop(id(work)), ok)
+
+    return _works(), _done
+
+
+def queue_status(qdir):
+    """ count work loads in each state of a queue
+
+    Args:
+        qdir (str): path to the queue folder
+
+    Returns:
+        status (dic): number of todo, claimed and done work loads
+
+    """
+    return dict([(x, len(os.listdir(os.path.join(qdir, x))))
+                    for x in ('todo', 'claimed', 'done')])
+
+
+def queue_timing(qdir, des):
+    """ export time spent on each finished work load, usable as batch cost
+
+    Args:
+        qdir (str): path to the queue folder
+        des (str): path to output csv file
+
+    Returns:
+        n (int): number of records written
+
+    """
+    n = 0
+    with open(des, 'w') as output:
+        _writer = csv.writer(output, lineterminator='\n')
+        for task in sorted(os.listdir(os.path.join(qdir, 'done'))):
+            with open(os.path.join(qdir, 'done', task), 'r') as f:
+                record = json.load(f)
+            _writer.writerow([work_name(record['work']),
+                                '{:.3f}'.format(record['elapsed'])])
+            n += 1
+    return n
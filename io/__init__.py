@@ -1,20 +1,33 @@
 """ Module for io libarary
 """
-from .datafile import csv2list, csv2dict, hdr2geo, nc2array, list2csv
-from .sif import sifn2ln, sif2stack, sif2grid, sifn2date
-from .goes import gn2ln, goes2stack
-from .viirs import viirs2gtif, viirsQA, vn2ln, viirsGeo
-from .stack import stack2array, stackGeo, array2stack, stackMerge, stack2table
-from .shape import csv2shape
-from .yatsm import cache2map, yatsm2map, yatsm2records, yatsm2pixels
-from .hls import hls2stack, hlsQA, hn2ln, ln2tn
-from .mask import mn2ln, bit2mask, mask2array, mask2strata
-from .sentinel import sen2stack, sn2ln
-from .modis import (modis2stack, modis2composite, modisvi2stack, modislc2stack,
-                    nbar2stack, pheno2stack, nbarcmg2stack)
-from .image import stack2image, addTextToImage
+from ..common.lazy import lazy_attrs
 
 
+# submodules and the libraries they need are imported on first access
+__getattr__, __dir__ = lazy_attrs(__name__, [
+    ['datafile', ['csv2list', 'csv2dict', 'hdr2geo', 'nc2array', 'list2csv']],
+    ['sif', ['sifn2ln', 'sif2stack', 'sif2grid', 'sifn2date']],
+    ['goes', ['gn2ln', 'goes2stack', 'goesRead', 'goesClean', 'goesWrite']],
+    ['viirs', ['viirs2gtif', 'viirsQA', 'vn2ln', 'viirsGeo']],
+    ['stack', ['stack2array', 'stackGeo', 'array2stack', 'stackMerge',
+                'stack2table', 'stack2blocks', 'blocks2stack',
+                'stack2points', 'blocks2files']],
+    ['shape', ['csv2shape', 'samples2shape', 'shape2points']],
+    ['yatsm', ['cache2map', 'yatsm2map', 'yatsm2records', 'yatsm2pixels',
+                'records2csr', 'records2npz', 'npz2memmap', 'npz2pixels',
+                'npz2csr', 'cache_lines', 'cache2points']],
+    ['hls', ['hls2stack', 'hlsQA', 'hn2ln', 'ln2tn', 'hlsRead', 'hlsMask',
+                'hlsClean', 'hlsWrite']],
+    ['mask', ['mn2ln', 'bit2mask', 'mask2array', 'mask2strata']],
+    ['sentinel', ['sen2stack', 'sn2ln', 'senRead', 'senResample',
+                    'senWrite']],
+    ['modis', ['modis2stack', 'modis2composite', 'modisvi2stack',
+                'modislc2stack', 'nbar2stack', 'pheno2stack',
+                'nbarcmg2stack']],
+    ['image', ['stack2image', 'addTextToImage']],
+    ['focal', ['tile_windows', 'focal_tile', 'focal2stack']]
+])
+
 __all__ = [
     'viirs2gtif',
     'viirsQA',
@@ -24,6 +37,8 @@ __all__ = [
     'csv2list',
     'csv2dict',
     'csv2shape',
+    'samples2shape',
+    'shape2points',
     'stack2image',
     'stackGeo',
     'array2stack',
@@ -33,13 +48,24 @@ __all__ = [
     'hn2ln',
     'hls2stack',
     'hlsQA',
+    'hlsRead',
+    'hlsMask',
+    'hlsClean',
+    'hlsWrite',
     'mn2ln',
     'bit2mask',
     'mask2array',
     'sen2stack',
+    'senRead',
+    'senResample',
+    'senWrite',
     'sn2ln',
     'mask2strata',
     'stack2table',
+    'stack2blocks',
+    'blocks2stack',
+    'blocks2files',
+    'stack2points',
     'modis2stack',
     'modis2composite',
     'ln2tn',
@@ -55,9 +81,22 @@ __all__ = [
     'nbarcmg2stack',
     'gn2ln',
     'goes2stack',
+    'goesRead',
+    'goesClean',
+    'goesWrite',
     'yatsm2map',
     'addTextToImage',
     'yatsm2records',
     'yatsm2pixels',
-    'list2csv'
+    'records2csr',
+    'records2npz',
+    'npz2memmap',
+    'npz2pixels',
+    'npz2csr',
+    'cache_lines',
+    'cache2points',
+    'list2csv',
+    'tile_windows',
+    'focal_tile',
+    'focal2stack'
 ]
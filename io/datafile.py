@@ -1,10 +1,9 @@
 """ Module for IO of non-image files
 """
+import os
 import csv
 import ast
 
-from netCDF4 import Dataset
-
 from ..common import log
 
 
@@ -144,8 +143,10 @@ def nc2array(_file, var=0):
         array (ndarray): output array
 
     """
+    # netCDF4 is only needed here, keep csv and header readers light
+    from netCDF4 import Dataset
     nc = Dataset(_file, 'r')
     if type(var) == int:
-        var = nc.variables.keys()[var]
+        var = list(nc.variables.keys())[var]
     array = nc.variables[var][:]
     return array
@@ -0,0 +1,179 @@
+""" Module for running focal operations on images tile by tile
+
+    Images are split into tiles, each tile is read with a halo of pixels
+    around it so neighbourhoods reaching over the tile edge see the same
+    pixels as on the full image, and only the core of each tile is written.
+    Tiles are processed by a pool of processes, one tile per process at a
+    time and only a few finished tiles waiting to be written, so memory
+    follows tile size and number of processes rather than image size. The
+    focal function has to be defined at module level so it can be sent to
+    the processes.
+"""
+import os
+import numpy as np
+import collections
+import multiprocessing
+
+from osgeo import gdal
+
+from ..common import log
+from ..common import constants as cons
+
+
+def tile_windows(lines, samples, size=cons.TILE_SIZE, halo=0):
+    """ split an image into tiles with halo
+
+    Args:
+        lines (int): number of lines of image
+        samples (int): number of samples of image
+        size (int): lines and samples per tile
+        halo (int): pixels read around each tile, fewer at image edges
+
+    Returns:
+        windows (list, list): row, col, lines and samples of each tile core
+            followed by row, col, lines and samples of tile with halo
+
+    """
+    windows = []
+    for row in range(0, lines, size):
+        for col in range(0, samples, size):
+            nrow = min(size, lines - row)
+            ncol = min(size, samples - col)
+            row2 = max(row - halo, 0)
+            col2 = max(col - halo, 0)
+            windows.append([row, col, nrow, ncol, row2, col2,
+                            min(row + nrow + halo, lines) - row2,
+                            min(col + ncol + halo, samples) - col2])
+    return windows
+
+
+def focal_tile(work):
+    """ read a tile with halo from images, run the focal function, and cut
+        out the core
+
+    Args:
+        work (list): focal function, images, bands, window, numpy data
+            type and extra arguments of the focal function
+
+    Returns:
+        window (list): the window
+        array (ndarray): core of result, NA if failed
+
+    """
+    func, imgs, bands, window, _type, args = work
+    try:
+        arrays = []
+        for img, band in zip(imgs, bands):
+            img2 = gdal.Open(img, gdal.GA_ReadOnly)
+            arrays.append(img2.GetRasterBand(band).ReadAsArray(window[5],
+                            window[4], window[7], window[6]).astype(_type))
+            img2 = None
+        result = func(*(arrays + list(args)))
+        top = window[0] - window[4]
+        left = window[1] - window[5]
+        return window, result[top:(top + window[2]), left:(left + window[3])]
+    except Exception as e:
+        log.error('Failed tile at [{}, {}]: {}'.format(window[0], window[1],
+                    e))
+        return window, 'NA'
+
+
+def focal_pool(pool, works, ahead):
+    """ run tiles by a pool of processes, in order, with at most a few tiles
+        submitted ahead of the one being returned
+
+    Args:
+        pool (Pool): pool of processes
+        works (list): work of each tile, as for focal_tile
+        ahead (int): tiles submitted ahead of the one being returned
+
+    Yields:
+        window (list): the window
+        array (ndarray): core of result, NA if failed
+
+    """
+    pending = collections.deque()
+    for work in works:
+        pending.append(pool.apply_async(focal_tile, (work,)))
+        if len(pending) > ahead:
+            yield pending.popleft().get()
+    while len(pending) > 0:
+        yield pending.popleft().get()
+
+
+def focal2stack(func, imgs, des, geo, halo=0, args=(), bands='NA',
+                nodata='NA', _type=gdal.GDT_Int16, _dtype=np.int16,
+                overwrite=False, workers=cons.TILE_WORKERS,
+                size=cons.TILE_SIZE, ops=['COMPRESS=PACKBITS']):
+    """ run a focal function tile by tile and save result as image
+
+    Args:
+        func (function): func(array, ..., *args) returns the result of tiles
+            of images, same shape as the tiles, defined at module level
+        imgs (list, str): input images, first band of each is read
+        des (str): destination to save the output image
+        geo (dic): spatial reference, images have the same size
+        halo (int): pixels around each tile the function needs
+        args (tuple): extra arguments of func
+        bands (list, str): description of output band, NA for none
+        nodata (int): nodata value
+        _type (int): gdal data type of output
+        _dtype (object): numpy data type tiles are read as
+        overwrite (bool): overwrite or not
+        workers (int): number of processes, 0 or 1 to run in this process
+        size (int): lines and samples per tile
+        ops (list, str): options for output file
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error during process
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des))
+        return 1
+
+    if type(imgs) == str:
+        imgs = [imgs]
+    works = [[func, imgs, [1] * len(imgs), x, _dtype, args] for x in
+                tile_windows(geo['lines'], geo['samples'], size, halo)]
+    pool = None
+    output = None
+    try:
+        _driver = gdal.GetDriverByName('GTiff')
+        output = _driver.Create(des, geo['samples'], geo['lines'], 1, _type,
+                                options=ops)
+        output.SetProjection(geo['proj'])
+        output.SetGeoTransform(geo['geotrans'])
+        band = output.GetRasterBand(1)
+        if not nodata == 'NA':
+            band.SetNoDataValue(nodata)
+        if not bands == 'NA':
+            band.SetDescription(bands if type(bands) == str else bands[0])
+        if workers < 2:
+            results = map(focal_tile, works)
+        else:
+            pool = multiprocessing.Pool(min(workers, len(works)))
+            results = focal_pool(pool, works, workers)
+        for window, array in results:
+            if type(array) == str:
+                raise RuntimeError('tile at [{}, {}] failed'.format(
+                                    window[0], window[1]))
+            band.WriteArray(array, window[1], window[0])
+    except:
+        log.error('Failed to write output to {}'.format(des))
+        band = None
+        output = None
+        if os.path.isfile(des):
+            os.remove(des)
+        return 2
+    finally:
+        if pool is not None:
+            pool.terminate()
+    band = None
+    output = None
+
+    # done
+    return 0
@@ -9,7 +9,7 @@ import numpy as np
 from osgeo import gdal
 
 from . import nc2array
-from ..common import log, enlarge2, date_to_doy
+from ..common import log, enlarge2, date_to_doy, metrics_start, metrics_stop
 from ..common import constants as cons
 
 
@@ -37,20 +37,51 @@ def goes2stack(_file, des, overwrite=False, verbose=False):
         return 1
 
     # read input netCDF
-    if verbose:
-        log.info('Reading input: {}'.format(_file))
     try:
-        land = nc2array(_file, 3)
-        ssi = nc2array(_file, 4).data
-        ssic = nc2array(_file, 5)
-        dli = nc2array(_file, 6).data
-        dlic = nc2array(_file, 7)
-        lat = enlarge2(nc2array(_file, 1), 2400, 1).T
-        lon = enlarge2(nc2array(_file, 2), 2400, 1)
+        goes_data = goesRead(_file, verbose)
     except:
         log.error('Failed to read input {}'.format(_file))
         return 2
 
+    # clean up data
+    try:
+        goesClean(goes_data, verbose)
+    except:
+        log.error('Failed to clean up data.')
+        return 4
+
+    # write output
+    if goesWrite(goes_data, des, overwrite, verbose) > 0:
+        return 5
+
+    # done
+    if verbose:
+        log.info('Process completed.')
+    return 0
+
+
+def goesRead(_file, verbose=False):
+    """ read GOES netCDF and create geo info
+
+    Args:
+        _file (str): path to input GOES file
+        verbose (bool): verbose or not
+
+    Returns:
+        goes_data (dic): geo info and bands
+
+    """
+    if verbose:
+        log.info('Reading input: {}'.format(_file))
+    _m = metrics_start('GOES', 'read', _file)
+    land = nc2array(_file, 3)
+    ssi = nc2array(_file, 4).data
+    ssic = nc2array(_file, 5)
+    dli = nc2array(_file, 6).data
+    dlic = nc2array(_file, 7)
+    lat = enlarge2(nc2array(_file, 1), 2400, 1).T
+    lon = enlarge2(nc2array(_file, 2), 2400, 1)
+
     # create geo info
     if verbose:
         log.info('Creating geo information...')
@@ -61,27 +92,63 @@ def goes2stack(_file, des, overwrite=False, verbose=False):
     geo['samples'] = 2400
     geo['bands'] = 7
     geo['nodata'] = -32768
+    metrics_stop(_m, os.path.getsize(_file), land.size)
+    return {'geo': geo, 'bands': [land, ssi, ssic, dli, dlic, lat, lon]}
 
-    # clean up data
+
+def goesClean(goes_data, verbose=False):
+    """ scale GOES data to integer
+
+    Args:
+        goes_data (dic): GOES data from goesRead, cleaned in place
+        verbose (bool): verbose or not
+
+    Returns:
+        goes_data (dic): cleaned GOES data
+
+    """
     if verbose:
         log.info('Cleaning up data...')
-    try:
-        land = land.astype(np.int16)
-        ssi = (ssi * 10).astype(np.int16)
-        ssic = ssic.astype(np.int16)
-        dli = (dli * 10).astype(np.int16)
-        dlic = dlic.astype(np.int16)
-        lat = (lat * 100).astype(np.int16)
-        lon = (lon * 100).astype(np.int16)
-    except:
-        log.error('Failed to clean up data.')
-        return 4
+    _m = metrics_start('GOES', 'clean')
+    scale = (1, 10, 1, 10, 1, 100, 100)
+    goes_data['bands'] = [(band * scale[i]).astype(np.int16) if scale[i] > 1
+                            else band.astype(np.int16)
+                            for i, band in enumerate(goes_data['bands'])]
+    metrics_stop(_m, 0, goes_data['bands'][0].size)
+    return goes_data
+
+
+def goesWrite(goes_data, des, overwrite=False, verbose=False):
+    """ write cleaned GOES data to stack image
+
+    Args:
+        goes_data (dic): cleaned GOES data from goesClean
+        des (str): path to output
+        overwrite (bool): overwrite or not
+        verbose (bool): verbose or not
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error in writing output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    names = ('Land Mask', 'Surface Solar Irradiance', 'SSI Confidence',
+                'Downward Longwave Irradiance', 'DLI Confidence', 'Latitude',
+                'Longitude')
 
     # write output
     if verbose:
         log.info('Writing output: {}'.format(des))
+    _m = metrics_start('GOES', 'write', des)
     try:
         # initialize output
+        geo = goes_data['geo']
         _driver = gdal.GetDriverByName('GTiff')
         output = _driver.Create(des, geo['samples'], geo['lines'], geo['bands'],
                                 gdal.GDT_Int16)
@@ -91,30 +158,17 @@ def goes2stack(_file, des, overwrite=False, verbose=False):
         for i in range(1,7):
             output.GetRasterBand(i).SetNoDataValue(geo['nodata'])
 
-        # write output
-        output.GetRasterBand(1).WriteArray(land)
-        output.GetRasterBand(2).WriteArray(ssi)
-        output.GetRasterBand(3).WriteArray(ssic)
-        output.GetRasterBand(4).WriteArray(dli)
-        output.GetRasterBand(5).WriteArray(dlic)
-        output.GetRasterBand(6).WriteArray(lat)
-        output.GetRasterBand(7).WriteArray(lon)
-
-        # assign band name
-        output.GetRasterBand(1).SetDescription('Land Mask')
-        output.GetRasterBand(2).SetDescription('Surface Solar Irradiance')
-        output.GetRasterBand(3).SetDescription('SSI Confidence')
-        output.GetRasterBand(4).SetDescription('Downward Longwave Irradiance')
-        output.GetRasterBand(5).SetDescription('DLI Confidence')
-        output.GetRasterBand(6).SetDescription('Latitude')
-        output.GetRasterBand(7).SetDescription('Longitude')
+        # write output and assign band name
+        for i, band in enumerate(goes_data['bands']):
+            output.GetRasterBand(i+1).WriteArray(band)
+            output.GetRasterBand(i+1).SetDescription(names[i])
+        output = None
     except:
         log.error('Failed to write output to {}'.format(des))
-        return 5
+        return 2
 
     # done
-    if verbose:
-        log.info('Process completed.')
+    metrics_stop(_m, os.path.getsize(des), geo['lines'] * geo['samples'])
     return 0
 
 
@@ -9,7 +9,7 @@ from osgeo import gdal
 from pyhdf.SD import SD, SDC
 
 from . import hdr2geo
-from ..common import log
+from ..common import log, metrics_start, metrics_stop
 from ..common import constants as cons
 
 
@@ -34,182 +34,201 @@ def hls2stack(hls, des, sensor='S30', _hdr=True, overwrite=False, verbose=False)
         6: error in writing output
 
     """
-    _error = 0
-
     # check if output already exists
     if (not overwrite) and os.path.isfile(des):
         log.error('{} already exists.'.format(des.split('/')[-1]))
         return 1
 
     # handle sensor
+    if sensor not in ('L30', 'S30'):
+        log.error('Unknown sensor {}'.format(sensor))
+        return 2
+
+    # read input image
+    try:
+        hls_data = hlsRead(hls, sensor, _hdr, verbose)
+    except:
+        log.error('Failed to read input {}'.format(hls))
+        return 3
+
+    # generate mask band
+    try:
+        hlsMask(hls_data, verbose)
+    except:
+        log.error('Failed to generate mask band.')
+        return 4
+
+    # clean up data
+    try:
+        hlsClean(hls_data, verbose)
+    except:
+        log.error('Failed to clean up data.')
+        return 5
+
+    # write output
+    if hlsWrite(hls_data, des, sensor, overwrite, verbose) > 0:
+        return 6
+
+    # done
+    if verbose:
+        log.info('Process completed.')
+    return 0
+
+
+def hlsRead(hls, sensor='S30', _hdr=True, verbose=False):
+    """ read selected bands and geo info of HLS product
+
+    Args:
+        hls (str): path to input HLS file
+        sensor (str): which sensor, S30 or L30
+        _hdr (bool): read header file or not
+        verbose (bool): verbose or not
+
+    Returns:
+        hls_data (dic): geo info, bands and QA
+
+    """
     if sensor == 'L30':
         BANDS = cons.L30_BANDS
-    elif sensor == 'S30':
+    else:
         BANDS = cons.S30_BANDS
+
+    # read geo info
+    if verbose:
+        log.info('Reading geo information...')
+    _m = metrics_start('HLS', 'read', hls)
+    if _hdr:
+        geo = hdr2geo('{}.hdr'.format(hls))
     else:
-        log.error('Unknown sensor {}'.format(sensor))
-        return 2
+        hls_img = gdal.Open(hls, gdal.GA_ReadOnly)
+        hls_sub = hls_img.GetSubDatasets()
+        hls_temp = gdal.Open(hls_sub[1][0], gdal.GA_ReadOnly)
+        geo = {'proj': hls_temp.GetProjection()}
+        geo['geotrans'] = hls_temp.GetGeoTransform()
+        hls_img = None
+        hls_sub = None
+        hls_temp = None
+
+    # read actual data
+    if verbose:
+        log.info('Reading input: {}'.format(hls))
+    hls_sd = SD(hls, SDC.READ)
+    try:
+        bands = [hls_sd.select(x).get().astype(np.int16) for x in BANDS]
+    finally:
+        hls_sd.end()
+    metrics_stop(_m, os.path.getsize(hls), bands[0].size)
+    return {'geo': geo, 'bands': bands[:-1], 'QA': bands[-1]}
 
-    # flow control
-    while True:
-        # read input image
-        if verbose:
-            log.info('Reading input: {}'.format(hls))
-        try:
-            hls_sd = SD(hls, SDC.READ)
-            hls_blue = hls_sd.select(BANDS[0])
-            hls_green = hls_sd.select(BANDS[1])
-            hls_red = hls_sd.select(BANDS[2])
-            hls_nir = hls_sd.select(BANDS[3])
-            hls_swir1 = hls_sd.select(BANDS[4])
-            hls_swir2 = hls_sd.select(BANDS[5])
-            hls_cirrus = hls_sd.select(BANDS[6])
-            hls_QA = hls_sd.select(BANDS[7])
-        except:
-            _error = 3
-            log.error('Failed to read input {}'.format(hls))
-            break
-
-        # read geo info
-        if verbose:
-            log.info('Reading geo information...')
-        try:
-            if _hdr:
-                geo = hdr2geo('{}.hdr'.format(hls))
-            else:
-                hls_img = gdal.Open(hls, gdal.GA_ReadOnly)
-                hls_sub = hls_img.GetSubDatasets()
-                hls_temp = gdal.Open(hls_sub[1][0], gdal.GA_ReadOnly)
-                geo = {'proj': hls_temp.GetProjection()}
-                geo['geotrans'] = hls_temp.GetGeoTransform()
-                hls_img = None
-                hls_sub = None
-                hls_temp = None
-        except:
-            _error = 3
-            log.error('Failed to read geo info from {}'.format(hls))
-            break
-
-        # read actual data
-        if verbose:
-            log.info('Reading actual data...')
-        try:
-            blue = hls_blue.get().astype(np.int16)
-            green = hls_green.get().astype(np.int16)
-            red = hls_red.get().astype(np.int16)
-            nir = hls_nir.get().astype(np.int16)
-            swir1 = hls_swir1.get().astype(np.int16)
-            swir2 = hls_swir2.get().astype(np.int16)
-            cirrus = hls_cirrus.get().astype(np.int16)
-            QA = hls_QA.get().astype(np.int16)
-        except:
-            _error = 3
-            log.error('Failed to read data from {}'.format(hls))
-            break
-
-        # generate mask band
-        if verbose:
-            log.info('Generating mask band...')
-        try:
-            fmask = True
-            mask = hlsQA(QA, fmask)
-            if not fmask:
-                _total = np.sum(mask)
-                _size = np.shape(mask)
-                if verbose:
-                    log.info('{}% masked'.format(_total/(_size[0]*_size[1])*100))
-        except:
-            _error = 4
-            log.error('Failed to generate mask band.')
-            break
-
-        # clean up data
-        if verbose:
-            log.info('Cleaning up data...')
-        try:
-            invalid = ((blue == -1000) | (green == -1000) | (red == -1000) |
-                        (nir == -1000) | (swir1 == -1000) | (swir2 == -1000))
-            blue[invalid] = cons.NODATA
-            green[invalid] = cons.NODATA
-            red[invalid] = cons.NODATA
-            nir[invalid] = cons.NODATA
-            swir1[invalid] = cons.NODATA
-            swir2[invalid] = cons.NODATA
-            cirrus[invalid] = cons.NODATA
-            mask[invalid] = cons.MASK_NODATA
-        except:
-            _error = 5
-            log.error('Failed to clean up data.')
-            break
-
-        # write output
+
+def hlsMask(hls_data, verbose=False):
+    """ generate fmask style mask band from QA of HLS data
+
+    Args:
+        hls_data (dic): HLS data from hlsRead, mask is added to it
+        verbose (bool): verbose or not
+
+    Returns:
+        hls_data (dic): HLS data with mask
+
+    """
+    if verbose:
+        log.info('Generating mask band...')
+    _m = metrics_start('HLS', 'mask')
+    fmask = True
+    hls_data['mask'] = hlsQA(hls_data['QA'], fmask)
+    if not fmask:
+        _total = np.sum(hls_data['mask'])
+        _size = np.shape(hls_data['mask'])
         if verbose:
-            log.info('Writing output: {}'.format(des))
-        try:
-            # initialize output
-            _driver = gdal.GetDriverByName('GTiff')
-            output = _driver.Create(des, red.shape[1], red.shape[0], 8,
-                                    gdal.GDT_Int16)
-            output.SetProjection(geo['proj'])
-            output.SetGeoTransform(geo['geotrans'])
-            # set nodata value
-            for i in range(1,8):
-                output.GetRasterBand(i).SetNoDataValue(cons.NODATA)
-            output.GetRasterBand(8).SetNoDataValue(cons.MASK_NODATA)
-
-            # write output
-            output.GetRasterBand(1).WriteArray(blue)
-            output.GetRasterBand(2).WriteArray(green)
-            output.GetRasterBand(3).WriteArray(red)
-            output.GetRasterBand(4).WriteArray(nir)
-            output.GetRasterBand(5).WriteArray(swir1)
-            output.GetRasterBand(6).WriteArray(swir2)
-            output.GetRasterBand(7).WriteArray(cirrus)
-            output.GetRasterBand(8).WriteArray(mask)
-
-            # assign band name
-            output.GetRasterBand(1).SetDescription('{} {} Blue'.format(sensor,
-                                                                    BANDS[0]))
-            output.GetRasterBand(2).SetDescription('{} {} Green'.format(sensor,
-                                                                    BANDS[1]))
-            output.GetRasterBand(3).SetDescription('{} {} Red'.format(sensor,
-                                                                    BANDS[2]))
-            output.GetRasterBand(4).SetDescription('{} {} NIR'.format(sensor,
-                                                                    BANDS[3]))
-            output.GetRasterBand(5).SetDescription('{} {} SWIR1'.format(sensor,
-                                                                    BANDS[4]))
-            output.GetRasterBand(6).SetDescription('{} {} SWIR2'.format(sensor,
-                                                                    BANDS[5]))
-            output.GetRasterBand(7).SetDescription('{} {} Cirrus'.format(sensor,
-                                                                    BANDS[6]))
-            output.GetRasterBand(8).SetDescription('{} {} Fmask'.format(sensor,
-                                                                    BANDS[7]))
-        except:
-            _error = 6
-            log.error('Failed to write output to {}'.format(des))
-            break
-
-        # continue next
-        break
-
-    # close files
+            log.info('{}% masked'.format(_total/(_size[0]*_size[1])*100))
+    metrics_stop(_m, 0, hls_data['mask'].size)
+    return hls_data
+
+
+def hlsClean(hls_data, verbose=False):
+    """ set invalid pixels of HLS data to nodata
+
+    Args:
+        hls_data (dic): HLS data with mask from hlsMask, cleaned in place
+        verbose (bool): verbose or not
+
+    Returns:
+        hls_data (dic): cleaned HLS data
+
+    """
+    if verbose:
+        log.info('Cleaning up data...')
+    _m = metrics_start('HLS', 'clean')
+    invalid = np.zeros(hls_data['QA'].shape, bool)
+    for band in hls_data['bands'][:6]:
+        invalid |= (band == -1000)
+    for band in hls_data['bands']:
+        band[invalid] = cons.NODATA
+    hls_data['mask'][invalid] = cons.MASK_NODATA
+    metrics_stop(_m, 0, invalid.size)
+    return hls_data
+
+
+def hlsWrite(hls_data, des, sensor='S30', overwrite=False, verbose=False):
+    """ write cleaned HLS data to stack image
+
+    Args:
+        hls_data (dic): cleaned HLS data from hlsClean
+        des (str): path to output
+        sensor (str): which sensor, S30 or L30
+        overwrite (bool): overwrite or not
+        verbose (bool): verbose or not
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error in writing output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    if sensor == 'L30':
+        BANDS = cons.L30_BANDS
+    else:
+        BANDS = cons.S30_BANDS
+    names = ('Blue', 'Green', 'Red', 'NIR', 'SWIR1', 'SWIR2', 'Cirrus',
+                'Fmask')
+
+    # write output
     if verbose:
-        log.info('Closing files...')
-    hls_blue = None
-    hls_green = None
-    hls_red = None
-    hls_nir = None
-    hls_swir1 = None
-    hls_swir2 = None
-    hls_cirrus = None
-    hls_QA = None
-    hls_SD = None
+        log.info('Writing output: {}'.format(des))
+    _m = metrics_start('HLS', 'write', des)
+    try:
+        # initialize output
+        geo = hls_data['geo']
+        mask = hls_data['mask']
+        _driver = gdal.GetDriverByName('GTiff')
+        output = _driver.Create(des, mask.shape[1], mask.shape[0], 8,
+                                gdal.GDT_Int16)
+        output.SetProjection(geo['proj'])
+        output.SetGeoTransform(geo['geotrans'])
+        # set nodata value
+        for i in range(1,8):
+            output.GetRasterBand(i).SetNoDataValue(cons.NODATA)
+        output.GetRasterBand(8).SetNoDataValue(cons.MASK_NODATA)
+
+        # write output and assign band name
+        for i, band in enumerate(hls_data['bands'] + [mask]):
+            output.GetRasterBand(i+1).WriteArray(band)
+            output.GetRasterBand(i+1).SetDescription('{} {} {}'.format(sensor,
+                                                        BANDS[i], names[i]))
+        output = None
+    except:
+        log.error('Failed to write output to {}'.format(des))
+        return 2
 
     # done
-    if _error == 0:
-        if verbose:
-            log.info('Process completed.')
-    return _error
+    metrics_stop(_m, os.path.getsize(des), mask.size)
+    return 0
 
 
 def hlsQA(QA, fmask=False):
@@ -8,7 +8,7 @@ import numpy as np
 from osgeo import gdal
 
 from . import stackGeo, stack2array, array2stack
-from ..common import log, enlarge, reclassify
+from ..common import log, enlarge, reclassify, metrics_start, metrics_stop
 from ..common import constants as cons
 
 
@@ -50,6 +50,7 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     # read input image
     if verbose:
         log.info('Reading input: {}'.format(MOD09GA))
+    _m = metrics_start('MODIS', 'read', MOD09GA)
     try:
         mga_img = gdal.Open(MOD09GA, gdal.GA_ReadOnly)
         mga_sub = mga_img.GetSubDatasets()
@@ -103,10 +104,13 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     except:
         log.error('Failed to read data.')
         return 2
+    metrics_stop(_m, sum([os.path.getsize(x) for x in (MOD09GA, MOD09GQ)
+                            if x != 'NA']), red.size)
 
     # calculate NDVI
     if verbose:
         log.info('Calculating NDVI...')
+    _m = metrics_start('MODIS', 'ndvi')
     try:
         ndvi = ((nir-red) / (nir+red) * cons.SCALE_FACTOR).astype(np.int16)
         if MOD09GQ != 'NA':
@@ -114,10 +118,12 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     except:
         log.error('Failed to calculate NDVI.')
         return 3
+    metrics_stop(_m, 0, ndvi.size)
 
     # generate mask band
     if verbose:
         log.info('Generating mask band...')
+    _m = metrics_start('MODIS', 'mask')
     try:
         mask = modisQA(qa)
         _total = np.sum(mask)
@@ -128,6 +134,7 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     except:
         log.error('Failed to generate mask band.')
         return 3
+    metrics_stop(_m, 0, mask.size)
 
     # clean up data
     # if verbose:
@@ -150,6 +157,7 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     # write output
     if verbose:
         log.info('Writing output: {}'.format(des_ga))
+    _m = metrics_start('MODIS', 'write', des_ga)
     try:
         # initialize output
         _driver = gdal.GetDriverByName('GTiff')
@@ -231,6 +239,11 @@ def modis2stack(MOD09GA, des, MOD09GQ='NA', overwrite=False, verbose=False):
     mgq_red = None
     mgq_nir = None
     output = None
+    if MOD09GQ != 'NA':
+        metrics_stop(_m, os.path.getsize(des_ga) + os.path.getsize(des_gq),
+                        red.size + red2.size)
+    else:
+        metrics_stop(_m, os.path.getsize(des_ga), red.size)
 
     # done
     if verbose:
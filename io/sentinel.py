@@ -8,7 +8,7 @@ import numpy as np
 from osgeo import gdal
 
 from ..io import stackGeo, stack2array
-from ..common import log, enlarge, date_to_doy
+from ..common import log, enlarge, date_to_doy, metrics_start, metrics_stop
 from ..common import constants as cons
 
 
@@ -34,56 +34,110 @@ def sen2stack(sen, des, overwrite=False, verbose=False):
         return 1
 
     # read input image
-    if verbose:
-        log.info('Reading input: {}'.format(sen))
     try:
-        geo = stackGeo('{}02.jp2'.format(sen))
-        blue = stack2array('{}02.jp2'.format(sen), 1, np.int16)
-        green = stack2array('{}03.jp2'.format(sen), 1, np.int16)
-        red = stack2array('{}04.jp2'.format(sen), 1, np.int16)
-        nir = stack2array('{}08.jp2'.format(sen), 1, np.int16)
-        swir1 = enlarge(stack2array('{}11.jp2'.format(sen), 1, np.int16), 2)
-        swir2 = enlarge(stack2array('{}12.jp2'.format(sen), 1, np.int16), 2)
-        cirrus = enlarge(stack2array('{}10.jp2'.format(sen), 1, np.int16), 6)
+        sen_data = senResample(senRead(sen, verbose))
     except:
-        log.error('Failed to read input {}'.format(img))
+        log.error('Failed to read input {}'.format(sen))
         return 2
 
+    # write output
+    if senWrite(sen_data, des, overwrite, verbose) > 0:
+        return 3
+
+    # done
+    if verbose:
+        log.info('Process completed.')
+    return 0
+
+
+def senRead(sen, verbose=False):
+    """ read selected bands of Sentinel-2 L1C at their own resolution
+
+    Args:
+        sen (str): path to input Sentinel file
+        verbose (bool): verbose or not
+
+    Returns:
+        sen_data (dic): geo info and bands
+
+    """
+    if verbose:
+        log.info('Reading input: {}'.format(sen))
+    _m = metrics_start('Sentinel', 'read', sen)
+    files = ['{}{}.jp2'.format(sen, x) for x in ('02', '03', '04', '08', '11',
+                                                    '12', '10')]
+    geo = stackGeo(files[0])
+    bands = [stack2array(x, 1, np.int16) for x in files]
+    metrics_stop(_m, sum([os.path.getsize(x) for x in files]),
+                    sum([x.size for x in bands]))
+    return {'geo': geo, 'bands': bands}
+
+
+def senResample(sen_data):
+    """ resample 20m and 60m bands of Sentinel-2 data to 10m
+
+    Args:
+        sen_data (dic): Sentinel data from senRead, resampled in place
+
+    Returns:
+        sen_data (dic): Sentinel data at 10m
+
+    """
+    _m = metrics_start('Sentinel', 'resample')
+    bands = sen_data['bands']
+    for i, scale in ((4, 2), (5, 2), (6, 6)):
+        bands[i] = enlarge(bands[i], scale)
+    metrics_stop(_m, 0, bands[0].size * 3)
+    return sen_data
+
+
+def senWrite(sen_data, des, overwrite=False, verbose=False):
+    """ write resampled Sentinel-2 data to stack image
+
+    Args:
+        sen_data (dic): Sentinel data from senResample
+        des (str): path to output
+        overwrite (bool): overwrite or not
+        verbose (bool): verbose or not
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error in writing output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    names = ('S10 B02 Blue', 'S10 B03 Green', 'S10 B04 Red', 'S10 B08 NIR',
+                'S10 B11 SWIR', 'S10 B12 SWIR', 'S10 B10 Cirrus')
+
     # write output
     if verbose:
         log.info('Writing output: {}'.format(des))
+    _m = metrics_start('Sentinel', 'write', des)
     try:
         # initialize output
+        geo = sen_data['geo']
         _driver = gdal.GetDriverByName('GTiff')
         output = _driver.Create(des, geo['samples'], geo['lines'], 7,
                                 gdal.GDT_Int16)
         output.SetProjection(geo['proj'])
         output.SetGeoTransform(geo['geotrans'])
-        for i in range(1,8):
-            output.GetRasterBand(i).SetNoDataValue(cons.NODATA)
-        # write output
-        output.GetRasterBand(1).WriteArray(blue)
-        output.GetRasterBand(2).WriteArray(green)
-        output.GetRasterBand(3).WriteArray(red)
-        output.GetRasterBand(4).WriteArray(nir)
-        output.GetRasterBand(5).WriteArray(swir1)
-        output.GetRasterBand(6).WriteArray(swir2)
-        output.GetRasterBand(7).WriteArray(cirrus)
-        # assign band name
-        output.GetRasterBand(1).SetDescription('S10 B02 Blue')
-        output.GetRasterBand(2).SetDescription('S10 B03 Green')
-        output.GetRasterBand(3).SetDescription('S10 B04 Red')
-        output.GetRasterBand(4).SetDescription('S10 B08 NIR')
-        output.GetRasterBand(5).SetDescription('S10 B11 SWIR')
-        output.GetRasterBand(6).SetDescription('S10 B12 SWIR')
-        output.GetRasterBand(7).SetDescription('S10 B10 Cirrus')
+        # write output and assign band name
+        for i, band in enumerate(sen_data['bands']):
+            output.GetRasterBand(i+1).SetNoDataValue(cons.NODATA)
+            output.GetRasterBand(i+1).WriteArray(band)
+            output.GetRasterBand(i+1).SetDescription(names[i])
+        output = None
     except:
         log.error('Failed to write output to {}'.format(des))
-        return 3
+        return 2
 
     # done
-    if verbose:
-        log.info('Process completed.')
+    metrics_stop(_m, os.path.getsize(des), geo['lines'] * geo['samples'])
     return 0
 
 
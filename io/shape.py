@@ -104,3 +104,64 @@ def draw_ellipse(x, y, a, b, r):
     _ellipse = None
 
     return _ellipse2
+
+
+def samples2shape(samples, des, wkt, overwrite=False):
+    """ export samples as a point shapefile
+
+    Args:
+        samples (list, dic): samples with id, image, row, col, x, y and
+            stratum
+        des (str): path to output shapefile
+        wkt (str): coordinate system in WKT
+        overwrite (bool): overwrite or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error in generating output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    # write output
+    try:
+        _schema = {'geometry': 'Point', 'properties': {'id': 'int',
+                    'image': 'str', 'row': 'int', 'col': 'int',
+                    'x': 'float', 'y': 'float', 'stratum': 'int'}}
+        with collection(des, "w", crs_wkt = wkt, driver = "ESRI Shapefile",
+                        schema = _schema) as f:
+            for row in samples:
+                f.write({'properties': row,
+                            'geometry': geo.mapping(geo.Point(row['x'],
+                                                                row['y']))})
+    except:
+        log.error('Error occured while generating output.')
+        return 2
+
+    # done
+    return 0
+
+
+def shape2points(_file):
+    """ read features of a shapefile as points
+
+    Args:
+        _file (str): path to shapefile, centroids are used for non points
+
+    Returns:
+        points (list, dic): attributes of features with x and y
+
+    """
+    points = []
+    with collection(_file, 'r') as f:
+        for feature in f:
+            point = dict(feature['properties'])
+            shape = geo.shape(feature['geometry']).centroid
+            point['x'] = shape.x
+            point['y'] = shape.y
+            points.append(point)
+    return points
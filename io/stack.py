@@ -189,6 +189,196 @@ def stack2array(img, band=0, _type=np.int16):
     return array
 
 
+def stack2blocks(img, band=1, lines=cons.BLOCK_LINES, _type=np.int16,
+                    halo=0):
+    """ read stacked image block by block of lines
+
+    Args:
+        img (str): the link to the image stack file
+        band (list, int): what band to read, 0 for all bands
+        lines (int): number of lines per block
+        _type (object): numpy data type
+        halo (int): lines read above and below each block, fewer at the
+            top and bottom of the image, min(row, halo) lines are above
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): data of the block, 2D for one band, 3D otherwise
+
+    """
+    img2 = gdal.Open(img, gdal.GA_ReadOnly)
+    if type(band) == int and band == 0:
+        band = list(range(1, img2.RasterCount + 1))
+    for row in range(0, img2.RasterYSize, lines):
+        top = min(halo, row)
+        nrow = min(lines + halo, img2.RasterYSize - row) + top
+        if type(band) == int:
+            yield row, img2.GetRasterBand(band).ReadAsArray(0, row - top,
+                            img2.RasterXSize, nrow).astype(_type)
+        else:
+            array = np.zeros((nrow, img2.RasterXSize, len(band)), _type)
+            for i, x in enumerate(band):
+                array[:, :, i] = img2.GetRasterBand(x).ReadAsArray(0,
+                                    row - top, img2.RasterXSize, nrow)
+            yield row, array
+    img2 = None
+
+
+def stack2points(img, rows, cols, band=0, lines=cons.BLOCK_LINES,
+                    nodata=cons.NODATA, _type=np.int16):
+    """ read values of many pixels, each block of lines with pixels is read
+        once, from the first to the last line and sample with pixels
+
+    Args:
+        img (str): the link to the image stack file
+        rows (ndarray): line of pixels
+        cols (ndarray): sample of pixels
+        band (list, int): what band to read, 0 for all bands
+        lines (int): number of lines per block
+        nodata (int): value of pixels outside of the image
+        _type (object): numpy data type
+
+    Returns:
+        values (ndarray): values of pixels by bands
+
+    """
+    img2 = gdal.Open(img, gdal.GA_ReadOnly)
+    if type(band) == int:
+        band = list(range(1, img2.RasterCount + 1)) if band == 0 else [band]
+    rows = np.asarray(rows, np.int64)
+    cols = np.asarray(cols, np.int64)
+    values = np.zeros((len(rows), len(band)), _type) + nodata
+    inside = np.nonzero((rows >= 0) & (rows < img2.RasterYSize) &
+                        (cols >= 0) & (cols < img2.RasterXSize))[0]
+    block = rows[inside] // lines
+    for b in np.unique(block):
+        _index = inside[block == b]
+        r0, r1 = rows[_index].min(), rows[_index].max() + 1
+        c0, c1 = cols[_index].min(), cols[_index].max() + 1
+        for i, x in enumerate(band):
+            array = img2.GetRasterBand(x).ReadAsArray(int(c0), int(r0),
+                                                        int(c1 - c0),
+                                                        int(r1 - r0))
+            values[_index, i] = array[rows[_index] - r0, cols[_index] - c0]
+    img2 = None
+    return values
+
+
+def blocks2stack(blocks, geo, des, bands='NA', nodata='NA',
+                    _type=gdal.GDT_Int16, overwrite=False, driver_name='GTiff',
+                    ops=[]):
+    """ save blocks of lines as stack image
+
+    Args:
+        blocks (iterable): blocks of [row, array], as from stack2blocks
+        geo (dic): spatial reference
+        des (str): destination to save the output stack image
+        bands (list, str): description of each band, NA for no description
+        nodata (int): nodata value
+        _type (int): gdal data type
+        overwrite (bool): overwrite or not
+        driver_name (str): name of the output driver
+        ops (list, str): options for output file
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error during process
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des))
+        return 1
+
+    # write output, created on the first block to know number of bands
+    output = None
+    try:
+        for row, array in blocks:
+            if array.ndim == 2:
+                array = array[:, :, np.newaxis]
+            if output is None:
+                nband = array.shape[2]
+                _driver = gdal.GetDriverByName(driver_name)
+                output = _driver.Create(des, geo['samples'], geo['lines'],
+                                        nband, _type, options=ops)
+                output.SetProjection(geo['proj'])
+                output.SetGeoTransform(geo['geotrans'])
+                for i in range(0, nband):
+                    if not nodata == 'NA':
+                        output.GetRasterBand(i+1).SetNoDataValue(nodata)
+                    if not bands == 'NA':
+                        if type(bands) == str:
+                            bands = [bands]
+                        output.GetRasterBand(i+1).SetDescription(bands[i])
+            for i in range(0, nband):
+                output.GetRasterBand(i+1).WriteArray(array[:, :, i], 0, row)
+    except:
+        log.error('Failed to write output to {}'.format(des))
+        return 2
+    output = None
+
+    # done
+    return 0
+
+
+def blocks2files(blocks, geo, des, bands='NA', nodata='NA',
+                    _type=gdal.GDT_Int16, overwrite=False, driver_name='GTiff',
+                    ops=[]):
+    """ save each band of blocks of lines as a separate image
+
+    Args:
+        blocks (iterable): blocks of [row, array], as from stack2blocks
+        geo (dic): spatial reference
+        des (list, str): destination of each band
+        bands (list, str): description of each band, NA for no description
+        nodata (int): nodata value
+        _type (int): gdal data type
+        overwrite (bool): overwrite or not
+        driver_name (str): name of the output driver
+        ops (list, str): options for output file
+
+    Returns:
+        0: successful
+        1: output already exists
+        2: error during process
+
+    """
+    # check if output already exists
+    for x in des:
+        if (not overwrite) and os.path.isfile(x):
+            log.error('{} already exists.'.format(x))
+            return 1
+
+    # write output, one file open per band
+    outputs = []
+    try:
+        _driver = gdal.GetDriverByName(driver_name)
+        for i, x in enumerate(des):
+            output = _driver.Create(x, geo['samples'], geo['lines'], 1, _type,
+                                    options=ops)
+            output.SetProjection(geo['proj'])
+            output.SetGeoTransform(geo['geotrans'])
+            if not nodata == 'NA':
+                output.GetRasterBand(1).SetNoDataValue(nodata)
+            if not bands == 'NA':
+                output.GetRasterBand(1).SetDescription(bands[i])
+            outputs.append(output)
+        for row, array in blocks:
+            if array.ndim == 2:
+                array = array[:, :, np.newaxis]
+            for i, output in enumerate(outputs):
+                output.GetRasterBand(1).WriteArray(array[:, :, i], 0, row)
+    except:
+        log.error('Failed to write output to {}'.format(
+                    os.path.dirname(des[0])))
+        return 2
+    outputs = None
+
+    # done
+    return 0
+
+
 def stack2table(img, band=1, nodata=cons.MASK_NODATA, _type=np.int16):
     """ read stack image and convert to a table with x y pixel coordinates
 
@@ -8,7 +8,7 @@ import h5py
 
 from osgeo import gdal
 
-from ..common import log, enlarge
+from ..common import log, enlarge, metrics_start, metrics_stop
 from ..common import constants as cons
 
 
@@ -43,6 +43,7 @@ def viirs2gtif(img, des, overwrite=False, verbose=False):
         # read input image
         if verbose:
             log.info('Reading input: {}'.format(img))
+        _m = metrics_start('VIIRS', 'read', img)
         try:
             vs_img = gdal.Open(img, gdal.GA_ReadOnly)
             vs_sub = vs_img.GetSubDatasets()
@@ -77,20 +78,24 @@ def viirs2gtif(img, des, overwrite=False, verbose=False):
             _error = 2
             log.error('Failed to read data from {}'.format(img))
             break
+        metrics_stop(_m, os.path.getsize(img), red.size)
 
         # calculate NDVI
         if verbose:
             log.info('Calculating NDVI...')
+        _m = metrics_start('VIIRS', 'ndvi')
         try:
             ndvi = ((nir-red) / (nir+red) * cons.SCALE_FACTOR).astype(np.int16)
         except:
             _error = 3
             log.error('Failed to calculate NDVI.')
             break
+        metrics_stop(_m, 0, ndvi.size)
 
         # generate mask band
         if verbose:
             log.info('Generating mask band...')
+        _m = metrics_start('VIIRS', 'mask')
         try:
             mask = enlarge(viirsQA(vs_img), 2)
             _total = np.sum(mask)
@@ -102,6 +107,7 @@ def viirs2gtif(img, des, overwrite=False, verbose=False):
             _error = 3
             log.error('Failed to generate mask band.')
             break
+        metrics_stop(_m, 0, mask.size)
 
         # clean up data
         # if verbose:
@@ -121,6 +127,7 @@ def viirs2gtif(img, des, overwrite=False, verbose=False):
         # write output
         if verbose:
             log.info('Writing output: {}'.format(des))
+        _m = metrics_start('VIIRS', 'write', des)
         try:
             # initialize output
             _driver = gdal.GetDriverByName('GTiff')
@@ -165,6 +172,7 @@ def viirs2gtif(img, des, overwrite=False, verbose=False):
 
     # done
     if _error == 0:
+        metrics_stop(_m, os.path.getsize(des), red.size)
         if verbose:
             log.info('Process completed.')
     return _error
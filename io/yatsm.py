@@ -1,8 +1,19 @@
 """ Module for IO of YATSM files
+
+    Blended land cover files (yatsm_lc_r*.npz) are saved in a CSR layout:
+    record holds all records of the line sorted by pixel, pixel the pixels
+    that have records, and offset where records of each pixel start in
+    record, with one extra offset at the end. Arrays are stored uncompressed
+    so a pixel can be read through a memory map without loading the line.
 """
+import os
+import re
+import struct
+import zipfile
 import numpy as np
 
-from ..common import log, show_progress, ts2map, ts2class, ts2doc, ts2dod
+from ..common import (log, get_files, show_progress, ts2map, ts2class, ts2doc,
+                        ts2dod)
 from ..common import constants as cons
 
 
@@ -22,7 +33,13 @@ def yatsm2records(_file, verbose=False):
     if 'record' in ks:
         records = yatsm['record']
     else:
-        records = yatsm[ks[0]]
+        try:
+            records = yatsm[list(ks)[0]]
+        except ValueError:
+            # older blended files saved a list of pixels
+            records = np.load(_file, allow_pickle=True)[list(ks)[0]]
+    if records.dtype == object or records.ndim > 1:
+        records = np.concatenate(list(records))
     n = len(records)
     if verbose:
         log.info('Total number of records: {}'.format(n))
@@ -53,6 +70,185 @@ def yatsm2pixels(_file, x=[], verbose=False):
     return pixels
 
 
+def records2csr(records):
+    """ index records sorted by pixel
+
+    Args:
+        records (ndarray): records sorted by pixel
+
+    Returns:
+        pixel (ndarray): pixels that have records
+        offset (ndarray): start of records of each pixel, plus the end
+
+    """
+    pixel, offset = np.unique(records['px'], return_index=True)
+    return pixel, np.append(offset, len(records)).astype(np.int64)
+
+
+def records2npz(records, des):
+    """ save records of a line in CSR layout
+
+    Args:
+        records (ndarray): records of a line
+        des (str): path to output
+
+    Returns:
+        n (int): number of pixels
+
+    """
+    records = records[np.argsort(records['px'], kind='mergesort')]
+    pixel, offset = records2csr(records)
+    np.savez(des, record=records, pixel=pixel, offset=offset)
+    return len(pixel)
+
+
+def npz2memmap(_file, key):
+    """ memory map an array in an uncompressed npz file
+
+    Args:
+        _file (str): path to npz file
+        key (str): name of the array
+
+    Returns:
+        array (ndarray): read only memory map, or the array if it cannot be
+            mapped
+
+    """
+    with zipfile.ZipFile(_file) as z:
+        info = z.getinfo('{}.npy'.format(key))
+    if info.compress_type != zipfile.ZIP_STORED:
+        return np.load(_file)[key]
+    with open(_file, 'rb') as f:
+        # skip local file header to the npy header
+        f.seek(info.header_offset + 26)
+        name, extra = struct.unpack('<HH', f.read(4))
+        f.seek(name + extra, 1)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        return np.load(_file, allow_pickle=True)[key]
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype)
+    return np.memmap(_file, dtype, 'r', offset, shape,
+                        'F' if fortran else 'C')
+
+
+def npz2pixels(_file, x=[]):
+    """ read records of pixels from a line file in CSR layout
+
+    Args:
+        _file (str): path to npz file
+        x (list/int): which pixels to grab, [] for all
+
+    Returns:
+        pixels (list, ndarray): records of selected pixels
+
+    """
+    if type(x) == int:
+        x = [x]
+    with np.load(_file) as npz:
+        csr = 'offset' in npz.files
+    if csr:
+        pixel = np.array(npz2memmap(_file, 'pixel'))
+        offset = np.array(npz2memmap(_file, 'offset'))
+        records = npz2memmap(_file, 'record')
+    else:
+        records = yatsm2records(_file)
+        records = records[np.argsort(records['px'], kind='mergesort')]
+        pixel, offset = records2csr(records)
+    if len(x) == 0:
+        idx = np.arange(len(pixel))
+    else:
+        idx = np.searchsorted(pixel, x)
+        idx = idx[idx < len(pixel)]
+        idx = idx[np.isin(pixel[idx], x)]
+    return [np.array(records[offset[i]:offset[i + 1]]) for i in idx]
+
+
+def npz2csr(_file, des, overwrite=False):
+    """ convert a line file to CSR layout
+
+    Args:
+        _file (str): path to input npz file, old or CSR layout
+        des (str): path to output, can be the input itself
+        overwrite (bool): overwrite or not
+
+    Returns:
+        0: successful
+        1: output already exists
+
+    """
+    if os.path.isfile(des) and not overwrite and (os.path.abspath(des) !=
+                                                    os.path.abspath(_file)):
+        return 1
+    records = yatsm2records(_file)
+    # write aside and move in place in case input is replaced
+    tmp = '{}.tmp.npz'.format(os.path.splitext(des)[0])
+    records2npz(records, tmp)
+    os.rename(tmp, des)
+    return 0
+
+
+def cache_lines(_dir):
+    """ locate YATSM line caches
+
+    Args:
+        _dir (str): folder of line caches, yatsm*r<line>_*npz
+
+    Returns:
+        caches (dic): path to cache of each line
+
+    """
+    caches = {}
+    for x in get_files(_dir, 'yatsm*r*_*npz'):
+        line = re.search(r'r(\d+)_', x[1])
+        if line:
+            caches.setdefault(int(line.group(1)), os.path.join(x[0], x[1]))
+    return caches
+
+
+def cache2points(_dir, rows, cols, nodata=cons.NODATA):
+    """ read time series of many pixels from YATSM cache lines, each line
+        cache with pixels is loaded once
+
+    Args:
+        _dir (str): folder of line caches, yatsm*r<line>_*npz
+        rows (ndarray): line of pixels
+        cols (ndarray): sample of pixels
+        nodata (int): value of pixels with no cache
+
+    Returns:
+        values (ndarray): time series of pixels, by pixel, band and image
+        images (ndarray): image IDs of the caches, NA if not in the caches
+
+    """
+    rows = np.asarray(rows, np.int64)
+    cols = np.asarray(cols, np.int64)
+    caches = cache_lines(_dir)
+    values = 'NA'
+    images = 'NA'
+    for line in np.unique(rows):
+        if line not in caches:
+            continue
+        _index = np.nonzero(rows == line)[0]
+        with np.load(caches[line]) as cache:
+            Y = cache['Y']
+            if type(values) == str:
+                values = np.zeros((len(rows), Y.shape[0], Y.shape[1]),
+                                    Y.dtype) + nodata
+                if 'image_IDs' in cache.files:
+                    images = cache['image_IDs']
+        inside = _index[(cols[_index] >= 0) & (cols[_index] < Y.shape[2])]
+        values[inside] = np.moveaxis(Y[:, :, cols[inside]], 2, 0)
+    if type(values) == str:
+        values = np.zeros((len(rows), 0, 0), np.int16) + nodata
+    return values, images
+
+
 def yatsm2map(_file, _type, samples, option=[0], verbose=False):
     """ calculate map results form cache file
 
@@ -76,6 +272,7 @@ def yatsm2map(_file, _type, samples, option=[0], verbose=False):
     if verbose:
         log.info('Reading in YATSM result file...')
     records = yatsm2records(_file, True)
+    n = len(records)
 
     # record by record processing
     if verbose:
@@ -126,6 +323,7 @@ def cache2map(_file, _type, samples, verbose=False):
     if verbose:
         log.info('Reading in cache file...')
     records = yatsm2records(_file, True)
+    n = len(records)
 
     # record by record processing
     if verbose:
@@ -2,8 +2,13 @@
 
     Args:
         -s (strata): strata value
-        -d (dilations): dilation
+        -d (dilations): outer distance of each buffer ring
+        -m (metric): distance metric, euclidean, chessboard or taxicab
+        -v (value): value of first ring, NA for max of image plus one
+        -n (processes): number of processes running tiles
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -17,20 +22,51 @@ import numpy as np
 
 from osgeo import gdal
 
-from ...io import stackGeo, array2stack, stack2array
-from ...common import log, get_files, dilate
+from ...io import stackGeo, stack2blocks, focal2stack
+from ...common import log, distance_rings, profile_args, profile_start
 from ...common import constants as cons
 
 
-def post_stratification(ori, des, strata=[1], dilation=1, overwrite=False):
-    """ select sample from images
+def stratify_tile(array, strata, rings, metric, value, nodata):
+    """ buffer strata of a tile by rings of distance
+
+    Args:
+        array (ndarray): tile of input image
+        strata (list): strata values to post stratify
+        rings (list): outer distance of each ring in pixels, ascending
+        metric (str): euclidean, chessboard or taxicab
+        value (int): value of first ring
+        nodata (int): nodata value
+
+    Returns:
+        array (ndarray): post-stratified tile
+
+    """
+    ring = distance_rings(np.isin(array, strata), rings, metric)
+    ring[array == nodata] = 0
+    array[ring > 0] = ring[ring > 0] + value - 1
+    return array
+
+
+def post_stratification(ori, des, strata=[1], dilation=1, metric='taxicab',
+                        value='NA', overwrite=False,
+                        workers=cons.TILE_WORKERS):
+    """ buffer strata by rings of distance as new strata, from one distance
+        transform per tile, with tiles read with a halo as deep as the outer
+        ring
 
     Args:
         ori (str): input image
         des (str): output image
         strata (int/list): strata values to post stratify
-        dilation (int/list): how many pixel to dilate
+        dilation (int/list): outer distance of each ring in pixels, one
+            stratum per ring
+        metric (str): euclidean, chessboard or taxicab, taxicab matches
+            repeated dilation
+        value (int): value of first ring, next rings follow, NA for max of
+            image plus one
         overwrite (bool): overwrite or not
+        workers (int): number of processes running tiles
 
     Returns:
         0: successful
@@ -50,42 +86,49 @@ def post_stratification(ori, des, strata=[1], dilation=1, overwrite=False):
     log.info('Reading input image...')
     try:
         geo = stackGeo(ori)
-        array = stack2array(ori, 1)
-        total = (array != geo['nodata']).sum()
+        nodata = geo['nodata']
+        if type(strata) == int:
+            strata = [strata]
+        rings = sorted([dilation] if type(dilation) == int else dilation)
+        halo = int(np.ceil(rings[-1]))
     except:
         log.error('Failed to read {}'.format(os.path.basename(ori)))
         return 2
 
-    # pre-process
+    # pre-process, value of rings needs the max of image
     log.info('Preprocessing input data...')
     try:
-        array2 = np.zeros(array.shape, array.dtype)
-        for i in strata:
-            array2[array == i] = 1
+        if value == 'NA':
+            value = 0
+            for row, array in stack2blocks(ori, 1):
+                value = max(value, array[array != nodata].max(initial=0))
+            value = int(value) + 1
     except:
         log.error('Failed to preprocess.')
         return 3
+    log.info('Ring values: {}'.format(list(range(value, value + len(rings)))))
 
-    # post-stratify
+    # post-stratify and write output tile by tile
     log.info('Post-stratifying...')
-    try:
-        array3 = np.copy(array2)
-        for i in range(0,dilation):
-            array3 = dilate(array3)
-            change = ((array3 > array2) & (array != geo['nodata'])).sum()
-            log.info('Dilation: {}'.format(i + 1))
-            log.info('Percentage: {:.1f}%'.format(change / total * 100))
-    except:
-        log.error('Failed to post-stratify.')
+    if focal2stack(stratify_tile, ori, des, geo, halo, (strata, rings, metric,
+                    value, nodata), ['Post-stratified Layer'], cons.NODATA,
+                    gdal.GDT_Int16, np.int16, overwrite, workers) > 0:
+        log.error('Failed to post-stratify to {}'.format(des))
         return 4
 
-    # write output
-    log.info('Writing output...')
-    array[(array3 > array2) & (array != geo['nodata'])] = array.max() + 1
-    if array2stack(array, geo, des, ['Post-stratified Layer'], cons.NODATA,
-                    gdal.GDT_Int16, overwrite) > 0:
-        log.error('Failed to write output to {}'.format(des))
-        return 5
+    # percentage of each ring
+    try:
+        count = np.zeros(len(rings), np.int64)
+        total = 0
+        for x, y in zip(stack2blocks(ori, 1), stack2blocks(des, 1)):
+            total += np.count_nonzero(x[1] != nodata)
+            count += np.bincount(y[1][y[1] != x[1]] - value,
+                                    minlength=len(rings))[:len(rings)]
+        for i, r in enumerate(rings):
+            log.info('Ring {} to {} pixels: {:.1f}%'.format(i + 1, r,
+                        count[i] / max(total, 1) * 100))
+    except:
+        log.warning('Failed to count post-stratified pixels.')
 
     # done
     log.info('Process completed.')
@@ -97,25 +140,38 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-s', '--strata', action='store', type=int, nargs='+',
                         dest='strata', default=1, help='strata')
-    parser.add_argument('-d', '--dilation', action='store', type=int,
-                        dest='dilation', default=1, help='dilation')
+    parser.add_argument('-d', '--dilation', action='store', type=float,
+                        nargs='+', dest='dilation', default=[1],
+                        help='outer distance of each ring')
+    parser.add_argument('-m', '--metric', action='store', type=str,
+                        dest='metric', default='taxicab',
+                        choices=['euclidean', 'chessboard', 'taxicab'],
+                        help='distance metric')
+    parser.add_argument('-v', '--value', action='store', type=int,
+                        dest='value', default='NA', help='first ring value')
+    parser.add_argument('-n', '--processes', action='store', type=int,
+                        dest='processes', default=cons.TILE_WORKERS,
+                        help='number of processes running tiles')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start post-stratifying...')
     log.info('Input image: {}'.format(args.ori))
     log.info('Saving as {}'.format(args.des))
     log.info('Strata value: {}'.format(args.strata))
-    log.info('Dilation: {}'.format(args.dilation))
+    log.info('Rings: {} {}'.format(args.dilation, args.metric))
     if type(args.strata) == int:
         args.strata = [args.strata]
     if args.overwrite:
         log.info('Overwriting existing image.')
 
     # run function to post-stratify
-    post_stratification(args.ori, args.des, args.strata, args.dilation,
-                        args.overwrite)
+    sys.exit(post_stratification(args.ori, args.des, args.strata,
+                                    args.dilation, args.metric, args.value,
+                                    args.overwrite, args.processes))
@@ -3,8 +3,12 @@
     Args:
         -p (pattern): searching pattern
         -s (strata): strata value
+        --seed: random seed
+        --raster: also write sample images
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         n: number of samples
         ori: origin
         des: destination
@@ -17,15 +21,23 @@ import numpy as np
 
 from osgeo import gdal
 
-from ...io import stack2table, stackGeo, array2stack
-from ...common import log, get_files, select_samples
+from ...io import (stackGeo, stack2blocks, blocks2stack, list2csv,
+                    samples2shape)
+from ...common import (log, get_files, select_index, pixel2map, profile_args,
+                        profile_start)
 from ...common import constants as cons
 
 
-def sample_from_images(pattern, n, ori, des, strata=0,
-                        overwrite=False, recursive=True):
+def sample_from_images(pattern, n, ori, des, strata=0, overwrite=False,
+                        recursive=True, seed='NA', raster=False):
     """ select sample from images
 
+    Images are read twice block by block, first to count the population of
+    each stratum, then to locate the selected samples, so memory does not
+    grow with the number or size of images. Samples are saved as a csv
+    table and a point shapefile with pixel center coordinates, sample
+    images of the size of the inputs are only written if asked for.
+
     Args:
         pattern (str): searching pattern, e.g. *strata*tif
         n (int/list): number of sample to select, use list for n in each strata
@@ -34,6 +46,8 @@ def sample_from_images(pattern, n, ori, des, strata=0,
         strata(int, list): stratas, 0 for no strata
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
+        seed (int): random seed, NA for not seeded
+        raster (bool): also write a sample image for each input image
 
     Returns:
         0: successful
@@ -69,79 +83,152 @@ def sample_from_images(pattern, n, ori, des, strata=0,
         else:
             log.info('Found {} files.'.format(nImg))
 
-    # compile inputs
-    log.info('Start compiling input images...')
-    count = 0
-    population = np.empty((0,4), np.int16)
+    # strata and number of samples of each
+    if strata == 0:
+        strata = ['NA']
+    elif type(strata) != list:
+        strata = [strata]
+    if type(n) == int:
+        n = [n] * len(strata)
+
+    # count population of each stratum
+    log.info('Start counting population...')
+    population = np.zeros((nImg, len(strata)), np.int64)
     for i, img in enumerate(img_list):
         log.info('Reading {}'.format(img[1]))
         try:
-            table = stack2table(os.path.join(img[0], img[1]))
-            imageID = np.zeros((table.shape[0], 1), np.int16) + i
-            table = np.append(imageID, table, axis=1)
-            population = np.append(population, table, axis=0)
-            count += 1
+            for row, block in stack2blocks(os.path.join(img[0], img[1])):
+                for j, stratum in enumerate(strata):
+                    population[i, j] += stratum_mask(block, stratum).sum()
         except:
             log.error('Failed to read input image {}'.format(img[1]))
             return 4
-    log.info('Successfully read data from {}/{} images.'.format(count,nImg))
+    log.info('Successfully read data from {}/{} images.'.format(nImg, nImg))
 
-    # select samples
+    # select samples, sample id goes by stratum then order of drawing
     log.info('Selecting samples...')
     try:
-        if strata == 0:
-            samples = select_samples(population, n)
-        else:
-            if type(strata) != list:
-                strata = [strata]
-            samples = np.empty((0,4), np.int16)
-            for i in range(0, len(strata)):
-                if type(n) == int:
-                    n2 = n
-                else:
-                    n2 = n[i]
-                subpopulation = population[population[:, 3] == strata[i], :]
-                if subpopulation.shape[0] < n2:
-                    log.warning('Population too small {}/{}'.format(
-                                subpopulation.shape[0], n2))
-                    continue
-                subsample = select_samples(subpopulation, n2)
-                samples = np.append(samples, subsample, axis=0)
-        sampleID = np.reshape(np.arange(samples.shape[0], dtype=np.int16),
-                                (samples.shape[0], 1))
-        samples = np.append(sampleID, samples, axis=1)
+        rs = np.random.RandomState(None if seed == 'NA' else seed)
+        selected = []
+        nsample = 0
+        for j in range(0, len(strata)):
+            total = population[:, j].sum()
+            if total < n[j]:
+                log.warning('Population too small {}/{}'.format(total, n[j]))
+                selected.append([np.empty(0, np.int64), np.empty(0, np.int64)])
+                continue
+            draw = select_index(total, n[j], rs)
+            order = np.argsort(draw)
+            selected.append([draw[order], order + nsample])
+            nsample += n[j]
     except:
         log.error('Failed to select samples.')
         return 5
+    log.info('Selected {} samples.'.format(nsample))
 
-    # write output
-    log.info('Exporting selected samples...')
+    # locate samples, and write sample images if asked for
+    log.info('Locating selected samples...')
     count = 0
+    seen = np.zeros(len(strata), np.int64)
+    located = []
+    if nsample > np.iinfo(np.int16).max:
+        _type = [np.int32, gdal.GDT_Int32]
+    else:
+        _type = [np.int16, gdal.GDT_Int16]
     for i, img in enumerate(img_list):
-        log.info('Exporting {}'.format(os.path.splitext(img[1])[0]))
-        geo = stackGeo(os.path.join(img[0], img[1]))
-        array = np.zeros((geo['lines'], geo['samples']),
-                            np.int16) + cons.NODATA
-        subsample = samples[samples[:, 1] == i, :]
-        log.info('Total number of samples {}.'.format(subsample.shape[0]))
-        for j in range(0, subsample.shape[0]):
-            array[subsample[j, 2], subsample[j, 3]] = subsample[j, 0]
-        if array2stack(array, geo, os.path.join(des,
-                        '{}_sample.tif'.format(os.path.splitext(img[1])[0])),
-                        ['samples'], cons.NODATA, gdal.GDT_Int16,
-                        overwrite) == 0:
-            count += 1
-        else:
+        log.info('Processing {}'.format(os.path.splitext(img[1])[0]))
+        found = []
+
+        def _blocks():
+            for row, block in stack2blocks(os.path.join(img[0], img[1])):
+                array = np.zeros(block.shape, _type[0]) + cons.NODATA
+                for j, stratum in enumerate(strata):
+                    member = stratum_mask(block, stratum)
+                    _n = member.sum()
+                    index, sid = selected[j]
+                    lo, hi = np.searchsorted(index, [seen[j], seen[j] + _n])
+                    if hi > lo:
+                        pos = np.flatnonzero(member)[index[lo:hi] - seen[j]]
+                        array.flat[pos] = sid[lo:hi]
+                        found.append([sid[lo:hi], pos // block.shape[1] + row,
+                                        pos % block.shape[1], block.flat[pos]])
+                    seen[j] += _n
+                yield row, array
+
+        try:
+            geo = stackGeo(os.path.join(img[0], img[1]))
+            if raster:
+                if blocks2stack(_blocks(), geo, os.path.join(des,
+                                '{}_sample.tif'.format(os.path.splitext(
+                                img[1])[0])), ['samples'], cons.NODATA,
+                                _type[1], overwrite) > 0:
+                    raise RuntimeError
+            else:
+                for row, array in _blocks():
+                    pass
+        except:
             log.error('Failed to export {}'.format(os.path.splitext(img[1])[0]))
             return 6
-    log.info('Successfully exported {}/{} images.'.format(count,nImg))
+        if len(found) > 0:
+            sid, row, col, value = [np.concatenate(x) for x in zip(*found)]
+            x, y = pixel2map(geo['geotrans'], row, col)
+            for k in range(0, len(sid)):
+                located.append({'id': int(sid[k]), 'image': img[1],
+                                'row': int(row[k]), 'col': int(col[k]),
+                                'x': float(x[k]), 'y': float(y[k]),
+                                'stratum': int(value[k]),
+                                'proj': geo['proj']})
+        log.info('Total number of samples {}.'.format(sum([len(x[0]) for x
+                    in found])))
+        count += 1
+    located = sorted(located, key=lambda x: x['id'])
+    log.info('Located samples in {}/{} images.'.format(count, nImg))
+
+    # write samples as table and points
+    log.info('Exporting selected samples...')
+    fields = ['id', 'image', 'row', 'col', 'x', 'y', 'stratum']
+    if list2csv([fields] + [[x[k] for k in fields] for x in located],
+                os.path.join(des, 'samples.csv'), overwrite) > 0:
+        return 6
+
+    # one layer if all images share a projection, or one per image
+    if len(set([x['proj'] for x in located])) <= 1:
+        groups = [['samples.shp', located]]
+    else:
+        groups = [['{}_sample.shp'.format(os.path.splitext(img[1])[0]),
+                    [x for x in located if x['image'] == img[1]]]
+                    for img in img_list]
+    for name, group in groups:
+        if len(group) > 0:
+            if samples2shape([dict([(k, x[k]) for k in fields]) for x in
+                                group], os.path.join(des, name),
+                                group[0]['proj'], overwrite) > 0:
+                return 6
 
     # done
     log.info('Process completed.')
-    log.info('Successfully exported {}/{} image of samples.'.format(count,nImg))
+    log.info('Successfully exported {} samples from {}/{} images.'.format(
+                len(located), count, nImg))
     return 0
 
 
+def stratum_mask(array, stratum, nodata=cons.MASK_NODATA):
+    """ find pixels of a stratum
+
+    Args:
+        array (ndarray): strata image
+        stratum (int): stratum value, NA for any valid pixel
+        nodata (int): nodata value
+
+    Returns:
+        mask (ndarray): pixels in the stratum
+
+    """
+    if stratum == 'NA':
+        return array != nodata
+    return (array == stratum) & (array != nodata)
+
+
 if __name__ == '__main__':
     # parse options
     parser = argparse.ArgumentParser()
@@ -150,6 +237,10 @@ if __name__ == '__main__':
                         help='searching pattern')
     parser.add_argument('-s', '--strata', action='store', type=int, nargs='+',
                         dest='strata', default=0, help='strata')
+    parser.add_argument('--seed', action='store', type=int, dest='seed',
+                        default='NA', help='random seed')
+    parser.add_argument('--raster', action='store_true',
+                        help='also write sample images')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
@@ -158,7 +249,9 @@ if __name__ == '__main__':
                         help='n samples')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if args.strata == 0:
@@ -182,6 +275,10 @@ if __name__ == '__main__':
     log.info('Select {} samples.'.format(args.n))
     if args.strata != 0:
         log.info('Use stratas: {}'.format(args.strata))
+    if args.seed != 'NA':
+        log.info('Random seed: {}'.format(args.seed))
+    if args.raster:
+        log.info('Writing sample images.')
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -189,4 +286,5 @@ if __name__ == '__main__':
 
     # run function to select samples
     sample_from_images(args.pattern, args.n, args.ori, args.des, args.strata,
-                        args.overwrite, args.recursive)
+                        args.overwrite, args.recursive, args.seed,
+                        args.raster)
@@ -3,8 +3,12 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         lc: stacked MODIS land cover map
         des: destination
@@ -16,13 +20,14 @@ import argparse
 
 import numpy as np
 
-from ...common import (log, get_files, manage_batch, enlarge, get_int,
-                        ordinal_to_doy, ndarray_append, split_doy)
-from ...io import stackGeo, stack2array, yatsm2pixels
+from ...common import (log, get_files, manage_batch, queue_works, get_int,
+                        ndarray_append, split_doy, ordinal_to_doy,
+                        profile_args, profile_start)
+from ...io import stackGeo, stack2array, yatsm2records, records2npz
 
 
 def blend_lc(pattern, ori, lc, des, overwrite=False, recursive=False,
-                batch=[1,1]):
+                batch=[1,1], cost='NA', queue='NA'):
     """ blend MODIS land cover product with YATSM results
 
     Args:
@@ -33,6 +38,8 @@ def blend_lc(pattern, ori, lc, des, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -82,31 +89,35 @@ def blend_lc(pattern, ori, lc, des, overwrite=False, recursive=False,
         return 4
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        yatsm_list, done = queue_works(yatsm_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        yatsm_list = manage_batch(yatsm_list, batch[0], batch[1])
+        yatsm_list = manage_batch(yatsm_list, batch[0], batch[1], cost)
         n = len(yatsm_list)
         log.info('{} files to be processed by this job.'.format(n))
 
     # loop through all files
     count = 0
-    py, px = (-1, -1)
+    py = -1
     log.info('Start blending pixels...')
     for yatsm in yatsm_list:
         try:
-            blended = []
             py = get_int(yatsm[1])[0]
             log.info('Processing line {}'.format(py))
-            pixels = yatsm2pixels(os.path.join(yatsm[0], yatsm[1]))
-            for pixel in pixels:
-                px = pixel[0]['px']
-                blended.append(fuse_lc(ndarray_append(pixel[['px', 'py',
-                                'start', 'end', 'break']], [('class', '<u2')]),
-                                lc_stack[py, px, :]))
-            np.savez(os.path.join(des, 'yatsm_lc_r{}.npz'.format(py)), blended)
+            records = yatsm2records(os.path.join(yatsm[0], yatsm[1]))
+            blended = fuse_lc(ndarray_append(records[['px', 'py', 'start',
+                                'end', 'break']], [('class', '<u2')]),
+                                lc_stack[py])
+            records2npz(blended, os.path.join(des,
+                        'yatsm_lc_r{}.npz'.format(py)))
             count += 1
+            if done != 'NA':
+                done(yatsm)
         except:
-            log.warning('Failed to process line {} pixel {}.'.format(py, px))
+            log.warning('Failed to process line {}.'.format(py))
             continue
 
     # done
@@ -115,64 +126,60 @@ def blend_lc(pattern, ori, lc, des, overwrite=False, recursive=False,
     return 0
 
 
-def fuse_lc(pixel, modis, modis_year=[2001, 2016]):
-    """ blend MODIS land cover product with YATSM results on pixel level
+def fuse_lc(records, modis, modis_year=[2001, 2016]):
+    """ blend MODIS land cover product with YATSM results of a line
 
-    Args:
-        pixel (list, ndarray): YATSM records of a pixel
-        modis (list, int): MODIS land cover classes of a pixel
-        modis_year (list, int): start and end year of MODIS land cover
-
-    Returns:
-        pixel (list, ndarray): pixel with land cover appended
-
-    """
-    for i, x in enumerate(pixel):
-        _start = split_doy(ordinal_to_doy(x['start']))
-        _end = split_doy(ordinal_to_doy(x['end']))
-        _class = []
-        _weight = []
-        for y in range(_start[0], _end[0] + 1):
-            if y in range(modis_year[0], modis_year[1] + 1):
-                _class.append(modis[y - modis_year[0]])
-            else:
-                _class.append(-9999)
-            nday = 365
-            if y == _start[0]:
-                nday -= _start[1]
-            if y == _end[0]:
-                nday -= 365 - _end[1]
-            if nday >= 270:
-                _weight.append(100)
-            elif nday < 90:
-                _weight.append(1)
-            else:
-                _weight.append(51)
-        pixel[i]['class'] = get_class(_class, _weight)
-    return pixel
-
-
-def get_class(_class, _weight):
-    """ figure our class of time segment based on annual class and weight
+    Each segment gets the class with the highest total weight over the years
+    it covers, a year weighs 100 if the segment covers 270 days or more of
+    it, 1 if less than 90 days, and 51 otherwise. Ties go to the class seen
+    first.
 
     Args:
-        _class (list, int): annual class
-        _weight (list, int): weight of annual class
+        records (ndarray): YATSM records of a line with a class field
+        modis (ndarray): MODIS land cover classes of the line, [sample, year]
+        modis_year (list, int): start and end year of MODIS land cover
 
     Returns:
-        class2 (int): class of the segment
+        records (ndarray): records with land cover filled in
 
     """
-    c_class = []
-    c_weight = []
-    for i, x in enumerate(_class):
-        if x not in c_class:
-            c_class.append(x)
-            c_weight.append(_weight[i])
-        else:
-            c_weight[c_class.index(x)] += _weight[i]
-    class2 = c_class[np.argmax(c_weight)]
-    return class2
+    if len(records) == 0:
+        return records
+    _start = split_doy(ordinal_to_doy(records['start']))
+    _end = split_doy(ordinal_to_doy(records['end']))
+
+    # every year covered by any segment of the line, [segment, year]
+    years = np.arange(_start[0].min(), _end[0].max() + 1)
+    y = years[np.newaxis, :]
+    sy = _start[0][:, np.newaxis]
+    ey = _end[0][:, np.newaxis]
+    inside = (y >= sy) & (y <= ey)
+
+    # days of each year covered by each segment and their weights
+    nday = (365 - np.where(y == sy, _start[1][:, np.newaxis], 0) -
+            np.where(y == ey, 365 - _end[1][:, np.newaxis], 0))
+    weight = np.where(nday >= 270, 100, np.where(nday < 90, 1, 51))
+    weight[~inside] = 0
+
+    # MODIS class of each year, -9999 out of MODIS years
+    _class = modis[records['px'].astype(int)][:, np.clip(years - modis_year[0],
+                    0, modis_year[1] - modis_year[0])].astype(int)
+    _class[:, (years < modis_year[0]) | (years > modis_year[1])] = -9999
+
+    # total weight of each class of each segment, ties to the first class
+    classes, idx = np.unique(_class, return_inverse=True)
+    idx = idx.reshape(_class.shape)
+    n, nc = len(records), len(classes)
+    rows = np.repeat(np.arange(n), len(years))
+    total = np.bincount(rows * nc + idx.ravel(), weight.ravel(), n * nc)
+    first = np.zeros((n, nc), int) + len(years)
+    for i in range(len(years) - 1, -1, -1):
+        _in = inside[:, i]
+        first[np.arange(n)[_in], idx[_in, i]] = i
+    score = total.reshape(n, nc) * (len(years) + 1) - first
+    records['class'] = classes[score.argmax(axis=1)].astype(
+                        records.dtype['class'])
+    return records
 
 
 if __name__ == '__main__':
@@ -184,6 +191,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
@@ -191,7 +202,9 @@ if __name__ == '__main__':
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('lc', default='./', help='stacked MODIS land cover')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -205,6 +218,10 @@ if __name__ == '__main__':
     log.info('In {}'.format(args.ori))
     log.info('Stacked MODIS land cover product from {}'.format(args.lc))
     log.info('Saving in {}'.format(args.des))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -212,4 +229,4 @@ if __name__ == '__main__':
 
     # run function to blend MODIS land cover product with YATSM results
     blend_lc(args.pattern, args.ori, args.lc, args.des, args.overwrite,
-                args.recursive, args.batch)
+                args.recursive, args.batch, args.cost, args.queue)
@@ -4,6 +4,8 @@
         -l (lc): modis land cover map, to fill in blank pixels
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
         img: an example image to get the spatial reference
@@ -15,8 +17,8 @@ import numpy as np
 
 from osgeo import gdal
 
-from ...common import (log, get_files, show_progress, split_doy, ordinal_to_doy,
-                        doy_to_ordinal)
+from ...common import (log, get_files, show_progress, get_int, split_doy,
+                        ordinal_to_doy, profile_args, profile_start)
 from ...common import constants as cons
 from ...io import stackGeo, array2stack, yatsm2records, stack2array
 
@@ -65,24 +67,25 @@ def get_blend(ori, des, img, lc='NA', overwrite=False, recursive=False):
 
     # initialize output
     log.info('Initializing output...')
-    result = np.zeros((geo['lines'], geo['samples'], 16), np.int8) + 255
+    result = np.zeros((geo['lines'], geo['samples'], 16), np.uint8) + 255
     count = 0
 
+    # locate line files
+    blend_list = dict([(get_int(x[1])[-1], os.path.join(x[0], x[1])) for x in
+                        get_files(ori, 'yatsm_lc_r*.npz', recursive)])
+
     # generate results
     log.info('Start generating map...')
     for i in range(0, geo['lines']):
         try:
-            # locate line cache file
-            yatsm = get_files(ori, 'yatsm_lc_r{}.npz'.format(i), recursive)
             # read line cache
-            if len(yatsm) > 0:
-                _line = yatsm2records(os.path.join(yatsm[0][0], yatsm[0][1]))
-                for j in range(0, len(_line)):
-                    px = _line[j]['px'][0]
-                    result[i, px, :] = blend2map(_line[j])
-                for j in range(0, geo['samples']):
-                    if sum(result[i, j, :] == 255) == 16:
-                        result[i, j, :] = np.bincount(lc_stack[i,j,:]).argmax()
+            if i in blend_list:
+                _line = yatsm2records(blend_list[i])
+                if lc != 'NA':
+                    result[i, :, :] = blend2line(_line, geo['samples'],
+                                                    lc_stack[i, :, :])
+                else:
+                    result[i, :, :] = blend2line(_line, geo['samples'])
                 count += 1
             else:
                 log.warning('Found no blended file for line {}'.format(i + 1))
@@ -113,24 +116,85 @@ def get_blend(ori, des, img, lc='NA', overwrite=False, recursive=False):
 
 
 def blend2map(ts):
-    map = np.zeros(2016 - 2001 + 1, np.int8) + 254
-    if ordinal_to_doy(ts[0]['start']) > 2001270:
-        ts = np.append(ts[0], ts)
-        ts[0]['start'] = doy_to_ordinal(2001001)
-        ts[0]['end'] = ts[1]['start']
-    if ordinal_to_doy(ts[-1]['end']) < 2016001:
-        ts = np.append(ts, ts[0])
-        ts[-1]['start'] = ts[-2]['end']
-        ts[-1]['end'] = doy_to_ordinal(2016365)
-    for x in ts:
-        _start = list(split_doy(ordinal_to_doy(x['start'])))
-        _end = list(split_doy(ordinal_to_doy(x['end'])))
-        if _start[1] > 270:
-            _start[0] += 1
-        for y in range(_start[0], _end[0] + 1):
-            if y in range(2001, 2017):
-                map[y - 2001] = x['class']
-    return map
+    """ annual land cover of a pixel from its blended segments
+
+    Args:
+        ts (ndarray): blended records of a pixel
+
+    Returns:
+        map (ndarray): class of each year, 254 for unclassified years
+
+    """
+    return blend2line(ts, int(ts[0]['px']) + 1)[-1]
+
+
+def blend2line(records, samples, lc='NA', years=[2001, 2016]):
+    """ annual land cover of a line from its blended segments
+
+    Segments of each pixel fill the years they cover, later segments over
+    earlier ones, where a segment starting after day 270 starts the next
+    year. Pixels are padded with the class of their first segment from the
+    start of the first year and to the end of the last year.
+
+    Args:
+        records (ndarray): blended records of a line
+        samples (int): number of samples
+        lc (ndarray): MODIS land cover of the line, [sample, year], fill
+            pixels without records with their most common class, NA for not
+        years (list, int): first and last year of the map
+
+    Returns:
+        line (ndarray): class of each pixel and year, 254 for unclassified
+            years, 255 for pixels without records
+
+    """
+    ny = years[1] - years[0] + 1
+    line = np.zeros((samples, ny), np.uint8) + 255
+
+    # MODIS land cover mode of pixels without records
+    empty = np.ones(samples, bool)
+    empty[records['px']] = False
+    if isinstance(lc, np.ndarray) and empty.any():
+        _lc = lc[empty, :].astype(int)
+        _count = np.zeros((_lc.shape[0], _lc.max() + 1), int)
+        np.add.at(_count, (np.repeat(np.arange(_lc.shape[0]),
+                    _lc.shape[1]), _lc.ravel()), 1)
+        line[empty, :] = _count.argmax(axis=1)[:, np.newaxis]
+    if len(records) == 0:
+        return line
+
+    # index segments by pixel, keep time order within pixel
+    records = records[np.argsort(records['px'], kind='mergesort')]
+    pixel, offset = np.unique(records['px'], return_index=True)
+    first = records[offset]
+    last = records[np.append(offset[1:], len(records)) - 1]
+    _start = split_doy(ordinal_to_doy(records['start']))
+    _first = ordinal_to_doy(first['start'])
+    _last = ordinal_to_doy(last['end'])
+
+    # pad before the first and after the last segment with the first class
+    pre = _first > years[0] * 1000 + 270
+    post = _last < years[1] * 1000 + 1
+    sy = np.concatenate([np.zeros(pre.sum(), int) + years[0],
+                            _start[0] + (_start[1] > 270),
+                            _last[post] // 1000 + (_last[post] % 1000 > 270)])
+    ey = np.concatenate([_first[pre] // 1000,
+                            split_doy(ordinal_to_doy(records['end']))[0],
+                            np.zeros(post.sum(), int) + years[1]])
+    px = np.concatenate([pixel[pre], records['px'], pixel[post]])
+    _class = np.concatenate([first['class'][pre], records['class'],
+                                first['class'][post]])
+    order = np.argsort(px, kind='mergesort')
+    sy, ey, px, _class = sy[order], ey[order], px[order], _class[order]
+
+    # last segment covering each pixel and year
+    y = np.arange(years[0], years[1] + 1)[np.newaxis, :]
+    cover = (y >= sy[:, np.newaxis]) & (y <= ey[:, np.newaxis])
+    seg = np.where(cover, np.arange(len(px))[:, np.newaxis], -1)
+    seg = np.maximum.reduceat(seg, np.flatnonzero(np.diff(np.append(-1,
+                                px))), axis=0)
+    line[pixel, :] = np.where(seg >= 0, _class[seg], 254)
+    return line
 
 
 if __name__ == '__main__':
@@ -145,7 +209,9 @@ if __name__ == '__main__':
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
     parser.add_argument('img', default='./', help='example image')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start generating map...')
@@ -1,30 +1,69 @@
-""" Module for comparing two MODIS land cover map
+""" Module for comparing MODIS land cover maps, a pair or a series of maps
 
     Args:
-        -b (bitshift): how many bits to shift for the first map
+        -b (bitshift): how many digits to shift for the first map
+        -t (table): output csv of transition matrix, NA for
+            <des>_transition.csv
         --overwrite: overwrite or not
-        ori: origin
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        maps: two or more maps in order
         des: destination
 
 """
 import os
 import sys
 import argparse
+import numpy as np
 
 from osgeo import gdal
 
-from ...common import log, get_files, manage_batch
-from ...io import stack2array, stackGeo, array2stack
+from ...common import constants as cons
+from ...common import (log, transition_counts, profile_args,
+                       profile_start)
+from ...io import stackGeo, stack2blocks, blocks2stack, list2csv
 
 
-def compare_maps(map1, map2, des, bitshift=3, overwrite=False):
+def compare_blocks(maps, stats, bitshift=3, nodata='NA',
+                    lines=cons.BLOCK_LINES):
+    """ compare neighbouring maps block by block of lines
+
+    Args:
+        maps (list, str): path and filename of maps in order
+        stats (dic): transition counts from transition_counts are kept in
+            counts and updated as blocks are read
+        bitshift (int): how many digits to shift the first map class
+        nodata (int): nodata value of maps
+        lines (int): number of lines per block
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): change code of each pair of neighbouring maps, by
+            line, sample and pair, 0 for no change, NODATA for nodata
+
+    """
+    stats.setdefault('counts', 'NA')
+    for blocks in zip(*[stack2blocks(x, 1, lines, np.int32) for x in maps]):
+        array = np.stack([x[1] for x in blocks], axis=2)
+        stats['counts'] = transition_counts(array, nodata, stats['counts'])
+        array1 = array[:, :, :-1]
+        array2 = array[:, :, 1:]
+        code = array1 * (10**bitshift) + array2
+        code[array1 == array2] = 0
+        if nodata != 'NA':
+            code[(array1 == nodata) | (array2 == nodata)] = cons.NODATA
+        yield blocks[0][0], code
+
+
+def compare_maps(maps, des, bitshift=3, table='NA', overwrite=False):
     """ compare MODIS land cover maps
 
     Args:
-        map1 (str): path and filename of first map
-        map2 (str): path and filename of second map
-        des (str): place to save output map
-        bitshift (int): how many bits to shift the first map class
+        maps (list, str): path and filename of two or more maps in order
+        des (str): place to save output map, a band per pair of maps
+        bitshift (int): how many digits to shift the first map class
+        table (str): output csv of transition matrix, NA for
+            <des>_transition.csv
         overwrite (bool): overwrite or not
 
     Returns:
@@ -36,46 +75,69 @@ def compare_maps(map1, map2, des, bitshift=3, overwrite=False):
 
     """
     # check if output already exists
-    if (not overwrite) and os.path.isfile(des):
-        log.error('{} already exists.'.format(os.path.basename(des)))
-        return 1
-
-    # read input image
-    log.info('Reading input maps.')
-    try:
-        array1 = stack2array(map1, 1)
-        array2 = stack2array(map2, 1)
-    except:
-        log.error('Failed to read input maps.')
-        return 2
+    if table == 'NA':
+        table = '{}_transition.csv'.format(os.path.splitext(des)[0])
+    for x in [des, table]:
+        if (not overwrite) and os.path.isfile(x):
+            log.error('{} already exists.'.format(os.path.basename(x)))
+            return 1
 
     # read geo info
     log.info('Reading geo information...')
     try:
-        geo = stackGeo(map1)
+        geos = [stackGeo(x) for x in maps]
     except:
         log.error('Failed to read geo info.')
         return 2
-
-    # compare maps
+    geo = geos[0]
+    if len(maps) < 2:
+        log.error('Need at least two maps.')
+        return 2
+    for x, geo2 in zip(maps, geos):
+        if (geo2['lines'], geo2['samples']) != (geo['lines'], geo['samples']):
+            log.error('{} has different size.'.format(os.path.basename(x)))
+            return 2
+    nodata = geo['nodata']
+    if nodata is None:
+        nodata = 'NA'
+
+    # compare maps and write output as blocks are done
     log.info('Comparing maps')
+    log.info('Writing output: {}'.format(des))
+    names = [os.path.basename(x) for x in maps]
+    stats = {}
+    if blocks2stack(compare_blocks(maps, stats, bitshift, nodata), geo, des,
+                    ['Change {} to {}'.format(x, y) for x, y in
+                    zip(names[:-1], names[1:])], cons.NODATA, gdal.GDT_Int32,
+                    overwrite, 'GTiff', ['COMPRESS=PACKBITS']) > 0:
+        log.error('Failed to write output to {}'.format(des))
+        return 4
+
+    # transition matrix of classes found in any map
+    log.info('Summarizing transitions...')
     try:
-        array3 = array1 * (10**bitshift) + array2
-        array3[array1==array2] = 0
-        if geo['nodata'] != 'NA':
-            array3[array1==geo['nodata']] = 255
-            array3[array2==geo['nodata']] = 255
+        counts = stats['counts']
+        classes = np.nonzero(counts.sum(axis=(0, 2)) +
+                                counts.sum(axis=(0, 1)))[0]
+        if len(classes) > 0 and classes.max() >= 10**bitshift:
+            log.warning('Classes over {} digits, codes are ambiguous.'.format(
+                        bitshift))
+        area = abs(geo['geotrans'][1] * geo['geotrans'][5])
+        result = [['from_map', 'to_map', 'from_class', 'to_class', 'pixels',
+                    'area']]
+        for i in range(counts.shape[0]):
+            for x in classes:
+                for y in classes:
+                    result.append([names[i], names[i + 1], x, y,
+                                    counts[i, x, y], counts[i, x, y] * area])
     except:
-        log.error('Failed to compare maps.')
+        log.error('Failed to summarize transitions.')
         return 3
 
-    # write output
-    log.info('Writing output: {}'.format(des))
-    try:
-        array2stack(array3, geo, des, ['Change'], 255, gdal.GDT_Int16,
-                    overwrite)
-    except:
-        log.error('Failed to write output to {}'.format(des))
+    # write transition matrix
+    log.info('Writing transition matrix: {}'.format(table))
+    if list2csv(result, table, overwrite) > 0:
+        log.error('Failed to write transition matrix to {}'.format(table))
         return 4
 
     # done
@@ -87,22 +149,29 @@ if __name__ == '__main__':
     # parse options
     parser = argparse.ArgumentParser()
     parser.add_argument('-b', '--bitshift', action='store', type=int,
-                        dest='bit', default=3, help='how many bit to shift')
+                        dest='bit', default=3, help='how many digits to shift')
+    parser.add_argument('-t', '--table', action='store', type=str,
+                        dest='table', default='NA',
+                        help='output csv of transition matrix')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
-    parser.add_argument('map1', default='./', help='map1')
-    parser.add_argument('map2', default='./', help='map2')
+    parser.add_argument('maps', nargs='+', help='two or more maps in order')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start comparing...')
-    log.info('Map 1 from {}'.format(args.map1))
-    log.info('Map 2 from {}'.format(args.map2))
+    for i, x in enumerate(args.maps):
+        log.info('Map {} from {}'.format(i + 1, x))
     log.info('Saving as {}'.format(args.des))
     log.info('Bit shift: {}'.format(args.bit))
+    if args.table != 'NA':
+        log.info('Transition matrix as {}'.format(args.table))
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to compare maps
-    compare_maps(args.map1, args.map2, args.des, args.bit, args.overwrite)
+    sys.exit(compare_maps(args.maps, args.des, args.bit, args.table,
+                            args.overwrite))
@@ -0,0 +1,109 @@
+""" Module for converting blended land cover files to CSR layout
+
+    Args:
+        -p (pattern): searching pattern
+        -R (recursive): recursive when seaching files
+        --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        ori: origin
+        des: destination, same as origin to convert in place
+
+"""
+import os
+import sys
+import argparse
+
+from ...common import log, get_files, profile_args, profile_start
+from ...io import npz2csr
+
+
+def convert_blend(pattern, ori, des, overwrite=False, recursive=False):
+    """ convert blended land cover files to CSR layout
+
+    Args:
+        pattern (str): searching pattern, e.g. yatsm_lc_r*.npz
+        ori (str): place to look for inputs
+        des (str): place to save outputs, same as ori to convert in place
+        overwrite (bool): overwrite or not
+        recursive (bool): recursive when searching file, or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error when searching files
+        3: found no file
+
+    """
+    # check if output exists, if not try to create one
+    if not os.path.exists(des):
+        log.warning('{} does not exist, trying to create one.'.format(des))
+        try:
+            os.makedirs(des)
+        except:
+            log.error('Cannot create output folder {}'.format(des))
+            return 1
+
+    # locate files
+    log.info('Locating files...')
+    try:
+        blend_list = get_files(ori, pattern, recursive)
+        n = len(blend_list)
+    except:
+        log.error('Failed to search for {}'.format(pattern))
+        return 2
+    else:
+        if n == 0:
+            log.error('Found no {}'.format(pattern))
+            return 3
+        else:
+            log.info('Found {} files.'.format(n))
+
+    # loop through all files
+    count = 0
+    for blend in blend_list:
+        try:
+            if npz2csr(os.path.join(blend[0], blend[1]), os.path.join(des,
+                        blend[1]), overwrite) > 0:
+                log.warning('{} already exists.'.format(blend[1]))
+                continue
+            count += 1
+        except:
+            log.warning('Failed to convert {}'.format(blend[1]))
+            continue
+
+    # done
+    log.info('Process completed.')
+    log.info('Successfully converted {}/{} files.'.format(count, n))
+    return 0
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--pattern', action='store', type=str,
+                        dest='pattern', default='yatsm_lc_r*.npz',
+                        help='searching pattern')
+    parser.add_argument('-R', '--recursive', action='store_true',
+                        help='recursive or not')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='overwrite or not')
+    parser.add_argument('ori', default='./', help='origin')
+    parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
+    args = parser.parse_args()
+    profile_start(args, args.des)
+
+    # print logs
+    log.info('Start converting blended files...')
+    log.info('Looking for {}'.format(args.pattern))
+    log.info('In {}'.format(args.ori))
+    log.info('Saving in {}'.format(args.des))
+    if args.recursive:
+        log.info('Recursive seaching.')
+    if args.overwrite:
+        log.info('Overwriting old files.')
+
+    # run function to convert blended files
+    sys.exit(convert_blend(args.pattern, args.ori, args.des, args.overwrite,
+                            args.recursive))
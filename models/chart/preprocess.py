@@ -4,8 +4,12 @@
         -p (pattern): searching pattern
         -d (product): vi, lc or nbar
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -14,13 +18,15 @@ import os
 import sys
 import argparse
 
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 from ...io import (modisvi2stack, modislc2stack, nbar2stack, pheno2stack,
                     nbarcmg2stack)
 
 
 def modis_product_preprocess(pattern, ori, des, product, overwrite=False,
-                                recursive=False, batch=[1,1]):
+                                recursive=False, batch=[1,1],
+                                cost='NA', queue='NA'):
     """ preprocess MODIS data product
 
     Args:
@@ -31,6 +37,8 @@ def modis_product_preprocess(pattern, ori, des, product, overwrite=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -64,9 +72,13 @@ def modis_product_preprocess(pattern, ori, des, product, overwrite=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        img_list, done = queue_works(img_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        img_list = manage_batch(img_list, batch[0], batch[1])
+        img_list = manage_batch(img_list, batch[0], batch[1], cost)
         n = len(img_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -76,24 +88,23 @@ def modis_product_preprocess(pattern, ori, des, product, overwrite=False,
     for img in img_list:
         log.info('Processing {}'.format(img[1]))
         if product == 'vi':
-            if modisvi2stack(os.path.join(img[0], img[1]), des, overwrite) == 0:
-                count += 1
+            ret = modisvi2stack(os.path.join(img[0], img[1]), des, overwrite)
         elif product == 'lc':
-            if modislc2stack(os.path.join(img[0], img[1]), des, True,
-                                overwrite) == 0:
-                count += 1
+            ret = modislc2stack(os.path.join(img[0], img[1]), des, True,
+                                overwrite)
         elif product == 'nbar':
-            if nbar2stack(os.path.join(img[0], img[1]), des, overwrite) == 0:
-                count += 1
+            ret = nbar2stack(os.path.join(img[0], img[1]), des, overwrite)
         elif product == 'pheno':
-            if pheno2stack(os.path.join(img[0], img[1]), des, overwrite) == 0:
-                count += 1
+            ret = pheno2stack(os.path.join(img[0], img[1]), des, overwrite)
         elif product == 'nbarcmg':
-            if nbarcmg2stack(os.path.join(img[0], img[1]), des, overwrite) == 0:
-                count += 1
+            ret = nbarcmg2stack(os.path.join(img[0], img[1]), des, overwrite)
         else:
             log.error('Unsupported product {}'.format(product))
             return 4
+        if ret == 0:
+            count += 1
+            if done != 'NA':
+                done(img)
 
     # done
     log.info('Process completed.')
@@ -113,13 +124,19 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -134,6 +151,10 @@ if __name__ == '__main__':
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
     log.info('Product is {}'.format(args.product))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -141,4 +162,5 @@ if __name__ == '__main__':
 
     # run function to preprocess data
     modis_product_preprocess(args.pattern, args.ori, args.des, args.product,
-                                args.overwrite, args.recursive, args.batch)
+                                args.overwrite, args.recursive, args.batch,
+                                args.cost, args.queue)
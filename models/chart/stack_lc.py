@@ -1,30 +1,178 @@
-""" Module for stacking MODIS land cover product
+""" Module for stacking MODIS land cover product and summarizing the annual
+    land cover trajectories of the stack
 
     Args:
         -p (pattern): searching pattern
+        -y (year): year of the first band
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
-        ori: origin
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        ori: origin, folder of maps to stack or an existing stack
         des: destination
 
 """
 import os
 import sys
 import argparse
+import numpy as np
 
 from osgeo import gdal
 
-from ...common import log, get_files, nchange
-from ...io import stackMerge, stackGeo, stack2array, array2stack
+from ...common import constants as cons
+from ...common import (log, get_files, temporal_reduce, transition_counts,
+                       profile_args, profile_start)
+from ...io import stackMerge, stackGeo, stack2blocks, blocks2stack, list2csv
 
 
-def modislc_stack(pattern, ori, des, overwrite=False, recursive=False):
-    """ stack MODIS land cover product
+SUMMARY_BANDS = ['MODIS LC nchange', 'MODIS LC dominant class',
+                    'MODIS LC years of dominant class',
+                    'MODIS LC number of classes']
+
+
+def trajectory_blocks(ori, stats, nodata=cons.NODATA, lines=cons.BLOCK_LINES):
+    """ summarize land cover trajectories block by block of lines
+
+    Args:
+        ori (str): land cover stack, a band per year
+        stats (dic): transition counts from transition_counts are kept in
+            counts, number of pixels of each trajectory in trajectories,
+            both updated as blocks are read
+        nodata (int): nodata value of the stack
+        lines (int): number of lines per block
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): by line and sample, number of change with nodata
+            counted as a class, dominant class, years of dominant class and
+            number of classes, the last three NODATA where all years are
+            nodata
+
+    """
+    stats.setdefault('counts', 'NA')
+    stats.setdefault('trajectories', {})
+    for row, array in stack2blocks(ori, 0, lines, np.int32):
+        valid = array != nodata
+        empty = ~valid.any(axis=2)
+        stats['counts'] = transition_counts(array, nodata, stats['counts'])
+
+        # trajectories as rows of bytes, counted in the block then merged
+        nband = array.shape[2]
+        keys = np.ascontiguousarray(array[~empty].astype(np.int16)).view(
+                    np.dtype((np.void, 2 * nband)))[:, 0]
+        keys, count = np.unique(keys, return_counts=True)
+        trajectories = stats['trajectories']
+        for key, n in zip(keys.tolist(), count.tolist()):
+            trajectories[key] = trajectories.get(key, 0) + n
+
+        # per pixel summary
+        result = np.zeros(array.shape[0:2] + (4,), np.int16)
+        result[:, :, 0] = temporal_reduce(array, 'nchange', nodata)
+        result[:, :, 1] = temporal_reduce(array, 'mode', nodata)
+        result[:, :, 2] = np.count_nonzero(array ==
+                                            result[:, :, 1:2], axis=2)
+        ranked = np.sort(np.where(valid, array, np.iinfo(np.int32).max),
+                            axis=2)
+        result[:, :, 3] = 1 + np.count_nonzero((ranked[:, :, 1:] !=
+                            ranked[:, :, :-1]) & (ranked[:, :, 1:] !=
+                            np.iinfo(np.int32).max), axis=2)
+        result[empty, 1:] = cons.NODATA
+        yield row, result
+
+
+def modislc_trajectory(ori, des, year=2001, overwrite=False):
+    """ summarize annual land cover trajectories of a MODIS land cover stack
+
+    Args:
+        ori (str): land cover stack, a band per year
+        des (str): place to save outputs
+        year (int): year of the first band
+        overwrite (bool): overwrite or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error reading input
+        3: error during processing
+        4: error writing output
+
+    """
+    # check if output exists
+    summary = os.path.join(des, 'MODIS_LC_summary.tif')
+    transition = os.path.join(des, 'MODIS_LC_transition.csv')
+    trajectory = os.path.join(des, 'MODIS_LC_trajectory.csv')
+    for x in [summary, transition, trajectory]:
+        if (not overwrite) and os.path.isfile(x):
+            log.error('{} already exists.'.format(os.path.basename(x)))
+            return 1
+
+    # read input
+    log.info('Reading input: {}'.format(ori))
+    try:
+        geo = stackGeo(ori)
+        nodata = geo['nodata']
+        if nodata == 'NA' or nodata is None:
+            nodata = cons.NODATA
+        nodata = int(nodata)
+    except:
+        log.error('Failed to read input from {}'.format(ori))
+        return 2
+
+    # per pixel summary, written as blocks are done
+    log.info('Summarizing trajectories...')
+    log.info('Writing output: {}'.format(summary))
+    stats = {}
+    if blocks2stack(trajectory_blocks(ori, stats, nodata), geo, summary,
+                    SUMMARY_BANDS, cons.NODATA, gdal.GDT_Int16, overwrite,
+                    'GTiff', ['COMPRESS=PACKBITS']) > 0:
+        log.error('Failed to write output to {}'.format(summary))
+        return 4
+
+    # tables of transitions and trajectories
+    log.info('Tabulating transitions and trajectories...')
+    try:
+        area = abs(geo['geotrans'][1] * geo['geotrans'][5])
+        counts = stats['counts']
+        classes = np.nonzero(counts.sum(axis=(0, 2)) +
+                                counts.sum(axis=(0, 1)))[0]
+        table1 = [['from_year', 'to_year', 'from_class', 'to_class', 'pixels',
+                    'area']]
+        for i in range(counts.shape[0]):
+            for x in classes:
+                for y in classes:
+                    table1.append([year + i, year + i + 1, x, y,
+                                    counts[i, x, y], counts[i, x, y] * area])
+        total = sum(stats['trajectories'].values())
+        table2 = [['trajectory', 'pixels', 'area', 'percent']]
+        for key, n in sorted(stats['trajectories'].items(),
+                                key=lambda x: -x[1]):
+            table2.append(['-'.join(str(x) for x in np.frombuffer(key,
+                            np.int16)), n, n * area, n / total * 100])
+    except:
+        log.error('Failed to tabulate transitions and trajectories.')
+        return 3
+    log.info('Found {} trajectories.'.format(len(table2) - 1))
+
+    # write tables
+    for table, _file in [[table1, transition], [table2, trajectory]]:
+        log.info('Writing output: {}'.format(_file))
+        if list2csv(table, _file, overwrite) > 0:
+            log.error('Failed to write output to {}'.format(_file))
+            return 4
+
+    # done
+    return 0
+
+
+def modislc_stack(pattern, ori, des, year=2001, overwrite=False,
+                    recursive=False):
+    """ stack MODIS land cover product and summarize trajectories
 
     Args:
         pattern (str): searching pattern, e.g. M*tif
-        ori (str): place to look for inputs
+        ori (str): place to look for inputs, or an existing stack
         des (str): place to save outputs
+        year (int): year of the first band
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
 
@@ -45,41 +193,38 @@ def modislc_stack(pattern, ori, des, overwrite=False, recursive=False):
             log.error('Cannot create output folder {}'.format(des))
             return 1
 
-    # locate files
-    log.info('Locating files...')
-    try:
-        lc_list = get_files(ori, pattern, recursive)
-        lc_list = [os.path.join(x[0], x[1]) for x in lc_list]
-        n = len(lc_list)
-    except:
-        log.error('Failed to search for {}'.format(pattern))
-        return 2
+    if os.path.isfile(ori):
+        stack = ori
     else:
-        if n == 0:
-            log.error('Found no {}'.format(pattern))
-            return 3
+        # locate files
+        log.info('Locating files...')
+        try:
+            lc_list = get_files(ori, pattern, recursive)
+            lc_list = sorted([os.path.join(x[0], x[1]) for x in lc_list])
+            n = len(lc_list)
+        except:
+            log.error('Failed to search for {}'.format(pattern))
+            return 2
         else:
-            log.info('Found {} files.'.format(n))
+            if n == 0:
+                log.error('Found no {}'.format(pattern))
+                return 3
+            else:
+                log.info('Found {} files.'.format(n))
 
-    # stack file
-    log.info('Stacking images...')
-    try:
-        stackMerge(lc_list, os.path.join(des, 'MODIS_LC_Stack.tif'),
-                    gdal.GDT_Int16, overwrite)
-    except:
-        log.error('Failed to merge files.')
-        return 4
+        # stack file
+        log.info('Stacking images...')
+        stack = os.path.join(des, 'MODIS_LC_Stack.tif')
+        try:
+            stackMerge(lc_list, stack, gdal.GDT_Int16, overwrite)
+        except:
+            log.error('Failed to merge files.')
+            return 4
 
-    # calculate nchange
-    log.info('Calculating nchange...')
-    try:
-        geo = stackGeo(os.path.join(des, 'MODIS_LC_Stack.tif'))
-        lc = stack2array(os.path.join(des, 'MODIS_LC_Stack.tif'))
-        nc = nchange(lc)
-        array2stack(nc, geo, os.path.join(des, 'MODIS_LC_nchange.tif'),
-                    ['MODIS LC nchange'], -9999, gdal.GDT_Int16, overwrite)
-    except:
-        log.error('Failed to calculate nchange.')
+    # summarize trajectories
+    log.info('Calculating nchange and trajectories...')
+    if modislc_trajectory(stack, des, year, overwrite) > 0:
+        log.error('Failed to summarize trajectories.')
         return 4
 
     # done
@@ -93,24 +238,33 @@ if __name__ == '__main__':
     parser.add_argument('-p', '--pattern', action='store', type=str,
                         dest='pattern', default='M*tif',
                         help='searching pattern')
+    parser.add_argument('-y', '--year', action='store', type=int,
+                        dest='year', default=2001,
+                        help='year of the first band')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start stacking land cover product...')
-    log.info('Looking for {}'.format(args.pattern))
-    log.info('In {}'.format(args.ori))
+    if os.path.isfile(args.ori):
+        log.info('Using existing stack {}'.format(args.ori))
+    else:
+        log.info('Looking for {}'.format(args.pattern))
+        log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
+    log.info('First year: {}'.format(args.year))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to stack land cover product
-    modislc_stack(args.pattern, args.ori, args.des, args.overwrite,
-                    args.recursive)
+    sys.exit(modislc_stack(args.pattern, args.ori, args.des, args.year,
+                            args.overwrite, args.recursive))
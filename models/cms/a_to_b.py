@@ -2,36 +2,108 @@
 
     Args:
         -p (pattern): searching pattern
+        -s (stack): input is a single stack, a band per year
+        -y (year): year of the first band of stack
+        -c (count): also save number of transitions
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
-        classes: class a and class b
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        classes: pairs of class a and class b, -9999 for all other classes
         ori: origin
         des: destination
 
 """
 import os
+import sys
 import argparse
 import numpy as np
 
 from osgeo import gdal
 
 from ...common import constants as cons
-from ...common import log, get_files, get_int
-from ...io import stackGeo, stack2array, array2stack
+from ...common import log, get_files, get_int, profile_args, profile_start
+from ...io import stackGeo, stack2blocks, blocks2stack
+
+
+def atob_blocks(files, years, pairs, nodata='NA', count=False,
+                lines=cons.BLOCK_LINES):
+    """ figuring out when class a first changed to class b, block by block of
+        lines with all pairs of classes in one pass
+
+    Args:
+        files (list, str): maps in order, or one stack with a band per year
+        years (list, int): year of each map or band
+        pairs (list, list): [class a, class b] pairs, -9999 for all other
+            valid classes
+        nodata (int): nodata value of maps
+        count (bool): also count number of transitions
+        lines (int): number of lines per block
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): by line, sample and pair, year of first change from
+            a to b, with any other classes in between, or of first year in
+            b if not in a before, 0 for in a but no change, 2 for in b from
+            the first year, NODATA for never in a or b, followed by number
+            of changes from a to b of each pair if count
+
+    """
+    if len(files) == 1:
+        blocks = stack2blocks(files[0], 0, lines, np.int16)
+    else:
+        blocks = ((x[0][0], np.stack([y[1] for y in x], axis=2)) for x in
+                    zip(*[stack2blocks(y, 1, lines, np.int16) for y in files]))
+    for row, array in blocks:
+        valid = np.ones(array.shape, bool)
+        if nodata != 'NA':
+            valid = array != nodata
+        result = np.zeros(array.shape[0:2] + (len(pairs) * (1 + count),),
+                            np.int16)
+        for i, pair in enumerate(pairs):
+            if pair[0] == cons.NODATA:
+                in_a = valid & (array != pair[1])
+            else:
+                in_a = array == pair[0]
+            if pair[1] == cons.NODATA:
+                in_b = valid & (array != pair[0])
+            else:
+                in_b = array == pair[1]
+            year = np.zeros(array.shape[0:2], np.int16) + cons.NODATA
+            n = np.zeros(array.shape[0:2], np.int16)
+            year[in_b[:, :, 0]] = 2
+            year[in_a[:, :, 0]] = 0
+            # in a since the last change to b, other classes in between
+            was_a = in_a[:, :, 0].copy()
+            for t in range(1, array.shape[2]):
+                change = in_b[:, :, t] & was_a
+                year[change & (year == 0)] = years[t]
+                year[in_b[:, :, t] & (year == cons.NODATA)] = years[t]
+                n += change
+                year[in_a[:, :, t] & ((year == cons.NODATA) |
+                        (year == 2))] = 0
+                was_a = (was_a & ~in_b[:, :, t]) | in_a[:, :, t]
+            result[:, :, i] = year
+            if count:
+                result[:, :, len(pairs) + i] = n
+        yield row, result
 
 
 def atob(pattern, ori, des, _class, stack=False, overwrite=False,
-            recursive=False):
+            recursive=False, count=False, year=2001):
     """ figuring out when one class changed to another in series of maps
 
     Args:
         pattern (str): searching pattern, e.g. *tif
         ori (str): place to look for inputs
         des (str): path and file name of output
-        class (list, int): [class1, class2], -9999 for all other classes
+        class (list, int): [class1, class2], or a list of them for a band
+            per pair, -9999 for all other classes
         stack (bool): single stack input
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
+        count (bool): also save number of transitions of each pair
+        year (int): year of the first band of stack
 
     Returns:
         0: successful
@@ -47,10 +119,20 @@ def atob(pattern, ori, des, _class, stack=False, overwrite=False,
         log.error('{} already exists.'.format(os.path.basename(des)))
         return 1
 
+    # check classes
+    pairs = [_class] if type(_class[0]) == int else _class
+    for pair in pairs:
+        if len(pair) != 2 or pair[0] == pair[1]:
+            log.error('Invalid pair of classes: {}'.format(pair))
+            return 4
+
     if stack:
-        img_list = [[os.path.dirname(ori),
-                        os.path.basename(ori)] for i in range(0,
-                        stackGeo(ori)['bands'])]
+        img_list = [ori]
+        try:
+            years = list(range(year, year + stackGeo(ori)['bands']))
+        except:
+            log.error('Failed to read {}'.format(ori))
+            return 2
     else:
         # locate files
         log.info('Locating files...')
@@ -70,46 +152,31 @@ def atob(pattern, ori, des, _class, stack=False, overwrite=False,
 
         # get files in order
         log.info('Sorting files...')
-        img_id = [get_int(x)[0] for x in img_list]
-        img_list = [[img_list[x], img_id[x]] for x in np.argsort(img_id)]
+        img_id = [get_int(os.path.basename(x))[0] for x in img_list]
+        years = [img_id[x] for x in np.argsort(img_id)]
+        img_list = [img_list[x] for x in np.argsort(img_id)]
 
     # initialize output
     log.info('Initializing output...')
     try:
-        geo = stackGeo(img_list[0][0])
-        result = np.zeros((geo['lines'],geo['samples']), np.int16) + cons.NODATA
+        geo = stackGeo(img_list[0])
+        nodata = geo['nodata']
+        if nodata is None:
+            nodata = 'NA'
     except:
         log.error('Failed to initialize output.')
         return 4
 
-    # work through maps
+    # work through maps and write output as blocks are done
     log.info('Working through maps...')
-    try:
-        for img in img_list:
-            array = stack2array(img[0], 1, np.int8)
-            if _class[0] == -9999:
-                if geo['nodata'] != 'NA':
-                    result[(array != _class[1]) & (array != geo['nodata'])] = 0
-                else:
-                    result[array != _class[1]] = 0
-            else:
-                result[array == _class[0]] = 0
-            if _class[1] == -9999:
-                result[(array != _class[0]) & (result == 0)] = img[1]
-            else:
-                result[(array == _class[1]) & ((result == 0) |
-                        (result == cons.NODATA))] = img[1]
-            result[result == img_list[0][1]] = 2
-    except:
-        log.error('Failed during processing {}.'.format(img[0]))
-        return 4
-
-    # write output
     log.info('Writing output: {}'.format(des))
-    if array2stack(result, geo, des,
-                    ['From class {} to {}'.format(_class[0], _class[1])],
-                    cons.NODATA, gdal.GDT_Int16, overwrite, 'GTiff',
-                    ['COMPRESS=PACKBITS']) > 0:
+    bands = ['From class {} to {}'.format(x[0], x[1]) for x in pairs]
+    if count:
+        bands += ['Number of change from class {} to {}'.format(x[0], x[1])
+                    for x in pairs]
+    if blocks2stack(atob_blocks(img_list, years, pairs, nodata, count), geo,
+                    des, bands, cons.NODATA, gdal.GDT_Int16, overwrite,
+                    'GTiff', ['COMPRESS=PACKBITS']) > 0:
         log.error('Failed to write output to {}'.format(des))
         return 5
 
@@ -126,29 +193,42 @@ if __name__ == '__main__':
                         help='searching pattern')
     parser.add_argument('-s', '--stack', action='store_true',
                         help='input is a single stack, or not')
+    parser.add_argument('-y', '--year', action='store', type=int,
+                        dest='year', default=2001,
+                        help='year of the first band of stack')
+    parser.add_argument('-c', '--count', action='store_true',
+                        help='save number of transitions, or not')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
-    parser.add_argument('classes', type=int, nargs=2, default=[1,-9999],
-                        help='classes, class A and class B')
+    parser.add_argument('classes', type=int, nargs='+', default=[1,-9999],
+                        help='pairs of classes, class A and class B')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
+    if len(args.classes) % 2 != 0:
+        parser.error('classes should be pairs of class A and class B')
+    pairs = [args.classes[i:(i + 2)] for i in range(0, len(args.classes), 2)]
 
     # print logs
     log.info('Analyzing images...')
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving as {}'.format(args.des))
-    log.info('From class {} to class {}.'.format(args.classes[0], args.classes[1]))
+    for x in pairs:
+        log.info('From class {} to class {}.'.format(x[0], x[1]))
     if args.stack:
-        log.info('Single stack input.')
+        log.info('Single stack input, starting from {}.'.format(args.year))
+    if args.count:
+        log.info('Counting number of transitions.')
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to analyze images
-    atob(args.pattern, args.ori, args.des, args.classes, args.stack,
-            args.overwrite, args.recursive)
+    sys.exit(atob(args.pattern, args.ori, args.des, pairs, args.stack,
+                    args.overwrite, args.recursive, args.count, args.year))
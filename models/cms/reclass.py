@@ -2,6 +2,8 @@
 
     Args:
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -13,7 +15,7 @@ import numpy as np
 from osgeo import gdal
 
 from ...common import constants as cons
-from ...common import log
+from ...common import log, profile_args, profile_start
 from ...io import stackGeo, stack2array, array2stack
 
 
@@ -74,7 +76,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Reclassify regrowth image...')
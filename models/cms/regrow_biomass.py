@@ -1,23 +1,94 @@
 """ Module to combine regrowth map with biomass
 
     Args:
+        -p (pixel): add row and col of pixels
+        -m (map): add map coordinates of pixel centers
+        -s (summary): save statistics of each start year as <des>_summary.csv
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         rate: regrowth rate image
         year1: regrowth start year image
         year2: regrowth end year image
         biomass: biomassi image
-        des: destination
+        des: destination, csv file, or npz file for a binary table
 
 """
 import os
+import sys
 import argparse
 import numpy as np
 
-from ...common import log
-from ...io import stackGeo, stack2array, list2csv
+from ...common import constants as cons
+from ...common import log, pixel2map, profile_args, profile_start
+from ...io import stackGeo, stack2blocks, list2csv
 
 
-def rgw_bms(rate, year1, year2, biomass, des, overwrite=False):
+FIELDS = ['Rate', 'Start', 'End', 'Biomass']
+
+
+def rgw_blocks(imgs, geo, pixel=False, coord=False, lines=cons.BLOCK_LINES):
+    """ extract pixels with regrowth block by block of lines
+
+    Args:
+        imgs (list, str): rate, start year, end year and biomass images
+        geo (dic): spatial reference
+        pixel (bool): add row and col of pixels
+        coord (bool): add map coordinates of pixel centers
+        lines (int): number of lines per block
+
+    Yields:
+        columns (list, ndarray): rate, start year, end year and biomass of
+            pixels with rate over 0, followed by row and col, and x and y
+
+    """
+    for blocks in zip(*[stack2blocks(x, 1, lines, np.int16) for x in imgs]):
+        mask = blocks[0][1] > 0
+        columns = [x[1][mask] for x in blocks]
+        if pixel or coord:
+            row, col = np.nonzero(mask)
+            row += blocks[0][0]
+            if pixel:
+                columns += [row, col]
+            if coord:
+                columns += list(pixel2map(geo['geotrans'], row, col))
+        yield columns
+
+
+def rgw_summary(stats, start, rate, biomass):
+    """ add pixels of a block to statistics of each start year
+
+    Args:
+        stats (dic): number of pixels, sum, min and max of rate, and sum of
+            biomass, by start year, updated in place
+        start (ndarray): start year of pixels
+        rate (ndarray): regrowth rate of pixels
+        biomass (ndarray): biomass of pixels
+
+    Returns:
+        stats (dic): updated statistics
+
+    """
+    years, index = np.unique(start, return_inverse=True)
+    n = np.bincount(index)
+    sum1 = np.bincount(index, rate.astype(np.float64))
+    sum2 = np.bincount(index, biomass.astype(np.float64))
+    low = np.zeros(len(years), np.int64) + np.iinfo(np.int64).max
+    high = np.zeros(len(years), np.int64) + np.iinfo(np.int64).min
+    np.minimum.at(low, index, rate)
+    np.maximum.at(high, index, rate)
+    for i, year in enumerate(years.tolist()):
+        x = stats.setdefault(year, [0, 0.0, low[i], high[i], 0.0])
+        x[0] += n[i]
+        x[1] += sum1[i]
+        x[2] = min(x[2], low[i])
+        x[3] = max(x[3], high[i])
+        x[4] += sum2[i]
+    return stats
+
+
+def rgw_bms(rate, year1, year2, biomass, des, overwrite=False, pixel=False,
+            coord=False, summary=False):
     """ combine regrowth maps with biomass map
 
     Args:
@@ -25,8 +96,12 @@ def rgw_bms(rate, year1, year2, biomass, des, overwrite=False):
         year1 (str): path and file name of regrowth start year image
         year2 (str): path and file name of regrowth end year2 image
         biomass (str): path and file name of biomass image
-        des (str): path and file name of output
+        des (str): path and file name of output, csv, or npz for a binary
+            table with an array per column
         overwrite (bool): overwrite or not
+        pixel (bool): add row and col of pixels
+        coord (bool): add map coordinates of pixel centers
+        summary (bool): save statistics of each start year
 
     Returns:
         0: successful
@@ -37,41 +112,71 @@ def rgw_bms(rate, year1, year2, biomass, des, overwrite=False):
 
     """
     # check if output exists
-    if (not overwrite) and os.path.isfile(des):
-        log.error('{} already exists.'.format(os.path.basename(des)))
-        return 1
+    des2 = '{}_summary.csv'.format(os.path.splitext(des)[0])
+    for x in ([des, des2] if summary else [des]):
+        if (not overwrite) and os.path.isfile(x):
+            log.error('{} already exists.'.format(os.path.basename(x)))
+            return 1
 
     # initialize output
     log.info('Reading input...')
     try:
         geo = stackGeo(rate)
-        array1 = stack2array(rate, 1, np.int16)
-        array2 = stack2array(year1, 1, np.int16)
-        array3 = stack2array(year2, 1, np.int16)
-        array4 = stack2array(biomass, 1, np.int16)
+        for x in [year1, year2, biomass]:
+            geo2 = stackGeo(x)
+            if ((geo2['lines'], geo2['samples']) !=
+                    (geo['lines'], geo['samples'])):
+                log.error('{} has different size.'.format(x))
+                return 2
     except:
         log.error('Failed to read inputs.')
         return 2
+    fields = (FIELDS + (['Row', 'Col'] if pixel else []) +
+                (['X', 'Y'] if coord else []))
+    fmt = ['%d'] * (len(fields) - 2 * coord) + ['%.3f'] * (2 * coord)
 
-    # loop through pixels
+    # extract pixels and write output as blocks are done
     log.info('Combining...')
+    log.info('Writing output: {}'.format(des))
+    binary = os.path.splitext(des)[1].lower() == '.npz'
+    total = 0
+    stats = {}
+    chunks = []
     try:
-        result = [['Rate','Start','End','Biomass']]
-        for i in range(0, geo['lines']):
-            for j in range(0, geo['samples']):
-                if array1[i, j] > 0:
-                    result.append([array1[i, j], array2[i, j], array3[i, j],
-                                    array4[i, j]])
-        log.info('Total records: {}.'.format(len(result)))
+        with open(des, 'wb') as output:
+            if not binary:
+                output.write('{}\n'.format(','.join(fields)).encode())
+            for columns in rgw_blocks([rate, year1, year2, biomass], geo,
+                                        pixel, coord):
+                total += len(columns[0])
+                if summary:
+                    rgw_summary(stats, columns[1], columns[0], columns[3])
+                if binary:
+                    chunks.append(columns)
+                elif len(columns[0]) > 0:
+                    np.savetxt(output, np.column_stack(columns), fmt,
+                                delimiter=',')
+            if binary:
+                np.savez(output, **dict([[x, np.concatenate([y[i] for y in
+                                chunks])] for i, x in enumerate(fields)]))
     except:
-        log.error('Failed during processing.')
-        return 3
-
-    # write output
-    log.info('Writing output: {}'.format(des))
-    if list2csv(result, des, overwrite) > 0:
         log.error('Failed to write output to {}'.format(des))
         return 4
+    log.info('Total records: {}.'.format(total))
+
+    # write statistics of each start year
+    if summary:
+        log.info('Writing summary: {}'.format(des2))
+        area = abs(geo['geotrans'][1] * geo['geotrans'][5])
+        result = [['Start', 'Pixels', 'Area', 'Mean_Rate', 'Min_Rate',
+                    'Max_Rate', 'Mean_Biomass', 'Total_Biomass']]
+        for year in sorted(stats):
+            x = stats[year]
+            result.append([year, x[0], x[0] * area, x[1] / x[0], x[2], x[3],
+                            x[4] / x[0], x[4]])
+        if list2csv(result, des2, overwrite) > 0:
+            log.error('Failed to write summary to {}'.format(des2))
+            return 4
 
     # done
     log.info('Process completed.')
@@ -81,6 +186,12 @@ def rgw_bms(rate, year1, year2, biomass, des, overwrite=False):
 if __name__ == '__main__':
     # parse options
     parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--pixel', action='store_true',
+                        help='add row and col of pixels')
+    parser.add_argument('-m', '--map', action='store_true',
+                        help='add map coordinates of pixels')
+    parser.add_argument('-s', '--summary', action='store_true',
+                        help='save statistics of each start year')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('rate', default='./', help='regrowth rate image')
@@ -88,7 +199,9 @@ if __name__ == '__main__':
     parser.add_argument('year2', default='./', help='regrowth year image')
     parser.add_argument('biomass', default='./', help='biomass image')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Combining regrowth images with biomass image...')
@@ -97,9 +210,16 @@ if __name__ == '__main__':
     log.info('Regrowth end year image: {}'.format(args.year2))
     log.info('Biomass image: {}'.format(args.biomass))
     log.info('Saving as {}'.format(args.des))
+    if args.pixel:
+        log.info('With row and col of pixels.')
+    if args.map:
+        log.info('With map coordinates of pixels.')
+    if args.summary:
+        log.info('With statistics of each start year.')
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to combine regrowth image with biomass image
-    rgw_bms(args.rate, args.year1, args.year2, args.biomass, args.des,
-            args.overwrite)
+    sys.exit(rgw_bms(args.rate, args.year1, args.year2, args.biomass,
+                        args.des, args.overwrite, args.pixel, args.map,
+                        args.summary))
@@ -3,8 +3,11 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        -q (queue): claim dates from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
         img: an example image to get the spatial reference
@@ -18,12 +21,13 @@ import scipy.io as sio
 from osgeo import gdal
 
 from ...io import stackGeo, array2stack
-from ...common import log, get_files, manage_batch, get_int
+from ...common import (log, get_files, manage_batch, queue_works, get_int,
+                        profile_args, profile_start)
 from ...common import constants as cons
 
 
 def batch_area_over_threshold(pattern, ori, des, img, overwrite=False,
-                                recursive=False, batch=[1,1]):
+                                recursive=False, batch=[1,1], queue='NA'):
     """ Generage regular image file from stack image
 
     Args:
@@ -34,6 +38,7 @@ def batch_area_over_threshold(pattern, ori, des, img, overwrite=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -63,9 +68,15 @@ def batch_area_over_threshold(pattern, ori, des, img, overwrite=False,
 
     # figure out what dates this job is going to process
     try:
-        date_list = manage_batch(date_list, batch[0], batch[1])
-        ndate = len(date_list)
-        log.info('{} to be proceessed by this job.'.format(ndate))
+        done = 'NA'
+        if queue != 'NA':
+            log.info('Claiming dates from queue {}'.format(queue))
+            ndate = len(date_list)
+            date_list, done = queue_works(date_list, queue)
+        else:
+            date_list = manage_batch(date_list, batch[0], batch[1])
+            ndate = len(date_list)
+            log.info('{} to be proceessed by this job.'.format(ndate))
     except:
         log.error('Failed to manage batch job.')
         return 1
@@ -113,6 +124,8 @@ def batch_area_over_threshold(pattern, ori, des, img, overwrite=False,
         if array2stack(result, geo, fn, ['Area over SD threshold'], cons.NODATA,
                         gdal.GDT_Int16, overwrite) == 0:
             count += 1
+            if done != 'NA':
+                done(d)
         else:
             log.warning('Failed to process data {}.{}'.format(d[0], d[1]))
 
@@ -131,6 +144,8 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, thisjob and totaljob')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
@@ -138,7 +153,9 @@ if __name__ == '__main__':
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
     parser.add_argument('img', default='./', help='example image')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -149,6 +166,8 @@ if __name__ == '__main__':
     # print logs
     log.info('Start generating images...')
     log.info('Running job {}/{}'.format(args.batch[0], args.batch[1]))
+    if args.queue != 'NA':
+        log.info('Claiming dates from queue {}'.format(args.queue))
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
@@ -160,4 +179,5 @@ if __name__ == '__main__':
 
     # run function to generate images of area over SD threhold
     batch_area_over_threshold(args.pattern, args.ori, args.des, args.img,
-                                args.overwrite, args.recursive, args.batch)
+                                args.overwrite, args.recursive, args.batch,
+                                args.queue)
@@ -5,6 +5,8 @@
         -f (file): image list file for yatsm cache
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         img1: image of start date
         img2: image of end date
         ori: origin of cache files
@@ -20,7 +22,7 @@ import scipy.io as sio
 from osgeo import gdal
 
 from ...io import stack2array, stackGeo, array2stack, csv2list
-from ...common import log, get_files
+from ...common import log, get_files, profile_args, profile_start
 from ...common import constants as cons
 
 
@@ -162,7 +164,9 @@ if __name__ == '__main__':
     parser.add_argument('img2', default='./', help='image of end date')
     parser.add_argument('ori', default='./', help='origin of cache files')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # get type
     if args.pattern[-3:] == 'npz':
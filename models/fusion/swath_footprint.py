@@ -4,9 +4,13 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -e (epsg): coordinate system in EPSG
         -R (recursive): recursive when searching, or not
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -14,12 +18,14 @@
 import os
 import argparse
 
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 from ...io import csv2shape
 
 
 def batch_swath_footprint(pattern, ori, des, epsg=3857, overwrite=False,
-                            recursive=False, batch=[1,1]):
+                            recursive=False, batch=[1,1],
+                            cost='NA', queue='NA'):
     """ Get observation footprint from swath data and save as shapefile
 
     Args:
@@ -30,6 +36,8 @@ def batch_swath_footprint(pattern, ori, des, epsg=3857, overwrite=False,
         recursive (bool): recursive when searching file, or not
         overwrite (bool): overwrite or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -63,9 +71,13 @@ def batch_swath_footprint(pattern, ori, des, epsg=3857, overwrite=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        csv_list, done = queue_works(csv_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        csv_list = manage_batch(csv_list, batch[0], batch[1])
+        csv_list = manage_batch(csv_list, batch[0], batch[1], cost)
         n = len(csv_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -78,6 +90,8 @@ def batch_swath_footprint(pattern, ori, des, epsg=3857, overwrite=False,
                         '{}/{}.shp'.format(des, swath[1].split('.csv')[0]),
                         'ellipse', epsg, overwrite, False) == 0:
             count += 1
+            if done != 'NA':
+                done(swath)
 
     # done
     log.info('Process completed.')
@@ -94,6 +108,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, thisjob and totaljob')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-e', '--epsg', action='store', type=int, dest='epsg',
                         default=3857, help='coordinate system in EPSG')
     parser.add_argument('-R', '--recursive', action='store_true',
@@ -102,7 +120,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -117,6 +137,10 @@ if __name__ == '__main__':
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
     log.info('EPSG:{}'.format(args.epsg))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -124,4 +148,5 @@ if __name__ == '__main__':
 
     # run function to generate footprint files
     batch_swath_footprint(args.pattern, args.ori, args.des, args.epsg,
-                            args.overwrite, args.recursive, args.batch)
+                            args.overwrite, args.recursive, args.batch,
+                            args.cost, args.queue)
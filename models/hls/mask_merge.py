@@ -3,8 +3,12 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         mask: mask location
         des: destination
@@ -18,11 +22,12 @@ from osgeo import gdal
 
 from ...io import stackMerge
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 
 
 def merge_mask(pattern, ori, des, mask, overwrite=False, recursive=False,
-                    batch=[1,1]):
+                    batch=[1,1], cost='NA', queue='NA'):
     """ converting masks to stacked images
 
     Args:
@@ -33,6 +38,8 @@ def merge_mask(pattern, ori, des, mask, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -66,9 +73,13 @@ def merge_mask(pattern, ori, des, mask, overwrite=False, recursive=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        img_list, done = queue_works(img_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        img_list = manage_batch(img_list, batch[0], batch[1])
+        img_list = manage_batch(img_list, batch[0], batch[1], cost)
         n = len(img_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -96,6 +107,8 @@ def merge_mask(pattern, ori, des, mask, overwrite=False, recursive=False,
             if stackMerge(stacks, os.path.join(des, img[1]), gdal.GDT_Int16,
                             overwrite) == 0:
                 count += 1
+                if done != 'NA':
+                    done(img)
 
     # done
     log.info('Process completed.')
@@ -112,6 +125,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
@@ -119,7 +136,9 @@ if __name__ == '__main__':
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('mask', default='./', help='mask location')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -134,6 +153,10 @@ if __name__ == '__main__':
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
     log.info('Masks in {}'.format(args.mask))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -141,4 +164,4 @@ if __name__ == '__main__':
 
     # run function merge masks and image
     merge_mask(args.pattern, args.ori, args.des, args.mask, args.overwrite,
-                        args.recursive, args.batch)
+                        args.recursive, args.batch, args.cost, args.queue)
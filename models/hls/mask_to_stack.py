@@ -3,9 +3,13 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -m (mask): mask source, e.g. fmask
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -18,11 +22,12 @@ from osgeo import gdal
 
 from ...io import mn2ln, bit2mask, mask2array, hdr2geo, stackGeo, array2stack
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 
 
 def mask_to_stack(pattern, ori, des, _source, overwrite=False, recursive=False,
-                    batch=[1,1]):
+                    batch=[1,1], cost='NA', queue='NA'):
     """ converting masks to stacked images
 
     Args:
@@ -33,6 +38,8 @@ def mask_to_stack(pattern, ori, des, _source, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -66,9 +73,13 @@ def mask_to_stack(pattern, ori, des, _source, overwrite=False, recursive=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        mask_list, done = queue_works(mask_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        mask_list = manage_batch(mask_list, batch[0], batch[1])
+        mask_list = manage_batch(mask_list, batch[0], batch[1], cost)
         n = len(mask_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -89,6 +100,8 @@ def mask_to_stack(pattern, ori, des, _source, overwrite=False, recursive=False,
                         ['{} {}m'.format(_source, res)], cons.MASK_NODATA,
                         gdal.GDT_Int16, overwrite) == 0:
             count += 1
+            if done != 'NA':
+                done(mask)
 
     # done
     log.info('Process completed.')
@@ -105,6 +118,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-m', '--mask', action='store', type=str, dest='mask',
                         default='fmask', help='mask source')
     parser.add_argument('-R', '--recursive', action='store_true',
@@ -113,7 +130,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -128,6 +147,10 @@ if __name__ == '__main__':
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
     log.info('Mask generated by {}.'.format(args.mask))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -135,4 +158,4 @@ if __name__ == '__main__':
 
     # run function to convert masks
     mask_to_stack(args.pattern, args.ori, args.des, args.mask, args.overwrite,
-                        args.recursive, args.batch)
+                        args.recursive, args.batch, args.cost, args.queue)
@@ -3,8 +3,12 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -17,11 +21,12 @@ from osgeo import gdal
 
 from ...io import stackGeo, stack2array, array2stack, ln2tn
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 
 
 def prepare_tmask(pattern, ori, des, overwrite=False, recursive=False,
-                    batch=[1,1]):
+                    batch=[1,1], cost='NA', queue='NA'):
     """ converting sentinel images to stacked images
 
     Args:
@@ -31,6 +36,8 @@ def prepare_tmask(pattern, ori, des, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -64,9 +71,13 @@ def prepare_tmask(pattern, ori, des, overwrite=False, recursive=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        hls_list, done = queue_works(hls_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        hls_list = manage_batch(hls_list, batch[0], batch[1])
+        hls_list = manage_batch(hls_list, batch[0], batch[1], cost)
         n = len(hls_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -87,6 +98,8 @@ def prepare_tmask(pattern, ori, des, overwrite=False, recursive=False,
                             cons.NODATA, gdal.GDT_Int16, overwrite, 'ENVI',
                             ['INTERLEAVE=BIP']) == 0:
                 count += 1
+                if done != 'NA':
+                    done(img)
             else:
                 log.warning('Failed to write output for {}'.format(img[1]))
         except:
@@ -107,13 +120,19 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -127,6 +146,10 @@ if __name__ == '__main__':
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -134,4 +157,4 @@ if __name__ == '__main__':
 
     # run function to prepare HLS data for Tmask
     prepare_tmask(args.pattern, args.ori, args.des, args.overwrite,
-                    args.recursive, args.batch)
+                    args.recursive, args.batch, args.cost, args.queue)
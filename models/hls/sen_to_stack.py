@@ -3,8 +3,13 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
+        --depth: works prefetched between stages, 0 for serial
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -15,13 +20,15 @@ import argparse
 
 from osgeo import gdal
 
-from ...io import sen2stack, sn2ln
+from ...io import sn2ln, senRead, senResample, senWrite
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_pipe, run_pipeline,
+                        profile_args, profile_start)
 
 
 def sen_to_stack(pattern, ori, des, overwrite=False, recursive=False,
-                    batch=[1,1]):
+                    batch=[1,1], cost='NA', queue='NA',
+                    depth=cons.PIPE_DEPTH):
     """ converting sentinel images to stacked images
 
     Args:
@@ -31,6 +38,9 @@ def sen_to_stack(pattern, ori, des, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
+        depth (int): works prefetched between stages, 0 for serial
 
     Returns:
         0: successful
@@ -64,21 +74,35 @@ def sen_to_stack(pattern, ori, des, overwrite=False, recursive=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        sen_list, done = queue_pipe(sen_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        sen_list = manage_batch(sen_list, batch[0], batch[1])
+        sen_list = manage_batch(sen_list, batch[0], batch[1], cost)
         n = len(sen_list)
         log.info('{} files to be processed by this job.'.format(n))
 
+    # stages of the pipeline
+    def _des(img):
+        return '{}.tif'.format(os.path.join(des, sn2ln(img[1])))
+
+    def _read(img):
+        log.info('Processing {}'.format(img[1]))
+        if (not overwrite) and os.path.isfile(_des(img)):
+            raise IOError('{} already exists'.format(_des(img)))
+        return senRead(os.path.join(img[0], img[1][:-6]))
+
+    def _process(img, sen_data):
+        return senResample(sen_data)
+
+    def _write(img, sen_data):
+        return senWrite(sen_data, _des(img), overwrite)
+
     # loop through all files
-    count = 0
     log.info('Start processing files...')
-    for img in sen_list:
-        log.info('Processing {}'.format(img[1]))
-        if sen2stack(os.path.join(img[0], img[1][:-6]),
-                        '{}.tif'.format(os.path.join(des, sn2ln(img[1]))),
-                        overwrite) == 0:
-            count += 1
+    count = run_pipeline(sen_list, _read, _process, _write, depth, done)[0]
 
     # done
     log.info('Process completed.')
@@ -95,13 +119,22 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
+    parser.add_argument('--depth', action='store', type=int, dest='depth',
+                        default=cons.PIPE_DEPTH,
+                        help='pipeline depth, 0 for serial')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -115,6 +148,11 @@ if __name__ == '__main__':
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
+    log.info('Pipeline depth {}'.format(args.depth))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -122,4 +160,5 @@ if __name__ == '__main__':
 
     # run function to convert sentinel
     sen_to_stack(args.pattern, args.ori, args.des, args.overwrite,
-                    args.recursive, args.batch)
+                    args.recursive, args.batch, args.cost, args.queue,
+                    args.depth)
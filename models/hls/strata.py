@@ -3,11 +3,15 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -m (mask): mask bands
         -v (value): mask value
         -r (reclass): reclassify results
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -20,11 +24,13 @@ from osgeo import gdal
 
 from ...io import mask2strata, stack2array, array2stack, stackGeo
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch, reclassify
+from ...common import (log, get_files, manage_batch, queue_works, reclassify,
+                        profile_args, profile_start)
 
 
 def create_strata(pattern, mask, value, ori, des, reclass=False,
-                    overwrite=False, recursive=False, batch=[1,1]):
+                    overwrite=False, recursive=False, batch=[1,1],
+                    cost='NA', queue='NA'):
     """ create stratification from masks
 
     Args:
@@ -37,6 +43,8 @@ def create_strata(pattern, mask, value, ori, des, reclass=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -70,9 +78,13 @@ def create_strata(pattern, mask, value, ori, des, reclass=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        img_list, done = queue_works(img_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        img_list = manage_batch(img_list, batch[0], batch[1])
+        img_list = manage_batch(img_list, batch[0], batch[1], cost)
         n = len(img_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -91,6 +103,8 @@ def create_strata(pattern, mask, value, ori, des, reclass=False,
                         ['Strata'], cons.MASK_NODATA, gdal.GDT_Int16,
                         overwrite) == 0:
             count += 1
+            if done != 'NA':
+                done(img)
 
     # done
     log.info('Process completed.')
@@ -107,6 +121,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-m', '--mask', action='store', type=int, nargs='+',
                         dest='mask', default=[9,10,11], help='mask bands')
     parser.add_argument('-v', '--value', action='store', type=int, nargs='+',
@@ -120,7 +138,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -137,6 +157,10 @@ if __name__ == '__main__':
     log.info('Mask value: {}'.format(args.value))
     if args.reclass:
         log.info('Reclassify results.')
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -144,4 +168,5 @@ if __name__ == '__main__':
 
     # run function to create strata
     create_strata(args.pattern, args.mask, args.value, args.ori, args.des,
-                    args.reclass, args.overwrite, args.recursive, args.batch)
+                    args.reclass, args.overwrite, args.recursive, args.batch,
+                    args.cost, args.queue)
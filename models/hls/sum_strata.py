@@ -2,22 +2,76 @@
 
     Args:
         -p (pattern): searching pattern
+        -a (all): report all strata found, not just the HLS strata
+        -w (workers): files processed at the same time
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
-        des: destination
+        des: destination, breakdown of each file saved as <des>_files.csv
 
 """
 import os
+import sys
 import argparse
 import numpy as np
 
-from ...io import stack2array
+from concurrent.futures import ThreadPoolExecutor
+
+from ...io import stack2blocks, list2csv
 from ...common import constants as cons
-from ...common import log, get_files
+from ...common import log, get_files, profile_args, profile_start
+
+
+def strata_histogram(_file, lines=cons.BLOCK_LINES):
+    """ count pixels of each strata in all bands of an image, block by block
+        of lines with one bincount per block
 
+    Args:
+        _file (str): path and file name of strata image
+        lines (int): number of lines per block
+
+    Returns:
+        hist (dic): number of pixels by strata
 
-def sum_strata(pattern, ori, des, overwrite=False, recursive=False):
+    """
+    hist = {}
+    for row, array in stack2blocks(_file, 0, lines, np.int64):
+        low = int(array.min())
+        count = np.bincount((array - low).ravel())
+        for x in np.nonzero(count)[0].tolist():
+            hist[x + low] = hist.get(x + low, 0) + int(count[x])
+    return hist
+
+
+def strata_files(files, workers=cons.STRATA_WORKERS):
+    """ count pixels of each strata in many images, images are processed at
+        the same time by a pool of threads
+
+    Args:
+        files (list, str): path and file name of strata images
+        workers (int): files processed at the same time
+
+    Yields:
+        _file (str): path and file name of image, in order of files
+        hist (dic): number of pixels by strata, NA if failed
+
+    """
+    def _hist(_file):
+        try:
+            return strata_histogram(_file)
+        except:
+            log.warning('Failed to process {}'.format(_file))
+            return 'NA'
+
+    with ThreadPoolExecutor(max(workers, 1)) as pool:
+        for _file, hist in zip(files, pool.map(_hist, files)):
+            yield _file, hist
+
+
+def sum_strata(pattern, ori, des, overwrite=False, recursive=False,
+                _all=False, workers=cons.STRATA_WORKERS):
     """ summarize stratification statistics
 
     Args:
@@ -26,6 +80,8 @@ def sum_strata(pattern, ori, des, overwrite=False, recursive=False):
         des (str): place to save outputs
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
+        _all (bool): report all strata found, or just cons.STRATA
+        workers (int): files processed at the same time
 
     Returns:
         0: successful
@@ -36,14 +92,17 @@ def sum_strata(pattern, ori, des, overwrite=False, recursive=False):
 
     """
     # check if output already exists
-    if (not overwrite) and os.path.isfile(des):
-        log.error('{} already exists.'.format(os.path.basename(des)))
-        return 1
+    des2 = '{}_files.csv'.format(os.path.splitext(des)[0])
+    for x in [des, des2]:
+        if (not overwrite) and os.path.isfile(x):
+            log.error('{} already exists.'.format(os.path.basename(x)))
+            return 1
 
     # locate files
     log.info('Locating files...'.format(ori))
     try:
         strata_list = get_files(ori, pattern, recursive)
+        strata_list = [os.path.join(x[0], x[1]) for x in strata_list]
         n = len(strata_list)
     except:
         log.error('Failed to search for {}'.format(pattern))
@@ -55,24 +114,38 @@ def sum_strata(pattern, ori, des, overwrite=False, recursive=False):
         else:
             log.info('Found {} files.'.format(n))
 
-    # loop through all files
+    # count each file and merge as files are done
     count = 0
-    r = np.zeros((len(cons.STRATA), 2))
-    r[:, 0] = cons.STRATA
+    total = {}
+    breakdown = []
     log.info('Start processing files...')
-    for strata in strata_list:
-        log.info('Processing {}'.format(strata[1]))
-        array = stack2array(os.path.join(strata[0], strata[1]))
-        for x in cons.STRATA:
-            r[(r[:, 0] == x), 1] += (array == x).sum()
+    for strata, hist in strata_files(strata_list, workers):
+        if hist == 'NA':
+            continue
+        log.info('Processed {}'.format(os.path.basename(strata)))
+        breakdown.append([os.path.basename(strata), hist])
+        for x in hist:
+            total[x] = total.get(x, 0) + hist[x]
         count += 1
 
+    # strata to report, percent of pixels in reported strata
+    codes = sorted(set(total) | set(cons.STRATA)) if _all else cons.STRATA
+
+    def _table(hist, name=[]):
+        pixels = [hist.get(x, 0) for x in codes]
+        _sum = max(sum(pixels), 1)
+        return [name + [x, y, y / _sum * 100] for x, y in zip(codes, pixels)]
+
     # write output
-    try:
-        np.savetxt(des, r, delimiter=',', fmt='%d')
-    except:
-        log.error('Failed to write output to: {}'.format(des))
-        return 4
+    result = [['strata', 'pixels', 'percent']] + _table(total)
+    result2 = [['file', 'strata', 'pixels', 'percent']]
+    for name, hist in breakdown:
+        result2 += _table(hist, [name])
+    for table, _file in [[result, des], [result2, des2]]:
+        log.info('Writing output: {}'.format(_file))
+        if list2csv(table, _file, overwrite) > 0:
+            log.error('Failed to write output to: {}'.format(_file))
+            return 4
 
     # done
     log.info('Process completed.')
@@ -86,23 +159,34 @@ if __name__ == '__main__':
     parser.add_argument('-p', '--pattern', action='store', type=str,
                         dest='pattern', default='*strata*tif',
                         help='searching pattern')
+    parser.add_argument('-a', '--all', action='store_true',
+                        help='report all strata found')
+    parser.add_argument('-w', '--workers', action='store', type=int,
+                        dest='workers', default=cons.STRATA_WORKERS,
+                        help='files processed at the same time')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start summarizing strata...')
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving as {}'.format(args.des))
+    log.info('Processing {} files at a time.'.format(args.workers))
+    if args.all:
+        log.info('Reporting all strata found.')
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to summarizing strata
-    sum_strata(args.pattern, args.ori, args.des, args.overwrite, args.recursive)
+    sys.exit(sum_strata(args.pattern, args.ori, args.des, args.overwrite,
+                        args.recursive, args.all, args.workers))
@@ -5,8 +5,12 @@
         -g (grid): gridding resolution in degree
         -c (comp): compositing time interval (d or w)
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -19,11 +23,12 @@ from osgeo import gdal
 
 from ...io import sifn2ln, sif2grid, sifn2date
 from ...common import constants as cons
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, get_cost,
+                        profile_args, profile_start)
 
 
 def sif_to_grid(pattern, res, comp, ori, des, overwrite=False, recursive=False,
-                    batch=[1,1]):
+                    batch=[1,1], cost='NA', queue='NA'):
     """ grid SIF netCDF and save as stacked images
 
     Args:
@@ -35,6 +40,8 @@ def sif_to_grid(pattern, res, comp, ori, des, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -90,34 +97,43 @@ def sif_to_grid(pattern, res, comp, ori, des, overwrite=False, recursive=False,
                     md.append(year*1000+week*7+1)
     elif comp == 'd':
         sif_list2 = [[os.path.join(x[0], x[1])] for x in sif_list]
+        md = [0] * len(sif_list2)
     else:
         log.error('Invalid compositing time interval {}'.format(comp))
         return 4
 
     # handle batch processing
-    if batch[1] > 1:
+    works = [[x, md[i]] for i, x in enumerate(sif_list2)]
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        works, done = queue_works(works, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        sif_list2 = manage_batch(sif_list2, batch[0], batch[1])
-        if comp == 'w':
-            md = manage_batch(md, batch[0], batch[1])
-        n = len(sif_list2)
+        if cost != 'NA':
+            cost = get_cost(sif_list2, cost)
+        works = manage_batch(works, batch[0], batch[1], cost)
+        n = len(works)
         log.info('{} files to be processed by this job.'.format(n))
 
     # loop through all files
     count = 0
     log.info('Start processing files...')
-    for i, sif in enumerate(sif_list2):
+    for work in works:
+        sif, mdoy = work
         log.info('Processing {}'.format(sif[0]))
         if comp == 'd':
-            if sif2grid(sif, '{}.tif'.format(os.path.join(des,
-                        sifn2ln(os.path.basename(sif[0]), res))), res,
-                        overwrite) == 0:
-                count += 1
+            ret = sif2grid(sif, '{}.tif'.format(os.path.join(des,
+                            sifn2ln(os.path.basename(sif[0]), res))), res,
+                            overwrite)
         elif comp == 'w':
-            if sif2grid(sif, '{}.tif'.format(os.path.join(des,
-                        sifn2ln(os.path.basename(sif[0]), res, 'WA', md[i]))),
-                        res, overwrite) == 0:
-                count += 1
+            ret = sif2grid(sif, '{}.tif'.format(os.path.join(des,
+                            sifn2ln(os.path.basename(sif[0]), res, 'WA',
+                            mdoy))), res, overwrite)
+        if ret == 0:
+            count += 1
+            if done != 'NA':
+                done(work)
 
     # done
     log.info('Process completed.')
@@ -138,13 +154,19 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -160,6 +182,10 @@ if __name__ == '__main__':
     log.info('Looking for {}'.format(args.pattern))
     log.info('In {}'.format(args.ori))
     log.info('Saving in {}'.format(args.des))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -167,4 +193,5 @@ if __name__ == '__main__':
 
     # run function to grid SIF
     sif_to_grid(args.pattern, args.grid, args.comp, args.ori, args.des,
-                args.overwrite, args.recursive, args.batch)
+                args.overwrite, args.recursive, args.batch, args.cost,
+                args.queue)
@@ -4,6 +4,8 @@
         -t (type): output map type
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
         img: an example image to get the spatial reference
@@ -15,7 +17,8 @@ import numpy as np
 
 from osgeo import gdal
 
-from ...common import log, get_files, get_int, show_progress
+from ...common import (log, get_files, get_int, show_progress, profile_args,
+                        profile_start)
 from ...common import constants as cons
 from ...io import stackGeo, cache2map, array2stack
 
@@ -109,7 +112,9 @@ if __name__ == '__main__':
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
     parser.add_argument('img', default='./', help='example image')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start classfying...')
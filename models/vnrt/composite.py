@@ -3,8 +3,12 @@
     Args:
         -p (pattern): searching pattern of terra images
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         terra: origin of terra images
         aqua: origin of aqua images
         des: destination
@@ -14,12 +18,13 @@ import os
 import sys
 import argparse
 
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 from ...io import modis2composite
 
 
 def modis_composite(pattern, terra, aqua, des, overwrite=False, recursive=False,
-                        batch=[1,1]):
+                        batch=[1,1], cost='NA', queue='NA'):
     """ preprocess VIIRS data
 
     Args:
@@ -30,6 +35,8 @@ def modis_composite(pattern, terra, aqua, des, overwrite=False, recursive=False,
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -63,9 +70,13 @@ def modis_composite(pattern, terra, aqua, des, overwrite=False, recursive=False,
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        terra_list, done = queue_works(terra_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        terra_list = manage_batch(terra_list, batch[0], batch[1])
+        terra_list = manage_batch(terra_list, batch[0], batch[1], cost)
         n = len(terra_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -82,6 +93,8 @@ def modis_composite(pattern, terra, aqua, des, overwrite=False, recursive=False,
                             os.path.join(img2[0][0], img2[0][1]), des,
                             overwrite) == 0:
             count += 1
+            if done != 'NA':
+                done(img)
 
     # done
     log.info('Process completed.')
@@ -98,6 +111,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
@@ -105,7 +122,9 @@ if __name__ == '__main__':
     parser.add_argument('terra', default='./', help='terra origin')
     parser.add_argument('aqua', default='./', help='aqua origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -120,6 +139,10 @@ if __name__ == '__main__':
     log.info('Terra In {}'.format(args.terra))
     log.info('Aqua In {}'.format(args.aqua))
     log.info('Saving in {}'.format(args.des))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -127,4 +150,5 @@ if __name__ == '__main__':
 
     # run function to create composite
     modis_composite(args.pattern, args.terra, args.aqua, args.des,
-                    args.overwrite, args.recursive, args.batch)
+                    args.overwrite, args.recursive, args.batch, args.cost,
+                    args.queue)
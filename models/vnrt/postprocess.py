@@ -4,24 +4,65 @@
         -w (window): window size, how much extent out from the center pixel
         -t (threshold): clean up threshold
         -d (date): try to clean up the date images in the same folder as well
+        -n (processes): number of processes running tiles
+        -m (mmu): remove change patches smaller than this many pixels
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
 """
 import os
+import sys
 import argparse
 import numpy as np
 
 from osgeo import gdal
 
-from ...common import log, clean_up, get_files
+from ...common import log, clean_up, get_files, profile_args, profile_start
 from ...common import constants as cons
-from ...io import stack2array, stackGeo, array2stack
+from ...io import stackGeo, focal2stack
+from .sieve import sieve
 
 
-def vnrt_postprocess(ori, des, w=1, t=2, d=False, overwrite=False):
-    """ postprocess VNRT result
+def postprocess_tile(array, w=1, t=2):
+    """ clean up a tile of VNRT result, keeping partial change
+
+    Args:
+        array (ndarray): tile of VNRT result
+        w (int): window size, how much extent out from the center pixel
+        t (int): clean up threhold
+
+    Returns:
+        array (ndarray): cleaned up tile
+
+    """
+    array2 = np.copy(array)
+    array[array == cons.PC] = cons.CHANGE
+    array = clean_up(array, w, t)
+    array[(array == cons.CHANGE) & (array2 == cons.PC)] = cons.PC
+    return array
+
+
+def clean_date(array, date):
+    """ remove dates of pixels that are no longer change
+
+    Args:
+        array (ndarray): tile of post-processed VNRT result
+        date (ndarray): tile of date image
+
+    Returns:
+        date (ndarray): cleaned up date
+
+    """
+    date[(array != cons.CHANGE) & (array != cons.PC)] = cons.NODATA
+    return date
+
+
+def vnrt_postprocess(ori, des, w=1, t=2, d=False, overwrite=False,
+                        workers=cons.TILE_WORKERS, mmu=0):
+    """ postprocess VNRT result, tile by tile with a halo of window size
 
     Args:
         ori (str): input image
@@ -30,6 +71,10 @@ def vnrt_postprocess(ori, des, w=1, t=2, d=False, overwrite=False):
         t (int): clean up threhold
         d (bool): try to clean up the date images, or not
         overwrite (bool): overwrite or not
+        workers (int): number of processes running tiles
+        mmu (int): remove change patches smaller than this many pixels after
+            clean up, 0 for none, statistics of patches are saved next to
+            des with first change date from the doc image in the same folder
 
     Returns:
         0: successful
@@ -48,51 +93,57 @@ def vnrt_postprocess(ori, des, w=1, t=2, d=False, overwrite=False):
     log.info('Reading input image: {}'.format(ori))
     try:
         geo = stackGeo(ori)
-        array = stack2array(ori, 1)
     except:
         log.error('Failed to read input image: {}'.format(ori))
         return 2
 
     # post-processing
     log.info('Start post-processing...')
-    try:
-        array2 = np.copy(array)
-        array[array == cons.PC] = cons.CHANGE
-        array = clean_up(array, w, t)
-        array[(array == cons.CHANGE) & (array2 == cons.PC)] = cons.PC
-        array2 = None
-    except:
-        log.error('Failed to clean up.')
+    des2 = ('{}_nosieve.tif'.format(os.path.splitext(des)[0]) if mmu > 0
+            else des)
+    if focal2stack(postprocess_tile, ori, des2, geo, w, (w, t),
+                    ['Post-processed Map'], cons.NODATA, gdal.GDT_Int16,
+                    np.int16, overwrite, workers) > 0:
+        log.error('Failed to clean up to {}'.format(des2))
         return 3
 
+    # minimum mapping unit
+    if mmu > 0:
+        log.info('Removing patches under {} pixels...'.format(mmu))
+        doc = [x for x in get_files(os.path.dirname(ori), '*doc*.tif', False)
+                if not x[1].endswith('_clean.tif')]
+        doc = os.path.join(doc[0][0], doc[0][1]) if len(doc) > 0 else 'NA'
+        r = sieve(des2, des, mmu, doc=doc, stats='{}_patches.csv'.format(
+                    os.path.splitext(des)[0]), overwrite=overwrite)
+        os.remove(des2)
+        if r > 0:
+            log.error('Failed to remove small patches.')
+            return 3
+
     # clean up date images as well
     if d:
         log.info('Attempt to clean up date images...')
         _path = os.path.dirname(ori)
-        d_list = get_files(_path,'*do*.tif')
+        d_list = [x for x in get_files(_path, '*do*.tif')
+                    if not x[1].endswith('_clean.tif')]
         if len(d_list) > 0:
             for img in d_list:
-                try:
-                    img2 = stack2array(os.path.join(img[0],img[1]), 1, np.int32)
-                    img2[(array!=cons.CHANGE) & (array!=cons.PC)] = cons.NODATA
-                    if array2stack(img2, geo, os.path.join(img[0],
-                                    '{}_clean.tif'.format(img[1][:-4])),
-                                    ['Post-processed Date Image'], cons.NODATA,
-                                    gdal.GDT_Int32, overwrite=overwrite) > 0:
-                        log.warning('Failed to export {}'.format(img[1]))
-                    log.info('Cleaned up {}'.format(img[1]))
-                except:
+                r = focal2stack(clean_date, [des, os.path.join(img[0],
+                                img[1])], os.path.join(img[0],
+                                '{}_clean.tif'.format(img[1][:-4])), geo, 0,
+                                (), ['Post-processed Date Image'],
+                                cons.NODATA, gdal.GDT_Int32, np.int32,
+                                overwrite, workers)
+                if r == 1:
+                    log.warning('Failed to export {}'.format(img[1]))
+                elif r > 1:
                     log.warning('Failed to clean up {}'.format(img[1]))
                     return 4
+                else:
+                    log.info('Cleaned up {}'.format(img[1]))
         else:
             log.warning('Found no date image.')
 
-    # writing output
-    log.info('Writing output to: {}'.format(des))
-    if array2stack(array, geo, des, ['Post-processed Map'], cons.NODATA,
-                    overwrite=overwrite) > 0:
-        log.error('Faield to write output to {}'.format(des))
-
     # done
     log.info('Process completed.')
     return 0
@@ -109,11 +160,18 @@ if __name__ == '__main__':
                         help='clean up threshold')
     parser.add_argument('-d', '--date', action='store_true',
                         help='look for date images in the same folder')
+    parser.add_argument('-n', '--processes', action='store', type=int,
+                        dest='processes', default=cons.TILE_WORKERS,
+                        help='number of processes running tiles')
+    parser.add_argument('-m', '--mmu', action='store', type=int, dest='mmu',
+                        default=0, help='minimum mapping unit in pixels')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start postprocessing...')
@@ -121,9 +179,13 @@ if __name__ == '__main__':
     log.info('Saving in {}'.format(args.des))
     log.info('Window size {}, clean up threshold {}.'.format(args.window,
                                                                 args.threshold))
+    log.info('Running tiles in {} processes.'.format(args.processes))
+    if args.mmu > 0:
+        log.info('Minimum mapping unit {} pixels.'.format(args.mmu))
     if args.overwrite:
         log.info('Overwriting old files.')
 
     # run function to preprocess data
-    vnrt_postprocess(args.ori, args.des, args.window, args.threshold, args.date,
-                        args.overwrite)
+    sys.exit(vnrt_postprocess(args.ori, args.des, args.window, args.threshold,
+                                args.date, args.overwrite, args.processes,
+                                args.mmu))
@@ -3,9 +3,13 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -R (recursive): recursive when seaching files
         -Q (mgq): location of 250m MODIS data
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -14,12 +18,13 @@ import os
 import sys
 import argparse
 
-from ...common import log, get_files, manage_batch
+from ...common import (log, get_files, manage_batch, queue_works, profile_args,
+                        profile_start)
 from ...io import modis2stack
 
 
 def modis_preprocess(pattern, ori, des, mgq='NA', overwrite=False, recursive=False,
-                        batch=[1,1]):
+                        batch=[1,1], cost='NA', queue='NA'):
     """ preprocess VIIRS data
 
     Args:
@@ -30,6 +35,8 @@ def modis_preprocess(pattern, ori, des, mgq='NA', overwrite=False, recursive=Fal
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -63,9 +70,13 @@ def modis_preprocess(pattern, ori, des, mgq='NA', overwrite=False, recursive=Fal
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        img_list, done = queue_works(img_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        img_list = manage_batch(img_list, batch[0], batch[1])
+        img_list = manage_batch(img_list, batch[0], batch[1], cost)
         n = len(img_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -89,6 +100,8 @@ def modis_preprocess(pattern, ori, des, mgq='NA', overwrite=False, recursive=Fal
         if modis2stack(os.path.join(img[0], img[1]), des, mgq_img,
                         overwrite) == 0:
             count += 1
+            if done != 'NA':
+                done(img)
 
     # done
     log.info('Process completed.')
@@ -105,6 +118,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, [thisjob, totaljob]')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('-Q', '--mgq', action='store', type=str,
@@ -114,7 +131,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -130,6 +149,10 @@ if __name__ == '__main__':
     log.info('Saving in {}'.format(args.des))
     if args.mgq != 'NA':
         log.info('Looking for 250m data in {}'.format(args.mgq))
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -137,4 +160,4 @@ if __name__ == '__main__':
 
     # run function to preprocess data
     modis_preprocess(args.pattern, args.ori, args.des, args.mgq, args.overwrite,
-                        args.recursive, args.batch)
+                        args.recursive, args.batch, args.cost, args.queue)
@@ -0,0 +1,376 @@
+""" Module for removing change patches smaller than a minimum mapping unit
+
+    Args:
+        -m (mmu): minimum mapping unit in pixels
+        -c (connectivity): 4 or 8 connected patches
+        -r (replace): value of removed patches, NA for majority of neighbours
+        -d (doc): date of change image for first change date of patches
+        -s (stats): csv file to save statistics of patches
+        --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        ori: origin
+        des: destination
+
+"""
+import os
+import sys
+import argparse
+import itertools
+import numpy as np
+
+from osgeo import gdal
+from scipy import ndimage as nd
+
+from ...common import log, profile_args, profile_start
+from ...common import constants as cons
+from ...io import stackGeo, stack2blocks, blocks2stack, list2csv
+
+
+# change values that make up patches
+SIEVE_VALUES = (cons.CHANGE, cons.PC)
+
+# offset that makes map values positive in neighbour keys
+_SHIFT = 32768
+
+
+def label_strip(array, top, nrow, values=SIEVE_VALUES, connectivity=8):
+    """ label change patches of a strip of lines
+
+    Args:
+        array (ndarray): strip with a line of halo, as from stack2blocks
+        top (int): lines of halo above the strip
+        nrow (int): lines of strip
+        values (tuple): change values that make up patches
+        connectivity (int): 4 or 8 connected patches
+
+    Returns:
+        labels (ndarray): 1 based patch of each pixel of strip, 0 for none
+        n (int): number of patches
+
+    """
+    if connectivity == 4:
+        structure = nd.generate_binary_structure(2, 1)
+    else:
+        structure = nd.generate_binary_structure(2, 2)
+    return nd.label(np.isin(array[top:(top + nrow)], values), structure)
+
+
+def uf_find(parent, x):
+    """ root of a label, with path halving """
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def uf_union(parent, a, b):
+    """ join labels a and b, the smaller root wins """
+    a = uf_find(parent, a)
+    b = uf_find(parent, b)
+    if a < b:
+        parent[b] = a
+    elif b < a:
+        parent[a] = b
+
+
+def strip_pairs(last, first, connectivity=8):
+    """ labels touching across the boundary of two strips
+
+    Args:
+        last (ndarray): global labels of last line of upper strip
+        first (ndarray): global labels of first line of lower strip
+        connectivity (int): 4 or 8 connected patches
+
+    Returns:
+        pairs (ndarray): unique pairs of touching labels
+
+    """
+    pairs = [np.stack([last, first], axis=1)]
+    if connectivity == 8:
+        pairs.append(np.stack([last[1:], first[:-1]], axis=1))
+        pairs.append(np.stack([last[:-1], first[1:]], axis=1))
+    pairs = np.concatenate(pairs, axis=0)
+    pairs = pairs[(pairs[:, 0] > 0) & (pairs[:, 1] > 0)]
+    return np.unique(pairs, axis=0)
+
+
+def neighbour_keys(array, top, labels, values=SIEVE_VALUES,
+                    nodata=cons.NODATA, connectivity=8):
+    """ count values of pixels next to each patch, outside of patches
+
+    Args:
+        array (ndarray): strip with a line of halo, as from stack2blocks
+        top (int): lines of halo above the strip
+        labels (ndarray): global labels of strip
+        values (tuple): change values that make up patches
+        nodata (int): nodata value
+        connectivity (int): 4 or 8 connected patches
+
+    Returns:
+        keys (ndarray): label * 65536 + value + 32768 of each neighbour
+        counts (ndarray): number of neighbours of each key
+
+    """
+    nrow, ncol = labels.shape
+    if connectivity == 4:
+        offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    else:
+        offsets = [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1)
+                    if (i, j) != (0, 0)]
+    keys = []
+    for i, j in offsets:
+        # pixels of strip whose neighbour is within the array
+        r0 = max(0, -(top + i))
+        r1 = min(nrow, array.shape[0] - top - i)
+        c0 = max(0, -j)
+        c1 = min(ncol, ncol - j)
+        p = labels[r0:r1, c0:c1]
+        q = array[(r0 + top + i):(r1 + top + i), (c0 + j):(c1 + j)]
+        _index = (p > 0) & (~np.isin(q, values)) & (q != nodata)
+        keys.append(p[_index].astype(np.int64) * 65536 +
+                    q[_index].astype(np.int64) + _SHIFT)
+    return np.unique(np.concatenate(keys), return_counts=True)
+
+
+def sieve_patches(ori, doc='NA', values=SIEVE_VALUES, nodata=cons.NODATA,
+                    connectivity=8):
+    """ label change patches strip by strip and merge patches that cross
+        strips, keeping only one number per patch in memory
+
+    Args:
+        ori (str): input map
+        doc (str): date of change image, NA for none
+        values (tuple): change values that make up patches
+        nodata (int): nodata value
+        connectivity (int): 4 or 8 connected patches
+
+    Returns:
+        patches (dic): root, pixels, first pixel, first change date, and
+            majority neighbour value of each patch, by label, and offset of
+            labels of each strip
+
+    """
+    geo = stackGeo(ori)
+    parent = np.zeros(1024, np.int64)
+    pixels = [np.zeros(1, np.int64)]
+    first = [np.zeros(1, np.int64)]
+    dates = [np.zeros(1, np.int64)]
+    keys = []
+    counts = []
+    offsets = []
+    offset = 0
+    last = 'NA'
+    docs = (stack2blocks(doc, 1, _type=np.int32) if doc != 'NA'
+                else itertools.repeat('NA'))
+    for (row, array), _doc in zip(stack2blocks(ori, 1, halo=1), docs):
+        top = min(1, row)
+        nrow = min(cons.BLOCK_LINES, geo['lines'] - row)
+        labels, n = label_strip(array, top, nrow, values, connectivity)
+        offsets.append(offset)
+
+        # grow union find, each label starts as its own root
+        while parent.shape[0] <= offset + n:
+            parent = np.concatenate([parent, np.zeros(parent.shape[0],
+                                        np.int64)])
+        parent[(offset + 1):(offset + n + 1)] = np.arange(offset + 1,
+                                                        offset + n + 1)
+
+        # size and first pixel of labels
+        flat = labels.ravel()
+        pixels.append(np.bincount(flat, minlength=n + 1)[1:])
+        label, index = np.unique(flat, return_index=True)
+        first.append(index[label > 0] + row * geo['samples'])
+        labels = labels.astype(np.int64)
+        labels[labels > 0] += offset
+
+        # first change date of labels
+        if _doc == 'NA' or n == 0:
+            dates.append(np.zeros(n, np.int64) + np.iinfo(np.int64).max)
+        else:
+            _date = _doc[1].astype(np.int64)
+            _date[_date == cons.NODATA] = np.iinfo(np.int64).max
+            dates.append(nd.minimum(_date, labels, np.arange(offset + 1,
+                                    offset + n + 1)).astype(np.int64))
+
+        # values next to labels, and labels joined with the strip above
+        x, y = neighbour_keys(array, top, labels, values, nodata,
+                                connectivity)
+        keys.append(x)
+        counts.append(y)
+        if type(last) != str:
+            for a, b in strip_pairs(last, labels[0], connectivity):
+                uf_union(parent, a, b)
+        last = labels[-1].copy()
+        offset += n
+
+    # roots of all labels
+    root = parent[:(offset + 1)]
+    while True:
+        root2 = root[root]
+        if (root2 == root).all():
+            break
+        root = root2
+
+    # majority neighbour value of each root, smallest value if tied
+    keys = np.concatenate(keys) if len(keys) > 0 else np.zeros(0, np.int64)
+    counts = (np.concatenate(counts) if len(counts) > 0
+                else np.zeros(0, np.int64))
+    keys = root[keys // 65536] * 65536 + keys % 65536
+    keys, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, counts, len(keys))
+    order = np.lexsort((keys % 65536, -counts, keys // 65536))
+    roots, index = np.unique(keys[order] // 65536, return_index=True)
+    neighbour = np.zeros(offset + 1, np.int64) + nodata
+    neighbour[roots] = keys[order][index] % 65536 - _SHIFT
+
+    # patch statistics on roots
+    patches = {'root': root, 'offset': offsets, 'neighbour': neighbour}
+    patches['pixels'] = np.bincount(root, np.concatenate(pixels),
+                                    offset + 1).astype(np.int64)
+    patches['first'] = np.zeros(offset + 1, np.int64) + np.iinfo(np.int64).max
+    np.minimum.at(patches['first'], root, np.concatenate(first))
+    patches['date'] = np.zeros(offset + 1, np.int64) + np.iinfo(np.int64).max
+    np.minimum.at(patches['date'], root, np.concatenate(dates))
+    return patches
+
+
+def sieve(ori, des, mmu, connectivity=8, replace='NA', doc='NA', stats='NA',
+            overwrite=False):
+    """ remove change patches smaller than a minimum mapping unit, strip by
+        strip in two passes over the map
+
+    Args:
+        ori (str): input map
+        des (str): output map
+        mmu (int): minimum mapping unit in pixels
+        connectivity (int): 4 or 8 connected patches
+        replace (int): value of removed patches, NA for the most common
+            value along the edge of each patch, forest if there is none
+        doc (str): date of change image for first change date, NA for none
+        stats (str): csv file to save statistics of patches, NA for none
+        overwrite (bool): overwrite or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error labeling patches
+        3: error writing output
+        4: error writing statistics
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(os.path.basename(des)))
+        return 1
+
+    # first pass, label patches
+    log.info('Labeling patches...')
+    try:
+        geo = stackGeo(ori)
+        patches = sieve_patches(ori, doc, SIEVE_VALUES, cons.NODATA,
+                                connectivity)
+        root = patches['root']
+        roots = np.nonzero(root == np.arange(len(root)))[0][1:]
+        small = patches['pixels'] < mmu
+        small[0] = False
+        if replace == 'NA':
+            value = patches['neighbour']
+            value[value == cons.NODATA] = cons.FOREST
+        else:
+            value = np.zeros(len(root), np.int64) + replace
+    except:
+        log.error('Failed to label patches of {}'.format(ori))
+        return 2
+    log.info('Found {} patches, removing {} under {} pixels.'.format(
+                len(roots), np.count_nonzero(small[roots]), mmu))
+
+    # second pass, same labels again and replace small patches
+    log.info('Writing output: {}'.format(des))
+
+    def _sieve(block):
+        row, array = block
+        top = min(1, row)
+        nrow = min(cons.BLOCK_LINES, geo['lines'] - row)
+        labels, n = label_strip(array, top, nrow, SIEVE_VALUES, connectivity)
+        labels = labels.astype(np.int64)
+        labels[labels > 0] += patches['offset'][row // cons.BLOCK_LINES]
+        labels = root[labels]
+        array = array[top:(top + nrow)]
+        _index = small[labels]
+        array[_index] = value[labels[_index]]
+        return row, array
+
+    if blocks2stack(map(_sieve, stack2blocks(ori, 1, halo=1)), geo, des,
+                    ['Sieved Map'], cons.NODATA, gdal.GDT_Int16,
+                    overwrite) > 0:
+        log.error('Failed to write output to {}'.format(des))
+        return 3
+
+    # statistics of patches
+    if stats != 'NA':
+        log.info('Writing statistics: {}'.format(stats))
+        try:
+            area = abs(geo['geotrans'][1] * geo['geotrans'][5])
+            date = patches['date'][roots]
+            date[date == np.iinfo(np.int64).max] = cons.NODATA
+            table = [['id', 'row', 'col', 'pixels', 'area', 'first_change',
+                        'kept', 'value']]
+            for i, x in enumerate(roots):
+                table.append([i + 1, patches['first'][x] // geo['samples'],
+                                patches['first'][x] % geo['samples'],
+                                patches['pixels'][x],
+                                patches['pixels'][x] * area, date[i],
+                                int(not small[x]),
+                                value[x] if small[x] else 'NA'])
+            if list2csv(table, stats, overwrite) > 0:
+                return 4
+        except:
+            log.error('Failed to write statistics to {}'.format(stats))
+            return 4
+
+    # done
+    log.info('Process completed.')
+    return 0
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-m', '--mmu', action='store', type=int, dest='mmu',
+                        default=1, help='minimum mapping unit in pixels')
+    parser.add_argument('-c', '--connectivity', action='store', type=int,
+                        dest='connectivity', default=8, choices=[4, 8],
+                        help='4 or 8 connected patches')
+    parser.add_argument('-r', '--replace', action='store', type=int,
+                        dest='replace', default='NA',
+                        help='value of removed patches')
+    parser.add_argument('-d', '--doc', action='store', type=str, dest='doc',
+                        default='NA', help='date of change image')
+    parser.add_argument('-s', '--stats', action='store', type=str,
+                        dest='stats', default='NA',
+                        help='csv file of patch statistics')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='overwrite or not')
+    parser.add_argument('ori', default='./', help='origin')
+    parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
+    args = parser.parse_args()
+    profile_start(args, args.des)
+
+    # print logs
+    log.info('Start sieving...')
+    log.info('Input map {}'.format(args.ori))
+    log.info('Saving as {}'.format(args.des))
+    log.info('Minimum mapping unit {} pixels, {} connected.'.format(args.mmu,
+                args.connectivity))
+    if args.doc != 'NA':
+        log.info('Date of change from {}'.format(args.doc))
+    if args.stats != 'NA':
+        log.info('Statistics saved as {}'.format(args.stats))
+    if args.overwrite:
+        log.info('Overwriting old files.')
+
+    # run function to sieve map
+    sys.exit(sieve(args.ori, args.des, args.mmu, args.connectivity,
+                    args.replace, args.doc, args.stats, args.overwrite))
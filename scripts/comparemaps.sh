@@ -1,16 +1,17 @@
 #!/bin/bash
 
-# bash script to compare two maps
+# bash script to compare two or more maps
 
 # Input Arguments:
 #		-b bitshift
+#		-t output csv of transition matrix
 #		--overwrite overwrite
-#		map1: map1 origin
-#   map2: map2 origin
+#		maps: two or more maps in order
 #		des: destination
 
 # default values
 bit=3
+table=NA
 overwrite=''
 recursive=''
 
@@ -19,20 +20,23 @@ while [[ $# > 0 ]]; do
 	InArg="$1"
 	case $InArg in
 		-b)
-			bitshift=$2
+			bit=$2
+			shift
+			;;
+		-t)
+			table=$2
 			shift
 			;;
 		--overwrite)
 			overwrite='--overwrite '
 			;;
 		*)
-      map1=$1
-      map2=$2
-			des=$3
+			maps=${@:1:$#-1}
+			des=${@: -1}
 			break
 	esac
 	shift
 done
 
 # submit jobs
-qsub -j y -N CompareMap -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.chart.compare_maps ${overwrite}-b $bit $map1 $map2 $des
+qsub -j y -N CompareMap -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.chart.compare_maps ${overwrite}-b $bit -t $table $maps $des
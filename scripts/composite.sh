@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-R recursive
 #		--overwrite overwrite
 #		terra: terra origin
@@ -14,6 +16,8 @@
 # default values
 pattern=MOD*tif
 njob=1
+cost=''
+queue=''
 overwrite=''
 recursive=''
 
@@ -29,6 +33,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
 		-R)
 			recursive='-R '
 			;;
@@ -48,5 +60,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N Composite_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.composite ${overwrite}${recursive}-p $pattern -b $i $njob $terra $aqua $des
+    qsub -j y -N Composite_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.composite ${cost}${queue}${overwrite}${recursive}-p $pattern -b $i $njob $terra $aqua $des
 done
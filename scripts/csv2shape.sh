@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-R recursive
 #		--overwrite overwrite
 #		-e EPSG
@@ -14,6 +16,8 @@
 # default values
 pattern=M*csv
 njob=1
+cost=''
+queue=''
 overwrite=''
 recursive=''
 epsg=3857
@@ -30,6 +34,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
     -e)
 			epsg=$2
 			shift
@@ -52,5 +64,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
   echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N CSV2SHP_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.fusion.swath_footprint ${overwrite}${recursive}-p $pattern -b $i $njob -e $epsg $ori $des
+    qsub -j y -N CSV2SHP_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.fusion.swath_footprint ${cost}${queue}${overwrite}${recursive}-p $pattern -b $i $njob -e $epsg $ori $des
 done
@@ -3,6 +3,7 @@
 # bash script to get time series
 
 # Input Arguments:
+#		-p points, csv or shapefile of points instead of x and y
 #		--overwrite overwrite
 #   x: x
 #   y: y
@@ -13,6 +14,7 @@
 x=1
 y=1
 overwrite=''
+points=''
 
 # parse input arguments
 while [[ $# > 0 ]]; do
@@ -21,6 +23,14 @@ while [[ $# > 0 ]]; do
 		--overwrite)
 			overwrite='--overwrite '
 			;;
+		-p)
+			points="-p $2 "
+			ori=$3
+			des=$4
+			x=''
+			y=''
+			break
+			;;
 		*)
       x=$1
       y=$2
@@ -32,4 +42,4 @@ while [[ $# > 0 ]]; do
 done
 
 # submit jobs
-qsub -j y -N GetTS -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.tools.get_ts ${overwrite} $x $y $ori $des
+qsub -j y -N GetTS -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.tools.get_ts ${overwrite}${points}$x $y $ori $des
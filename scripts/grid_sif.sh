@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-c composite time interval
 #   -g grid resoultion
 #		-R recursive
@@ -15,6 +17,8 @@
 # default values
 pattern=ret*.nc
 njob=1
+cost=''
+queue=''
 res=0.5
 comp=d
 overwrite=''
@@ -32,6 +36,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
 		-c)
 			comp=$2
 			shift
@@ -58,5 +70,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N SIF_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.sif.grid_sif ${overwrite}${recursive}-p $pattern -c $comp -g $res -b $i $njob $ori $des
+    qsub -j y -N SIF_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.sif.grid_sif ${cost}${queue}${overwrite}${recursive}-p $pattern -c $comp -g $res -b $i $njob $ori $des
 done
@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-m mask source
 #		-R recursive
 #		--overwrite overwrite
@@ -14,6 +16,8 @@
 # default values
 pattern=HLS*fmask*hdf
 njob=1
+cost=''
+queue=''
 mask=fmask
 overwrite=''
 recursive=''
@@ -30,6 +34,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
     -m)
       mask=$2
       shift
@@ -52,5 +64,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.mask_to_stack ${overwrite}${recursive}-p $pattern -b $i $njob -m $mask $ori $des
+    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.mask_to_stack ${cost}${queue}${overwrite}${recursive}-p $pattern -b $i $njob -m $mask $ori $des
 done
@@ -6,6 +6,7 @@
 #		-w window size, how much to extent out from center pixel
 #		-t clean up threhold
 #		-d try to clean up the date images in the same folder as well
+#		-m minimum mapping unit in pixels, 0 for none
 #		--overwrite overwrite
 #		ori: origin
 #		des: destination
@@ -14,6 +15,7 @@
 w=1
 t=2
 d=''
+mmu=0
 overwrite=''
 
 # parse input arguments
@@ -31,6 +33,10 @@ while [[ $# > 0 ]]; do
 		-d)
 			d='-d '
 			;;
+		-m)
+			mmu=$2
+			shift
+			;;
 		--overwrite)
 			overwrite='--overwrite '
 			;;
@@ -44,4 +50,4 @@ done
 
 # submit jobs
 echo 'Submitting job for postprocessing.'
-qsub -j y -N Postprocess -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.postprocess ${overwrite}${d}-w $w -t $t $ori $des
+qsub -j y -N Postprocess -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.postprocess ${overwrite}${d}-w $w -t $t -m $mmu $ori $des
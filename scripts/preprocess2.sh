@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #   -Q location to look for 250m data
 #		-R recursive
 #		--overwrite overwrite
@@ -14,6 +16,8 @@
 # default values
 pattern=MOD09GA*hdf
 njob=1
+cost=''
+queue=''
 overwrite=''
 recursive=''
 mgq='NA'
@@ -30,6 +34,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
     -Q)
       mgq=$2
       shift
@@ -52,5 +64,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N Preprocess_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.preprocess2 ${overwrite}${recursive}-p $pattern -Q $mgq -b $i $njob $ori $des
+    qsub -j y -N Preprocess_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.vnrt.preprocess2 ${cost}${queue}${overwrite}${recursive}-p $pattern -Q $mgq -b $i $njob $ori $des
 done
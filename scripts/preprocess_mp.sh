@@ -6,6 +6,8 @@
 #		-p searching pattern
 #		-d data product vi or lc
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-R recursive
 #		--overwrite overwrite
 #		ori: origin
@@ -14,6 +16,8 @@
 # default values
 pattern=MOD13Q1*hdf
 njob=1
+cost=''
+queue=''
 overwrite=''
 recursive=''
 product=vi
@@ -30,6 +34,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
 		-d)
 			product=$2
 			shift
@@ -52,5 +64,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N MODISPre_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.chart.preprocess ${overwrite}${recursive}-p $pattern -d $product -b $i $njob $ori $des
+    qsub -j y -N MODISPre_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.chart.preprocess ${cost}${queue}${overwrite}${recursive}-p $pattern -d $product -b $i $njob $ori $des
 done
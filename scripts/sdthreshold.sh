@@ -5,6 +5,7 @@
 # Input Arguments:
 #		-n number of jobs
 #		-p searching pattern
+#		-q shared work queue folder
 #		-R recursive
 #		--overwrite overwrite
 #		ori: origin
@@ -14,6 +15,7 @@
 # default values
 njob=1
 pattern=ts*mat
+queue=''
 overwrite=''
 recursive=''
 
@@ -29,6 +31,10 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
 		-R)
 			recursive='-R '
       ;;
@@ -48,5 +54,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
   echo 'Submitting job no.' $i 'out of' $njob
-  qsub -j y -N sdt_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.fusion.area_over_threshold ${overwrite}${recursive}-p $pattern -b $i $njob $ori $des $img
+  qsub -j y -N sdt_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.fusion.area_over_threshold ${queue}${overwrite}${recursive}-p $pattern -b $i $njob $ori $des $img
 done
@@ -5,6 +5,9 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
+#		--depth works prefetched between stages, 0 for serial
 #		-R recursive
 #		--overwrite overwrite
 #		ori: origin
@@ -13,6 +16,9 @@
 # default values
 pattern=*B02.jp2
 njob=1
+cost=''
+queue=''
+depth=''
 overwrite=''
 recursive=''
 
@@ -28,6 +34,18 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
+		--depth)
+			depth="--depth $2 "
+			shift
+			;;
 		-R)
 			recursive='-R '
 			;;
@@ -46,5 +64,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.sen_to_stack ${overwrite}${recursive}-p $pattern -b $i $njob $ori $des
+    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.sen_to_stack ${cost}${queue}${depth}${overwrite}${recursive}-p $pattern -b $i $njob $ori $des
 done
@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-R recursive
 #		--overwrite overwrite
 #		ori: origin
@@ -13,6 +15,8 @@
 # default values
 pattern=ret*.nc
 njob=1
+cost=''
+queue=''
 overwrite=''
 recursive=''
 
@@ -28,6 +32,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
 		-R)
 			recursive='-R '
 			;;
@@ -46,5 +58,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N SIF_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.sif.sif_to_stack ${overwrite}${recursive}-p $pattern -b $i $njob $ori $des
+    qsub -j y -N SIF_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.sif.sif_to_stack ${cost}${queue}${overwrite}${recursive}-p $pattern -b $i $njob $ori $des
 done
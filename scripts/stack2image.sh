@@ -4,6 +4,8 @@
 
 # Input Arguments:
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-p searching pattern
 #		-c band composite
 #		-s image stretch
@@ -20,6 +22,8 @@
 
 # default values
 njob=1
+cost=''
+queue=''
 pattern=VNP*tif
 overwrite=''
 recursive=''
@@ -47,6 +51,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
     -c)
 			r=$2
 			g=$3
@@ -105,5 +117,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
   echo 'Submitting job no.' $i 'out of' $njob
-  qsub -j y -N stack2image_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.tools.export_image ${adddate}${overwrite}${recursive}${w}-p $pattern -b $i $njob -c $r $g $b -s $s1 $s2 -m $mask -f $format -r $result -v $rvalue $ori $des
+  qsub -j y -N stack2image_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.tools.export_image ${cost}${queue}${adddate}${overwrite}${recursive}${w}-p $pattern -b $i $njob -c $r $g $b -s $s1 $s2 -m $mask -f $format -r $result -v $rvalue $ori $des
 done
@@ -5,6 +5,8 @@
 # Input Arguments:
 #		-p searching pattern
 #		-n number of jobs
+#		--cost balance jobs by size, record or timing csv
+#		-q shared work queue folder
 #		-m mask band
 #   -v mask value
 #		-R recursive
@@ -15,6 +17,8 @@
 # default values
 pattern=S*tif
 njob=1
+cost=''
+queue=''
 mask='-m 9 10 11 '
 value='-v 2 4 '
 overwrite=''
@@ -33,6 +37,14 @@ while [[ $# > 0 ]]; do
 			njob=$2
 			shift
 			;;
+		--cost)
+			cost="--cost $2 "
+			shift
+			;;
+		-q)
+			queue="-q $2 "
+			shift
+			;;
     -m)
       mask='-m '$2' '$3' '$4' '
       shift
@@ -65,5 +77,5 @@ done
 echo 'Total jobs to submit is' $njob
 for i in $(seq 1 $njob); do
     echo 'Submitting job no.' $i 'out of' $njob
-    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.strata ${mask}${value}${overwrite}${recursive}${reclass}-p $pattern -b $i $njob $ori $des
+    qsub -j y -N HLS_$i -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.strata ${cost}${queue}${mask}${value}${overwrite}${recursive}${reclass}-p $pattern -b $i $njob $ori $des
 done
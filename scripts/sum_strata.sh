@@ -4,6 +4,8 @@
 
 # Input Arguments:
 #		-p searching pattern
+#		-a report all strata found
+#		-w number of files processed at the same time
 #		-R recursive
 #		--overwrite overwrite
 #		ori: origin
@@ -11,6 +13,8 @@
 
 # default values
 pattern=*strata*tif
+all=''
+workers=4
 overwrite=''
 recursive=''
 
@@ -22,6 +26,13 @@ while [[ $# > 0 ]]; do
 			pattern=$2
 			shift
 			;;
+		-a)
+			all='-a '
+			;;
+		-w)
+			workers=$2
+			shift
+			;;
 		-R)
 			recursive='-R '
 			;;
@@ -38,4 +49,4 @@ done
 
 # submit jobs
 echo 'Submitting job...'
-qsub -j y -N STRATA -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.sum_strata ${overwrite}${recursive}-p $pattern $ori $des
+qsub -j y -N STRATA -V -b y cd /projectnb/landsat/users/xjtang/documents/';' python -m SIPH.models.hls.sum_strata ${overwrite}${recursive}${all}-p $pattern -w $workers $ori $des
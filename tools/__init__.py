@@ -1,10 +1,29 @@
 """ Module for set of standalone tools
 """
-from .ftp_download import get_ftp
-from .http_download import download
+from ..common.lazy import lazy_attrs
+
+
+# submodules are imported on first access of their names
+__getattr__, __dir__ = lazy_attrs(__name__, [
+    ['ftp_download', ['get_ftp']],
+    ['http_download', ['download']],
+    ['drill', ['read_points', 'drill_file', 'drill_files', 'drill_points']],
+    ['get_ts', ['read_config', 'grab_ts', 'grab_points']],
+    ['ts_nob', ['get_ts_nob', 'nob_weights', 'nob_blocks']]
+])
 
 
 __all__ = [
     'get_ftp',
     'download',
+    'read_points',
+    'drill_file',
+    'drill_files',
+    'drill_points',
+    'read_config',
+    'grab_ts',
+    'grab_points',
+    'get_ts_nob',
+    'nob_weights',
+    'nob_blocks',
 ]
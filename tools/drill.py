@@ -0,0 +1,255 @@
+""" Module for extracting values of many points from many stacks or caches
+
+    Args:
+        -p (pattern): searching pattern, stacks or cache folders
+        -t (type): stack or cache
+        -b (band): band to extract, 0 for all bands
+        -w (workers): files read at the same time
+        -R (recursive): recursive when seaching files
+        --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        points: csv or shapefile of points, id with row and col, or x and y
+        ori: origin
+        des: destination, output csv file
+
+"""
+import os
+import sys
+import csv
+import fnmatch
+import argparse
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ..io import (csv2dict, shape2points, stackGeo, stack2points,
+                  cache2points)
+from ..common import (log, get_files, map2pixel, profile_args,
+                      profile_start)
+from ..common import constants as cons
+
+
+FIELDS = ['id', 'file', 'band', 'image', 'value']
+
+
+def read_points(_file):
+    """ read points from a csv file or a shapefile
+
+    Args:
+        _file (str): csv or shapefile with id, and row and col or x and y
+
+    Returns:
+        points (list, dic): points, numbered in order if there is no id
+
+    """
+    if os.path.splitext(_file)[1].lower() == '.shp':
+        points = shape2points(_file)
+    else:
+        points = csv2dict(_file)
+    for i, point in enumerate(points):
+        point.setdefault('id', i)
+    return points
+
+
+def drill_file(_file, points, _type='stack', band=0):
+    """ extract values of points from one stack or cache folder
+
+    Args:
+        _file (str): path to stack or cache folder
+        points (list, dic): points from read_points
+        _type (str): stack or cache
+        band (int): band to extract, 0 for all bands
+
+    Returns:
+        table (list): rows of id, file, band, image and value
+
+    """
+    name = os.path.basename(os.path.normpath(_file))
+    ids = np.array([x['id'] for x in points], object)
+    if _type == 'stack':
+        geo = stackGeo(_file)
+        if all(('x' in x) and ('y' in x) for x in points):
+            rows, cols = map2pixel(geo['geotrans'], [x['x'] for x in points],
+                                    [x['y'] for x in points])
+        else:
+            rows = np.array([x['row'] for x in points])
+            cols = np.array([x['col'] for x in points])
+        keep = ((rows >= 0) & (rows < geo['lines']) & (cols >= 0) &
+                (cols < geo['samples']))
+        values = stack2points(_file, rows, cols, band)[keep]
+        bands = (np.arange(1, values.shape[1] + 1) if band == 0
+                    else np.array([band]))
+        images = np.array(['NA'])
+        values = values[:, :, np.newaxis]
+    else:
+        rows = np.array([x['row'] for x in points])
+        cols = np.array([x['col'] for x in points])
+        values, images = cache2points(_file, rows, cols)
+        if band > 0:
+            values = values[:, band - 1:band, :]
+        keep = np.any(values != cons.NODATA, axis=(1, 2))
+        values = values[keep]
+        bands = (np.arange(1, values.shape[1] + 1) if band == 0
+                    else np.array([band]))
+        if type(images) == str:
+            images = np.arange(values.shape[2])
+    n = values.size
+    nkeep = np.count_nonzero(keep)
+    if nkeep < len(points):
+        log.warning('{} points not in {}'.format(len(points) - nkeep, name))
+    return list(zip(np.repeat(ids[keep], n // max(nkeep, 1)).tolist(),
+                    [name] * n,
+                    np.tile(np.repeat(bands, len(images)), nkeep).tolist(),
+                    np.tile(images, nkeep * len(bands)).tolist(),
+                    values.ravel().tolist()))
+
+
+def drill_files(files, points, _type='stack', band=0,
+                workers=cons.DRILL_WORKERS):
+    """ extract values of points from many stacks or cache folders, files
+        are read at the same time by a pool of threads
+
+    Args:
+        files (list, str): paths to stacks or cache folders
+        points (list, dic): points from read_points
+        _type (str): stack or cache
+        band (int): band to extract, 0 for all bands
+        workers (int): files read at the same time
+
+    Yields:
+        _file (str): path to stack or cache folder, in order of files
+        table (list): rows of id, file, band, image and value, NA if failed
+
+    """
+    def _drill(_file):
+        try:
+            return drill_file(_file, points, _type, band)
+        except:
+            log.warning('Failed to extract points from {}'.format(_file))
+            return 'NA'
+
+    with ThreadPoolExecutor(max(workers, 1)) as pool:
+        for _file, table in zip(files, pool.map(_drill, files)):
+            yield _file, table
+
+
+def drill_points(pattern, ori, points, des, _type='stack', band=0,
+                    workers=cons.DRILL_WORKERS, overwrite=False,
+                    recursive=False):
+    """ extract values of points from stacks or cache folders to a csv file
+
+    Args:
+        pattern (str): searching pattern, e.g. *.tif, NA for all stacks or
+            for ori as the only cache folder
+        ori (str): place to look for stacks or cache folders
+        points (str): csv or shapefile of points
+        des (str): output csv file
+        _type (str): stack or cache
+        band (int): band to extract, 0 for all bands
+        workers (int): files read at the same time
+        overwrite (bool): overwrite or not
+        recursive (bool): recursive when searching file, or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error reading points
+        3: found no file
+        4: error writing output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    # read points
+    log.info('Reading points...')
+    try:
+        _points = read_points(points)
+    except:
+        log.error('Failed to read points from {}'.format(points))
+        return 2
+    log.info('Read {} points.'.format(len(_points)))
+
+    # locate files
+    log.info('Locating files...')
+    if _type == 'cache':
+        if pattern == 'NA':
+            files = [ori]
+        else:
+            files = sorted([os.path.join(ori, x) for x in os.listdir(ori)
+                            if os.path.isdir(os.path.join(ori, x)) and
+                            fnmatch.fnmatch(x, pattern)])
+    else:
+        pattern = '*.tif' if pattern == 'NA' else pattern
+        files = [os.path.join(x[0], x[1]) for x in get_files(ori, pattern,
+                                                            recursive)]
+    if len(files) == 0:
+        log.error('Found no {}'.format(pattern))
+        return 3
+    log.info('Found {} files.'.format(len(files)))
+
+    # extract and write output as files are done
+    count = 0
+    try:
+        with open(des, 'w') as output:
+            _writer = csv.writer(output, lineterminator='\n')
+            _writer.writerow(FIELDS)
+            for _file, table in drill_files(files, _points, _type, band,
+                                            workers):
+                if table != 'NA':
+                    _writer.writerows(table)
+                    count += 1
+    except:
+        log.error('Failed to write output to {}'.format(des))
+        return 4
+
+    # done
+    log.info('Process completed.')
+    log.info('Successfully extracted from {}/{} files.'.format(count,
+                len(files)))
+    return 0
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--pattern', action='store', type=str,
+                        dest='pattern', default='NA', help='searching pattern')
+    parser.add_argument('-t', '--type', action='store', type=str,
+                        dest='type', default='stack',
+                        choices=['stack', 'cache'], help='stack or cache')
+    parser.add_argument('-b', '--band', action='store', type=int,
+                        dest='band', default=0, help='band, 0 for all')
+    parser.add_argument('-w', '--workers', action='store', type=int,
+                        dest='workers', default=cons.DRILL_WORKERS,
+                        help='files read at the same time')
+    parser.add_argument('-R', '--recursive', action='store_true',
+                        help='recursive or not')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='overwrite or not')
+    parser.add_argument('points', default='./', help='points')
+    parser.add_argument('ori', default='./', help='origin')
+    parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
+    args = parser.parse_args()
+    profile_start(args, args.des)
+
+    # print logs
+    log.info('Start extracting points...')
+    log.info('Points from {}'.format(args.points))
+    log.info('Looking for {} {}'.format(args.type, args.pattern))
+    log.info('In {}'.format(args.ori))
+    log.info('Saving as {}'.format(args.des))
+    log.info('Reading {} files at a time.'.format(args.workers))
+    if args.recursive:
+        log.info('Recursive seaching.')
+    if args.overwrite:
+        log.info('Overwriting old files.')
+
+    # run function to extract points
+    sys.exit(drill_points(args.pattern, args.ori, args.points, args.des,
+                            args.type, args.band, args.workers,
+                            args.overwrite, args.recursive))
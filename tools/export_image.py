@@ -3,6 +3,8 @@
     Args:
         -p (pattern): searching pattern
         -b (batch): batch process, thisjob and totaljob
+        --cost: balance batch by size, record or timing csv
+        -q (queue): claim works from a shared queue folder
         -c (comp): band composite
         -s (stretch): image stretch
         -f (format): output image format (e.g. rgb)
@@ -13,6 +15,8 @@
         -d (adddate): add date to output
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -22,13 +26,14 @@ import sys
 import argparse
 
 from ..io import stack2image, addTextToImage
-from ..common import log, get_files, manage_batch, get_date
+from ..common import (log, get_files, manage_batch, queue_works, get_date,
+                      profile_args, profile_start)
 
 
 def batch_stack2image(pattern, ori, des, bands=[3,2,1], stretch=[0,5000],
                         _format='rgb', mask=0, result='NA', rvalue=0, window=0,
                         adddate=False, overwrite=False, recursive=True,
-                        batch=[1,1]):
+                        batch=[1,1], cost='NA', queue='NA'):
     """ Generage regular image file from stack image
 
     Args:
@@ -46,6 +51,8 @@ def batch_stack2image(pattern, ori, des, bands=[3,2,1], stretch=[0,5000],
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
         batch (list, int): batch processing, [thisjob, totaljob]
+        cost (str): balance batch by size, record or timing csv, NA for not
+        queue (str): shared work queue folder, NA for not
 
     Returns:
         0: successful
@@ -80,9 +87,13 @@ def batch_stack2image(pattern, ori, des, bands=[3,2,1], stretch=[0,5000],
             log.info('Found {} files.'.format(n))
 
     # handle batch processing
-    if batch[1] > 1:
+    done = 'NA'
+    if queue != 'NA':
+        log.info('Claiming works from queue {}'.format(queue))
+        img_list, done = queue_works(img_list, queue)
+    elif batch[1] > 1:
         log.info('Handling batch process...')
-        img_list = manage_batch(img_list, batch[0], batch[1])
+        img_list = manage_batch(img_list, batch[0], batch[1], cost)
         n = len(img_list)
         log.info('{} files to be processed by this job.'.format(n))
 
@@ -106,11 +117,12 @@ def batch_stack2image(pattern, ori, des, bands=[3,2,1], stretch=[0,5000],
         des2 = os.path.join(des, '{}.png'.format(img[1].split('.')[0]))
         if stack2image(os.path.join(img[0], img[1]), des2, bands, stretch, mask,
                     result2, rvalue, _format, window, overwrite, False) == 0:
-            if adddate:
-                if addTextToImage(des2, des2,
+            if (not adddate) or addTextToImage(des2, des2,
                                     '{} {}'.format(str(d)[0:4], str(d)[4:]),
                                     True, False) == 0:
-                    count += 1
+                count += 1
+                if done != 'NA':
+                    done(img)
 
     # done
     log.info('Process completed.')
@@ -127,6 +139,10 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--batch', action='store', type=int, nargs=2,
                         dest='batch', default=[1,1],
                         help='batch process, thisjob and totaljob')
+    parser.add_argument('--cost', action='store', type=str, dest='cost',
+                        default='NA', help='batch cost, size, record or csv')
+    parser.add_argument('-q', '--queue', action='store', type=str,
+                        dest='queue', default='NA', help='work queue folder')
     parser.add_argument('-c', '--comp', action='store', type=int, nargs=3,
                         dest='comp', default=[3,2,1], help='band composite')
     parser.add_argument('-s', '--stretch', action='store', type=int, nargs=2,
@@ -149,7 +165,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check arguments
     if not 1 <= args.batch[0] <= args.batch[1]:
@@ -181,6 +199,10 @@ if __name__ == '__main__':
         log.info('No mask band.')
     if args.adddate:
         log.info('Add date.')
+    if args.cost != 'NA':
+        log.info('Balancing batch by {}'.format(args.cost))
+    if args.queue != 'NA':
+        log.info('Claiming works from queue {}'.format(args.queue))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
@@ -190,4 +212,4 @@ if __name__ == '__main__':
     batch_stack2image(args.pattern, args.ori, args.des, args.comp, args.stretch,
                         args.format, args.mask, args.result, args.rvalue,
                         args.window, args.adddate, args.overwrite,
-                        args.recursive, args.batch)
+                        args.recursive, args.batch, args.cost, args.queue)
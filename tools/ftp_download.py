@@ -8,6 +8,8 @@
         -y (year): which year
         -d (day): which days, start and stop
         --update: update existing image or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         des: destination
 
 """
@@ -21,7 +23,7 @@ from calendar import isleap
 from ftplib import FTP
 from datetime import datetime as dt
 
-from ..common import log
+from ..common import log, profile_args, profile_start
 from ..common import constants as cons
 
 
@@ -267,7 +269,9 @@ if __name__ == '__main__':
     parser.add_argument('--update', action='store_true',
                         help='update existing image')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # check if arguments and options are valid
     if args.sensor == 'V':
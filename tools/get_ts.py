@@ -1,7 +1,10 @@
-""" Module for grabing time series of one pixel from YATSM cache file
+""" Module for grabing time series of pixels from YATSM cache files
 
     Args:
+        -p (points): csv or shapefile of points, instead of x and y
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         x: pixel location, x
         y: pixel location, y
         ori: origin of config yaml file
@@ -10,12 +13,33 @@
 """
 import os
 import sys
+import csv
 import argparse
 import yaml
 import numpy as np
 
-from ..io import csv2list
-from ..common import log, get_files
+from .drill import read_points
+from ..io import csv2list, cache2points, stackGeo
+from ..common import (log, get_files, map2pixel, profile_args,
+                      profile_start)
+from ..common import constants as cons
+
+
+def read_config(ori):
+    """ read image list and cache folder from YATSM config file
+
+    Args:
+        ori (str): path to config file
+
+    Returns:
+        img_list (str): path to image list
+        cache_path (str): path to line caches
+
+    """
+    with open(ori, 'r') as stream:
+        config = yaml.safe_load(stream)
+    return (config['dataset']['input_file'],
+            config['dataset']['cache_line_dir'])
 
 
 def grab_ts(x, y, ori, des, overwrite=False):
@@ -44,10 +68,7 @@ def grab_ts(x, y, ori, des, overwrite=False):
     # read input config file
     log.info('Reading config file...')
     try:
-        with open(ori, 'r') as stream:
-            config = yaml.load(stream)
-            img_list = config['dataset']['input_file']
-            cache_path = config['dataset']['cache_line_dir']
+        img_list, cache_path = read_config(ori)
     except:
         log.error('Failed to read config file {}'.format(ori))
         return 2
@@ -90,24 +111,126 @@ def grab_ts(x, y, ori, des, overwrite=False):
     return 0
 
 
+def grab_points(points, ori, des, overwrite=False):
+    """ Grab time series for many pixels from YATSM cache files, each line
+        cache is loaded once for all pixels in the line
+
+    Args:
+        points (str): csv or shapefile of points, with x and y as pixel
+            location, or with row and col as pixel location and x and y as
+            map coordinates
+        ori (str): oath to config file
+        des (str): output path and filename, one row per pixel and date
+        overwrite (bool): overwrite or not
+
+    Returns:
+        0: successful
+        1: error due to des
+        2: error reading input
+        3: error during processing
+        4: error during writing output
+
+    """
+    # check if output already exists
+    if (not overwrite) and os.path.isfile(des):
+        log.error('{} already exists.'.format(des.split('/')[-1]))
+        return 1
+
+    # read input config file, image list and points
+    log.info('Reading inputs...')
+    try:
+        img_list, cache_path = read_config(ori)
+        images = csv2list(img_list, True)
+        dates = np.array([x[0] for x in images])
+        _points = read_points(points)
+    except:
+        log.error('Failed to read inputs of {}'.format(ori))
+        return 2
+    log.info('Read {} points.'.format(len(_points)))
+
+    # pixel location of points, map coordinates need an image of the list
+    try:
+        if all(('row' in x) and ('col' in x) for x in _points):
+            rows = np.array([x['row'] for x in _points])
+            cols = np.array([x['col'] for x in _points])
+        elif os.path.splitext(points)[1].lower() == '.shp':
+            rows, cols = map2pixel(stackGeo(images[0][-1])['geotrans'],
+                                    [x['x'] for x in _points],
+                                    [x['y'] for x in _points])
+        else:
+            rows = np.array([x['y'] for x in _points])
+            cols = np.array([x['x'] for x in _points])
+    except:
+        log.error('Failed to locate points.')
+        return 3
+
+    # grab time series, by line
+    log.info('Grabing time series of {} lines...'.format(len(np.unique(
+                rows))))
+    try:
+        ts, _ids = cache2points(cache_path, rows, cols)
+        found = np.any(ts != cons.NODATA, axis=(1, 2))
+    except:
+        log.error('Failed to grab time series from {}'.format(cache_path))
+        return 3
+    if not found.all():
+        log.warning('Found no cache for {} points.'.format(
+                    np.count_nonzero(~found)))
+
+    # write output
+    log.info('Writing output: {}'.format(des))
+    try:
+        with open(des, 'w') as output:
+            _writer = csv.writer(output, lineterminator='\n')
+            _writer.writerow(['id', 'x', 'y', 'date'] +
+                                ['band{}'.format(i + 1) for i in
+                                range(ts.shape[1])])
+            for i in np.nonzero(found)[0]:
+                _id = [_points[i]['id'], int(cols[i]), int(rows[i])]
+                _writer.writerows([_id + [d] + b for d, b in
+                                    zip(dates.tolist(), ts[i].T.tolist())])
+    except:
+        log.error('Failed to write output to {}'.format(des))
+        return 4
+
+    # done
+    log.info('Process completed.')
+    return 0
+
+
 if __name__ == '__main__':
     # parse options
     parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--points', action='store', type=str,
+                        dest='points', default='NA',
+                        help='csv or shapefile of points')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
-    parser.add_argument('x', type=int, default=1, help='pixel location x')
-    parser.add_argument('y', type=int, default=1, help='pixel location y')
+    parser.add_argument('pixel', type=int, nargs='*',
+                        help='pixel location x and y')
     parser.add_argument('ori', default='./', help='origin of config files')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
+    if (args.points == 'NA') and (len(args.pixel) != 2):
+        parser.error('give pixel location x and y, or points')
 
     # print logs
     log.info('Start grabing time series...')
-    log.info('Pixel: [{}, {}]'.format(args.x, args.y))
+    if args.points == 'NA':
+        log.info('Pixel: [{}, {}]'.format(args.pixel[0], args.pixel[1]))
+    else:
+        log.info('Points: {}'.format(args.points))
     log.info('Config file: {}.'.format(args.ori))
     log.info('Saving as {}'.format(args.des))
     if args.overwrite:
         log.info('Overwriting existing output.')
 
     # run function to grab time series
-    grab_ts(args.x, args.y, args.ori, args.des, args.overwrite)
+    if args.points == 'NA':
+        sys.exit(grab_ts(args.pixel[0], args.pixel[1], args.ori, args.des,
+                            args.overwrite))
+    else:
+        sys.exit(grab_points(args.points, args.ori, args.des,
+                                args.overwrite))
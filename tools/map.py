@@ -1,33 +1,77 @@
 """ Module for create map from a set of stacked images
 
     Args:
-        -m (map): waht type of map
+        -m (map): waht type of map, comma separated for a band per map,
+            nchange, vchange, first, last, mode, min, max, mean, p<q> or
+            nob, nchange counts every change between bands with nodata as
+            a value, the others skip nodata
+        -p (pattern): searching pattern when origin is a folder of images
+        -w (workers): blocks processed at the same time
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
-        ori: origin
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        ori: origin, a stack or a folder of images
         des: destination
 
 """
 import os
+import sys
 import argparse
 import numpy as np
 
 from osgeo import gdal
 
 from ..common import constants as cons
-from ..common import log, nchange
-from ..io import stackGeo, stack2array, array2stack
+from ..common import (log, get_files, temporal_reduce, pipe_map,
+                      profile_args, profile_start)
+from ..io import stackGeo, stack2blocks, blocks2stack
 
 
-def mapping(ori, des, map, overwrite=False, recursive=False):
-    """ stack raster layers
+# output type of each map, widest one is used for all bands
+MAP_TYPES = {'nchange': gdal.GDT_Int16, 'vchange': gdal.GDT_Int16,
+                'first': gdal.GDT_Int16, 'last': gdal.GDT_Int16,
+                'nob': gdal.GDT_Int16,
+                'mode': gdal.GDT_Int32, 'min': gdal.GDT_Int32,
+                'max': gdal.GDT_Int32, 'mean': gdal.GDT_Float32,
+                'p': gdal.GDT_Float32}
+
+
+def map_blocks(ori, files='NA', lines=cons.BLOCK_LINES):
+    """ read a stack, or the first band of a list of images, by block of lines
 
     Args:
         ori (str): input stack
+        files (list, str): images as bands in order, NA to read ori
+        lines (int): number of lines per block
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): data of the block, by line, sample and band
+
+    """
+    if files == 'NA':
+        for row, array in stack2blocks(ori, 0, lines, np.int32):
+            yield row, array
+    else:
+        for blocks in zip(*[stack2blocks(x, 1, lines, np.int32)
+                            for x in files]):
+            yield blocks[0][0], np.stack([x[1] for x in blocks], axis=2)
+
+
+def mapping(ori, des, map, overwrite=False, recursive=False, pattern='NA',
+            workers=cons.PIPE_WORKERS):
+    """ reduce a stack or a list of images over time to maps, block by block
+        of lines with blocks processed at the same time by a pool of threads
+
+    Args:
+        ori (str): input stack, or folder of images with one band each
         des (str): output path and filename
-        map (str): what type of map
+        map (str): what type of map, comma separated for a band per map
         overwrite (bool): overwrite or not
         recursive (bool): recursive when searching file, or not
+        pattern (str): searching pattern when ori is a folder, NA for *.tif
+        workers (int): blocks processed at the same time
 
     Returns:
         0: successful
@@ -42,33 +86,66 @@ def mapping(ori, des, map, overwrite=False, recursive=False):
         log.error('{} already exists.'.format(os.path.basename(des)))
         return 1
 
+    # check maps
+    maps = map.split(',') if type(map) == str else list(map)
+    for x in maps:
+        if x in MAP_TYPES and x != 'p':
+            continue
+        try:
+            q = float(x[1:]) if x[:1] == 'p' else -1
+        except ValueError:
+            q = -1
+        if not 0 <= q <= 100:
+            log.error('Unknown map: {}'.format(x))
+            return 3
+    _types = [MAP_TYPES[x] if x in MAP_TYPES else MAP_TYPES['p']
+                for x in maps]
+    if gdal.GDT_Float32 in _types:
+        _type, _dtype = gdal.GDT_Float32, np.float32
+    elif gdal.GDT_Int32 in _types:
+        _type, _dtype = gdal.GDT_Int32, np.int32
+    else:
+        _type, _dtype = gdal.GDT_Int16, np.int16
+
     # locate files
     log.info('Reading input: {}'.format(ori))
     try:
-        geo = stackGeo(ori)
-        stack = stack2array(ori)
+        if os.path.isdir(ori):
+            pattern = '*.tif' if pattern == 'NA' else pattern
+            files = sorted([os.path.join(x[0], x[1]) for x in
+                            get_files(ori, pattern, recursive)])
+            if len(files) == 0:
+                log.error('Found no {}'.format(pattern))
+                return 2
+            log.info('Found {} images.'.format(len(files)))
+            geo = stackGeo(files[0])
+        else:
+            files = 'NA'
+            geo = stackGeo(ori)
+        nodata = geo['nodata']
+        if nodata == 'NA' or nodata is None:
+            nodata = cons.NODATA
     except:
         log.error('Failed to read input from: {}'.format(ori))
         return 2
 
-    # mapping
-    log.info('Processing...')
-    try:
-        if map == 'nchange':
-            result = nchange(stack)
-        else:
-            log.error('Unknown map: {}'.format(map))
-            return 3
-    except:
-        log.error('Failed to make {} map.'.format(map))
-        return 3
+    # mapping and write output as blocks are done
+    log.info('Making {} map...'.format(', '.join(maps)))
+
+    def _reduce(block):
+        result = np.zeros(block[1].shape[0:2] + (len(maps),), _dtype)
+        empty = ~np.any(block[1] != nodata, axis=2)
+        for i, x in enumerate(maps):
+            result[:, :, i] = temporal_reduce(block[1], x, nodata)
+            if x not in ('nob', 'nchange'):
+                result[empty, i] = cons.NODATA
+        return block[0], result
 
-    # write output
     log.info('Writing output: {}'.format(des))
-    if array2stack(result, geo, des, ['{} map'.format(map)], cons.NODATA,
-                    gdal.GDT_Int16, overwrite, 'GTiff',
-                    ['COMPRESS=PACKBITS']) > 0:
-        log.error('Failed to write output to {}'.format(des))
+    if blocks2stack(pipe_map(_reduce, map_blocks(ori, files), workers), geo,
+                    des, ['{} map'.format(x) for x in maps], cons.NODATA,
+                    _type, overwrite, 'GTiff', ['COMPRESS=PACKBITS']) > 0:
+        log.error('Failed to make {} map to {}'.format(map, des))
         return 4
 
     # done
@@ -81,24 +158,36 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-m', '--map', action='store', type=str,
                         dest='map', default='nchange',
+                        help='type of map, comma separated')
+    parser.add_argument('-p', '--pattern', action='store', type=str,
+                        dest='pattern', default='NA',
                         help='searching pattern')
+    parser.add_argument('-w', '--workers', action='store', type=int,
+                        dest='workers', default=cons.PIPE_WORKERS,
+                        help='blocks processed at the same time')
     parser.add_argument('-R', '--recursive', action='store_true',
                         help='recursive or not')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start mapping...')
-    log.info('Input stack: {}'.format(args.ori))
+    log.info('Input: {}'.format(args.ori))
+    if os.path.isdir(args.ori):
+        log.info('Looking for {}'.format(args.pattern))
     log.info('Making {} map.'.format(args.map))
     log.info('Saving as {}'.format(args.des))
+    log.info('Processing {} blocks at a time.'.format(args.workers))
     if args.recursive:
         log.info('Recursive seaching.')
     if args.overwrite:
         log.info('Overwriting old file.')
 
     # run function to gnerate map
-    mapping(args.ori, args.des, args.map, args.overwrite, args.recursive)
+    sys.exit(mapping(args.ori, args.des, args.map, args.overwrite,
+                        args.recursive, args.pattern, args.workers))
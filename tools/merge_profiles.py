@@ -0,0 +1,81 @@
+""" Module for merging profiles of many batch jobs
+
+    Args:
+        -p (pattern): searching pattern
+        -t (top): number of top functions and allocations reported
+        -R (recursive): recursive when seaching files
+        ori: origin
+        des: destination, base name of merged profile
+
+"""
+import os
+import sys
+import argparse
+
+from ..common import log, get_files, profile_merge
+
+
+def merge_profiles(pattern, ori, des, top=30, recursive=False):
+    """ merge profiles written by --profile and --profile-memory
+
+    Args:
+        pattern (str): searching pattern, e.g. profile_hls_to_stack_*
+        ori (str): place to look for profiles
+        des (str): base name of merged profile, .prof, .txt and .json
+        top (int): number of top functions and allocations reported
+        recursive (bool): recursive when searching files
+
+    Returns:
+        0: successful
+        1: no profiles found
+        2: error merging profiles
+
+    """
+    files = [os.path.join(x[0], x[1]) for x in get_files(ori, pattern,
+                recursive) if os.path.splitext(x[1])[1] in ('.prof', '.json')]
+    if len(files) == 0:
+        log.error('Found no profiles in {}'.format(ori))
+        return 1
+    log.info('Found {} profile files.'.format(len(files)))
+
+    # merge
+    try:
+        summary = profile_merge(files, des, top)
+    except:
+        log.error('Failed to merge profiles.')
+        return 2
+
+    # done
+    log.info('Merged {} runs, wall time {:.1f}s (max {:.1f}s), cpu time '
+                '{:.1f}s'.format(summary['runs'], summary['wall'],
+                summary['max_wall'], summary['cpu']))
+    if summary['peak'] > 0:
+        log.info('Highest peak memory {:.1f}MB'.format(summary['peak'] /
+                    1048576.0))
+    log.info('Saved merged profile as {}.*'.format(des))
+    return 0
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--pattern', action='store', type=str,
+                        dest='pattern', default='profile_*',
+                        help='searching pattern')
+    parser.add_argument('-t', '--top', action='store', type=int, dest='top',
+                        default=30, help='number of top items reported')
+    parser.add_argument('-R', '--recursive', action='store_true',
+                        help='recursive or not')
+    parser.add_argument('ori', default='./', help='origin')
+    parser.add_argument('des', default='./merged', help='destination')
+    args = parser.parse_args()
+
+    # print logs
+    log.info('Start merging profiles...')
+    log.info('Looking for {}'.format(args.pattern))
+    log.info('In {}'.format(args.ori))
+    log.info('Saving as {}'.format(args.des))
+
+    # run function to merge profiles
+    sys.exit(merge_profiles(args.pattern, args.ori, args.des, args.top,
+                            args.recursive))
@@ -0,0 +1,106 @@
+""" Module for summarizing stage metrics recorded by batch jobs
+
+    Args:
+        -p (pattern): searching pattern
+        -n (node): break down by node as well
+        -R (recursive): recursive when seaching files
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
+        ori: origin
+        des: destination, NA to only log the summary
+
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+
+from ..common import (log, get_files, metrics_summary, metrics_report,
+                      profile_args, profile_start)
+
+
+def summarize_metrics(pattern, ori, des='NA', node=False, recursive=False):
+    """ sum up metric files written by metrics_enable
+
+    Args:
+        pattern (str): searching pattern, e.g. metrics*json
+        ori (str): place to look for metric files
+        des (str): output csv file, NA to only log the summary
+        node (bool): break down by node as well
+        recursive (bool): recursive when searching files
+
+    Returns:
+        0: successful
+        1: no metric files found
+        2: error reading metric files
+
+    """
+    files = get_files(ori, pattern, recursive)
+    if len(files) == 0:
+        log.error('Found no metric files in {}'.format(ori))
+        return 1
+    log.info('Found {} metric files.'.format(len(files)))
+
+    # read records
+    records = []
+    try:
+        for x in files:
+            with open(os.path.join(x[0], x[1]), 'r') as f:
+                for line in f:
+                    if line.strip() != '':
+                        records.append(json.loads(line))
+    except:
+        log.error('Failed to read {}'.format(os.path.join(x[0], x[1])))
+        return 2
+    log.info('Read {} records.'.format(len(records)))
+
+    # summarize
+    by = ['product', 'stage']
+    if node:
+        for r in records:
+            r['node'] = r['host'].split('.')[0]
+        by = ['node'] + by
+    summary = metrics_summary(records, by)
+    metrics_report(summary)
+
+    # write output
+    if des != 'NA':
+        fields = by + ['count', 'seconds', 'bytes', 'pixels', 'mb_per_second',
+                        'pixels_per_second']
+        with open(des, 'w') as output:
+            _writer = csv.DictWriter(output, fields, lineterminator='\n')
+            _writer.writeheader()
+            _writer.writerows(summary)
+        log.info('Saved summary to {}'.format(des))
+
+    # done
+    return 0
+
+
+if __name__ == '__main__':
+    # parse options
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-p', '--pattern', action='store', type=str,
+                        dest='pattern', default='metrics*json',
+                        help='searching pattern')
+    parser.add_argument('-n', '--node', action='store_true',
+                        help='break down by node')
+    parser.add_argument('-R', '--recursive', action='store_true',
+                        help='recursive or not')
+    parser.add_argument('ori', default='./', help='origin')
+    parser.add_argument('des', default='NA', nargs='?', help='destination')
+    profile_args(parser)
+    args = parser.parse_args()
+    profile_start(args, args.des)
+
+    # print logs
+    log.info('Start summarizing metrics...')
+    log.info('Looking for {}'.format(args.pattern))
+    log.info('In {}'.format(args.ori))
+    if args.des != 'NA':
+        log.info('Saving in {}'.format(args.des))
+
+    # run function to summarize metrics
+    sys.exit(summarize_metrics(args.pattern, args.ori, args.des, args.node,
+                                args.recursive))
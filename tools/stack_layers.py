@@ -4,6 +4,8 @@
         -p (pattern): searching pattern
         -R (recursive): recursive when seaching files
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         ori: origin
         des: destination
 
@@ -12,7 +14,7 @@ import os
 import sys
 import argparse
 
-from ..common import log, get_files
+from ..common import log, get_files, profile_args, profile_start
 from ..io import stackMerge, stackGeo, stack2array, array2stack
 
 
@@ -80,7 +82,9 @@ if __name__ == '__main__':
                         help='overwrite or not')
     parser.add_argument('ori', default='./', help='origin')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start stacking...')
@@ -3,7 +3,10 @@
     Args:
         -y (yearly): calculate yearly
         -g (grow): calculate growing season
+        -s (stack): save yearly results as one stack, a band per year
         --overwrite: overwrite or not
+        --profile: profile function calls, wall or cpu time
+        --profile-memory: profile peak memory allocations
         img: an image to grab spatial reference
         ori: origin of config yaml file
         des: destination
@@ -15,11 +18,76 @@ import argparse
 import yaml
 import numpy as np
 
-from ..io import stack2array, stackGeo, array2stack, csv2list
-from ..common import log, get_files
+from osgeo import gdal
 
+from ..io import stackGeo, blocks2stack, blocks2files, csv2list, cache_lines
+from ..common import log, split_doy, profile_args, profile_start
+from ..common import constants as cons
 
-def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
+
+def nob_weights(dates, yearly=False, grow=False, season=cons.GROW_SEASON):
+    """ which images count towards each output band
+
+    Args:
+        dates (list, int): dates of images, yyyyddd
+        yearly (bool): a band per year or one band for all
+        grow (bool): growing season only or not
+        season (tuple): first and last day of year of growing season
+
+    Returns:
+        years (list, int): year of each band, 0 for all years
+        weights (ndarray): 1 if image counts towards band, by band and image
+
+    """
+    ts_years, ts_doys = split_doy(np.asarray(dates))
+    if yearly:
+        years = list(range(ts_years.min(), ts_years.max() + 1))
+        weights = (ts_years[np.newaxis, :] ==
+                    np.array(years)[:, np.newaxis])
+    else:
+        years = [0]
+        weights = np.ones((1, len(dates)), bool)
+    if grow:
+        weights &= (ts_doys >= season[0]) & (ts_doys <= season[1])
+    return years, weights.astype(np.float32)
+
+
+def nob_blocks(caches, geo, weights, mask_band=-1,
+                mask_values=cons.NOB_MASK_VALUES, lines=cons.BLOCK_LINES):
+    """ count clear observations block by block of lines, each line cache is
+        loaded once and counted for all bands in one product
+
+    Args:
+        caches (dic): path to cache of each line, from cache_lines
+        geo (dic): spatial reference
+        weights (ndarray): from nob_weights
+        mask_band (int): index of mask band in cache, -1 for the last band
+        mask_values (tuple): mask values of observations that are not clear
+        lines (int): number of lines per block
+
+    Yields:
+        row (int): first line of the block
+        array (ndarray): number of clear observations by line, sample and
+            band, NODATA for lines with no cache
+
+    """
+    for row in range(0, geo['lines'], lines):
+        nrow = min(lines, geo['lines'] - row)
+        array = np.zeros((nrow, geo['samples'], weights.shape[0]),
+                            np.int16) + cons.NODATA
+        for i in range(nrow):
+            if (row + i) not in caches:
+                log.warning('Found no cache for line {}'.format(row + i))
+                continue
+            with np.load(caches[row + i]) as cache:
+                clear = ~np.isin(cache['Y'][mask_band], mask_values)
+            array[i, :clear.shape[1], :] = np.dot(weights,
+                                            clear.astype(np.float32)).T
+        yield row, array
+
+
+def get_ts_nob(img, ori, des, yearly=False, grow=False, stack=False,
+                overwrite=False):
     """ Calculate numebr of observation from YATSM cache files
 
     Args:
@@ -28,6 +96,8 @@ def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
         des (str): output path and/or filename
         yearly (bool): yearly result or not
         grow (bool): growing season only or not
+        stack (bool): save yearly results in one stack at des, or one file
+            per year in des
         overwrite (bool): overwrite or not
 
     Returns:
@@ -39,7 +109,7 @@ def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
 
     """
     # check if output already exists
-    if yearly:
+    if yearly and not stack:
         if not os.path.exists(des):
             log.warning('{} does not exist, trying to create one.'.format(des))
             try:
@@ -56,9 +126,12 @@ def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
     log.info('Reading config file...')
     try:
         with open(ori, 'r') as stream:
-            config = yaml.load(stream)
+            config = yaml.safe_load(stream)
             img_list = config['dataset']['input_file']
             cache_path = config['dataset']['cache_line_dir']
+            mask_band = config['dataset'].get('mask_band', 0) - 1
+            mask_values = config['dataset'].get('mask_values',
+                                                cons.NOB_MASK_VALUES)
     except:
         log.error('Failed to read config file {}'.format(ori))
         return 2
@@ -66,9 +139,8 @@ def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
     # grab dates from image list
     log.info('Grabing dates...')
     try:
-        ts_dates = [x[0] for x in csv2list(img_list, True)]
-        ts_years = [int(x/1000) for x in ts_dates]
-        ts_doys = [x-int(x/1000)*1000 for x in ts_dates]
+        years, weights = nob_weights([x[0] for x in csv2list(img_list, True)],
+                                        yearly, grow)
     except:
         log.error('Failed to grab dates from {}'.format(img_list))
         return 2
@@ -77,39 +149,31 @@ def get_ts_nob(img, ori, des, yearly=False, grow=False, overwrite=False):
     log.info('Reading spatial reference...')
     try:
         geo = stackGeo(img)
-        lines = geo['lines']
-        samples = geo['samples']
+        caches = cache_lines(cache_path)
     except:
         log.error('Failed to read spatial from {}'.format(img))
         return 2
-
-    # initialize output
-    log.info('Initializing output...')
-    try:
-        nob = np.zeros((lines, samples, 2), np.int16) + cons.NODATA
-    except:
-        log.error('Failed to initialize output of size {},{}'.format(lines,
-                    samples))
-        return 3
+    log.info('Found caches for {}/{} lines.'.format(len(caches),
+                geo['lines']))
 
     # calculate nob
     log.info('Calculating nob...')
-    if yearly:
-        years = range(min(ts_years), max(ts_years) + 1)
+    blocks = nob_blocks(caches, geo, weights, mask_band, mask_values)
+    if yearly and not stack:
+        des2 = [os.path.join(des, 'nob_{}.tif'.format(x)) for x in years]
+        log.info('Writing output: {}'.format(', '.join(des2)))
+        if blocks2files(blocks, geo, des2, ['nob {}'.format(x) for x in years],
+                        cons.NODATA, gdal.GDT_Int16, overwrite, 'GTiff',
+                        ['COMPRESS=PACKBITS']) > 0:
+            log.error('Failed to write output to {}'.format(des))
+            return 4
     else:
-        years = [0]
-        des2 = des
-    for year in years:
-        if year > 0:
-            log.info('Processing year {}...'.format(year))
-            des2 = os.path.join(des, 'nob_{}.tif'.format(year))
-        for i in range(0, lines):
-            cache_file = get_files(cache_path, '*{}*npz'.format(i))
-            cache = np.load(os.path.join(cache_file[0][0], cache_file[0][1]))
-            for j in range(0, samples):
-                ts = cache['Y'][:, :, x]
-
-
+        log.info('Writing output: {}'.format(des))
+        bands = ['nob {}'.format(x) if x > 0 else 'nob' for x in years]
+        if blocks2stack(blocks, geo, des, bands, cons.NODATA, gdal.GDT_Int16,
+                        overwrite, 'GTiff', ['COMPRESS=PACKBITS']) > 0:
+            log.error('Failed to write output to {}'.format(des))
+            return 4
 
     # done
     log.info('Process completed.')
@@ -123,12 +187,16 @@ if __name__ == '__main__':
                         help='yearly results or not')
     parser.add_argument('-g', '--grow', action='store_true',
                         help='just growing season or not')
+    parser.add_argument('-s', '--stack', action='store_true',
+                        help='yearly results in one stack')
     parser.add_argument('--overwrite', action='store_true',
                         help='overwrite or not')
     parser.add_argument('img', default='./', help='image to get spatial')
     parser.add_argument('ori', default='./', help='origin of config files')
     parser.add_argument('des', default='./', help='destination')
+    profile_args(parser)
     args = parser.parse_args()
+    profile_start(args, args.des)
 
     # print logs
     log.info('Start calculating nob...')
@@ -137,11 +205,13 @@ if __name__ == '__main__':
     log.info('Saving as {}'.format(args.des))
     if args.yearly:
         log.info('Yearly results.')
+        if args.stack:
+            log.info('In one stack.')
     if args.grow:
         log.info('Growing season only.')
     if args.overwrite:
         log.info('Overwriting existing image.')
 
     # run function to get nob
-    get_ts_nob(args.img, args.ori, args.des, args.yearly, args.grow,
-                args.overwrite)
+    sys.exit(get_ts_nob(args.img, args.ori, args.des, args.yearly, args.grow,
+                        args.stack, args.overwrite))
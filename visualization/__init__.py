@@ -1,6 +1,12 @@
 """ Module for visualization libarary
 """
-from .cloud import nob_per_month
+from ..common.lazy import lazy_attrs
+
+
+# submodules are imported on first access of their names
+__getattr__, __dir__ = lazy_attrs(__name__, [
+    ['cloud', ['nob_per_month']]
+])
 
 
 __all__ = [